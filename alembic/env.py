@@ -0,0 +1,76 @@
+""" env.py berisikan konfigurasi Alembic: URL dari .env dan metadata dari orm_models """
+
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, pool
+from sqlalchemy.engine import make_url
+
+from alembic import context
+
+from app.core.database import Base, DATABASE_SESSION, DATABASE_TRANSACTION
+import orm_models  # noqa: F401 (daftarkan semua tabel ke Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Tabel FTS5 SQLite (dan shadow table-nya) dibuat lewat DDL mentah, bukan model
+    if type_ == "table" and name.startswith(orm_models.SQLITE_SEARCH_TABLE):
+        return False
+    # Index dengan ddl_if(dialect=...) (GIN full-text / trigram) cuma ada di dialect itu
+    ddl_if = getattr(obj, "_ddl_if", None)
+    if type_ == "index" and ddl_if is not None and ddl_if.dialect:
+        return context.get_context().dialect.name == ddl_if.dialect
+    return True
+
+
+def migration_url():
+    # DDL lewat Session pooler: Transaction pooler bisa memindah statement ke backend lain
+    url = config.get_main_option("sqlalchemy.url") or DATABASE_SESSION or DATABASE_TRANSACTION
+    if not url:
+        raise RuntimeError("Set DATABASE_SESSION atau DATABASE_TRANSACTION di .env sebelum menjalankan alembic")
+    return make_url(url)
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=migration_url().difference_update_query(["pgbouncer"]),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Engine sendiri tanpa PRAGMA foreign_keys: batch SQLite men-drop tabel lama yang masih direferensikan
+    connectable = create_engine(migration_url().difference_update_query(["pgbouncer"]), poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        # render_as_batch: SQLite (dev/test) tidak bisa ALTER constraint, jadi tabelnya dibuat ulang
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
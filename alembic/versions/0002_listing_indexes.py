@@ -0,0 +1,51 @@
+"""index listing, filter dan feed review
+
+Revision ID: 0002_listing_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_listing_indexes'
+down_revision: Union[str, Sequence[str], None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filter listing published per kategori / range harga
+    op.create_index('ix_wisata_status_category', 'wisata', ['status', 'category_id', 'id_wisata'], unique=False)
+    op.create_index('ix_wisata_status_price', 'wisata', ['status', 'ticket_price'], unique=False)
+    # PK link table diawali id_wisata, index ini buat arah sebaliknya
+    op.create_index('ix_wisata_tag_tag_wisata', 'wisata_tag', ['id_tag', 'id_wisata'], unique=False)
+    op.create_index('ix_wisata_facilities_facility_wisata', 'wisata_facilities', ['id_facility', 'id_wisata'], unique=False)
+    # Feed review per wisata, terbaru dulu
+    op.create_index(
+        'ix_editor_reviews_wisata_created',
+        'editor_reviews',
+        ['id_wisata', sa.literal_column('created_at DESC'), sa.literal_column('id_review DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_user_reviews_wisata_created',
+        'user_reviews',
+        ['id_wisata', sa.literal_column('created_at DESC'), sa.literal_column('id_review DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_reviews_wisata_created', table_name='user_reviews')
+    op.drop_index('ix_editor_reviews_wisata_created', table_name='editor_reviews')
+    op.drop_index('ix_wisata_facilities_facility_wisata', table_name='wisata_facilities')
+    op.drop_index('ix_wisata_tag_tag_wisata', table_name='wisata_tag')
+    op.drop_index('ix_wisata_status_price', table_name='wisata')
+    op.drop_index('ix_wisata_status_category', table_name='wisata')
@@ -0,0 +1,52 @@
+"""full-text search dan trigram (khusus Postgres)
+
+Index GIN harus dibuat dengan expression yang sama persis dengan orm_models.search_document,
+kalau tidak planner tidak memakai index-nya. SQLite (dev/test) tidak butuh apa-apa di sini.
+
+Revision ID: 0003_search_indexes
+Revises: 0002_listing_indexes
+Create Date: 2026-10-18 09:31:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_search_indexes'
+down_revision: Union[str, Sequence[str], None] = '0002_listing_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_DOCUMENT = (
+    "to_tsvector('indonesian', coalesce(nama_wisata, '') || ' ' "
+    "|| coalesce(deskripsi, '') || ' ' || coalesce(lokasi, ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # gin_trgm_ops butuh extension pg_trgm (di Supabase sudah tersedia, tinggal di-enable)
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_wisata_search', 'wisata', [sa.text(SEARCH_DOCUMENT)], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_wisata_nama_trgm',
+        'wisata',
+        ['nama_wisata'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'nama_wisata': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_wisata_nama_trgm', table_name='wisata')
+    op.drop_index('ix_wisata_search', table_name='wisata')
+    # Extension pg_trgm sengaja tidak di-drop, bisa jadi dipakai objek lain
@@ -0,0 +1,59 @@
+"""tabel agregat wisata_ratings
+
+Diisi dari user_reviews yang sudah ada (sama dengan `python -m app.api.review.rebuild_ratings`).
+
+Revision ID: 0004_wisata_ratings
+Revises: 0003_search_indexes
+Create Date: 2026-10-18 09:32:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_wisata_ratings'
+down_revision: Union[str, Sequence[str], None] = '0003_search_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wisata_ratings',
+    sa.Column('id_wisata', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_1', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_2', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_3', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_4', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_5', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_wisata'], ['wisata.id_wisata'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_wisata')
+    )
+    op.execute(
+        """
+        INSERT INTO wisata_ratings
+            (id_wisata, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5, updated_at)
+        SELECT id_wisata,
+               count(*),
+               sum(rating),
+               sum(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               sum(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               sum(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               sum(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               sum(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM user_reviews
+        GROUP BY id_wisata
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('wisata_ratings')
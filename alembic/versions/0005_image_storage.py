@@ -0,0 +1,88 @@
+"""content-addressed image_blobs, varian gambar dan index cover
+
+Gambar lama tetap punya digest NULL dan file-nya tidak ikut dihitung ref_count.
+
+Revision ID: 0005_image_storage
+Revises: 0004_wisata_ratings
+Create Date: 2026-10-18 09:33:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_image_storage'
+down_revision: Union[str, Sequence[str], None] = '0004_wisata_ratings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_blobs',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('image_url', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+
+    with op.batch_alter_table('wisata_images', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('digest', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('wisata_images_digest_fkey', 'image_blobs', ['digest'], ['digest'])
+        batch_op.create_index('ix_wisata_images_digest', ['digest'], unique=False)
+
+    # Gambar per wisata (selectinload) dan cover: primary dulu, lalu gambar paling lama
+    op.create_index(
+        'ix_wisata_images_wisata_cover',
+        'wisata_images',
+        ['id_wisata', sa.literal_column('is_primary DESC'), 'id_image'],
+        unique=False,
+    )
+
+    if op.get_bind().dialect.name == 'sqlite':
+        # Di skema awal index ini tidak partial di SQLite, jadi wisata cuma bisa punya satu gambar
+        op.drop_index('unique_primary_per_wisata', table_name='wisata_images')
+        op.create_index(
+            'unique_primary_per_wisata',
+            'wisata_images',
+            ['id_wisata'],
+            unique=True,
+            sqlite_where=sa.text('is_primary = 1'),
+        )
+
+    op.create_table('wisata_image_variants',
+    sa.Column('id_variant', sa.Integer(), nullable=False),
+    sa.Column('id_image', sa.Integer(), nullable=False),
+    sa.Column('image_url', sa.String(), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_image'], ['wisata_images.id_image'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_variant'),
+    sa.UniqueConstraint('id_image', 'format', 'width')
+    )
+    op.create_index('ix_wisata_image_variants_id_variant', 'wisata_image_variants', ['id_variant'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_wisata_image_variants_id_variant', table_name='wisata_image_variants')
+    op.drop_table('wisata_image_variants')
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.drop_index('unique_primary_per_wisata', table_name='wisata_images')
+        op.create_index('unique_primary_per_wisata', 'wisata_images', ['id_wisata'], unique=True)
+
+    op.drop_index('ix_wisata_images_wisata_cover', table_name='wisata_images')
+    with op.batch_alter_table('wisata_images', schema=None) as batch_op:
+        batch_op.drop_index('ix_wisata_images_digest')
+        batch_op.drop_constraint('wisata_images_digest_fkey', type_='foreignkey')
+        batch_op.drop_column('digest')
+
+    op.drop_table('image_blobs')
@@ -0,0 +1,55 @@
+"""tabel FTS5 pengganti tsvector (khusus SQLite)
+
+Postgres memakai index GIN dari 0003_search_indexes; di sini tidak ada apa-apa untuk Postgres.
+Isi statement harus sama dengan orm_models.SQLITE_SEARCH_DDL.
+
+Revision ID: 0006_sqlite_search
+Revises: 0005_image_storage
+Create Date: 2026-10-18 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_sqlite_search'
+down_revision: Union[str, Sequence[str], None] = '0005_image_storage'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS wisata_fts USING fts5("
+    "nama_wisata, deskripsi, lokasi, content='wisata', content_rowid='id_wisata', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS wisata_fts_ai AFTER INSERT ON wisata BEGIN "
+    "INSERT INTO wisata_fts(rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES (new.id_wisata, new.nama_wisata, new.deskripsi, new.lokasi); END",
+    "CREATE TRIGGER IF NOT EXISTS wisata_fts_ad AFTER DELETE ON wisata BEGIN "
+    "INSERT INTO wisata_fts(wisata_fts, rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES ('delete', old.id_wisata, old.nama_wisata, old.deskripsi, old.lokasi); END",
+    "CREATE TRIGGER IF NOT EXISTS wisata_fts_au AFTER UPDATE ON wisata BEGIN "
+    "INSERT INTO wisata_fts(wisata_fts, rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES ('delete', old.id_wisata, old.nama_wisata, old.deskripsi, old.lokasi); "
+    "INSERT INTO wisata_fts(rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES (new.id_wisata, new.nama_wisata, new.deskripsi, new.lokasi); END",
+    "INSERT INTO wisata_fts(wisata_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in SQLITE_SEARCH_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('wisata_fts_ai', 'wisata_fts_ad', 'wisata_fts_au'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS wisata_fts')
@@ -5,6 +5,7 @@ from .category import category_router
 from .tags import tags_router
 from .facilities import facility_router
 from .review import review_router
+from .metrics import metrics_router
 
 routers = [
     user_router.router,
@@ -13,5 +14,6 @@ routers = [
     category_router.router,
     tags_router.router,
     facility_router.router,
-    review_router.router
+    review_router.router,
+    metrics_router.router,
 ]
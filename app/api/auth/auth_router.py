@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core import auth
 from app.core.auth import create_access_token
-from app.core.database import get_db
+from app.core.database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import  OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.api.user import user_service
@@ -12,6 +13,6 @@ from app.schema.user.user_schema import UserRegis, UserResponse
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/login", response_model=auth.Token)
-def login_endpoint(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    return auth_service.login_user(db, form_data.username, form_data.password)
+async def login_endpoint(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await auth_service.login_user(db, form_data.username, form_data.password)
 
@@ -1,32 +1,40 @@
 from datetime import timedelta
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from app.core.security import verify_password
+from app.core.security import verify_and_update_password_async
 from orm_models import User
 from app.core.auth import create_access_token, Token
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
     Check credentials and return User object if valid, else None.
     """
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     
     if not user:
         return None
         
-    if not verify_password(password, user.password):
+    # bcrypt jalan di pool khusus, jadi tidak nge-block event loop maupun route lain
+    valid, new_hash = await verify_and_update_password_async(password, user.password)
+    if not valid:
         return None
+
+    # Hash lama (cost bcrypt berbeda) di-upgrade sekalian saat login berhasil
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
         
     return user
 
 
-def login_user(db: Session, username: str, password: str) -> Token:
+async def login_user(db: AsyncSession, username: str, password: str) -> Token:
     """
     Orchestrates the login process.
     """
     # 1. Authenticate
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user(db, username, password)
     
     # 2. Handle failure (The Router/Service layer decides the specific error)
     if not user:
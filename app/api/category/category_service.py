@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from orm_models import Category
 from app.schema.categories.categories_schema import CategoryCreate, CategoryResponse, CategoryUpdate
 from typing import List, Optional, Dict, Any
+from app.api.wisata.wisata_service import invalidate_wisata_cache
 
 def get_all_category(db: Session) -> List[Category]:
     return db.query(Category).all()
@@ -30,6 +31,8 @@ def update_category(db: Session, category_data: CategoryUpdate, id_category: int
         setattr(category, key, value)
         
     db.commit()
+    # Nama ikut tampil di response wisata yang di-cache
+    invalidate_wisata_cache()
     db.refresh(category)
     return category
 
@@ -45,5 +48,6 @@ def delete_category(db: Session, id_category: int) -> Dict[str, str]:
     
     db.delete(category)
     db.commit()
+    invalidate_wisata_cache()
     
     return {"status": "success", "message": f"Category {nama} deleted"}
\ No newline at end of file
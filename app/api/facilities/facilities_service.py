@@ -3,9 +3,12 @@ from sqlalchemy.orm import Session
 from orm_models import Facility
 from app.schema.facilities.facilities_schema import FacilitiesCreate, FacilitiesResponse, FacilitiesUpdate
 from typing import List, Optional, Dict, Any
+from app.core.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
+from app.api.wisata.wisata_service import invalidate_wisata_cache
 
-def get_all_facility(db: Session) -> List[Facility]:
-    return db.query(Facility).all()
+def get_all_facility(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict[str, Any]:
+    items, next_cursor = keyset_paginate(db.query(Facility), Facility.id_facility, limit=limit, after=after)
+    return {"items": items, "next_cursor": next_cursor}
 
 def get_facility_by_id(db: Session, id_facility: int) -> Facility | None:
     return db.query(Facility).filter(Facility.id_facility == id_facility).first()
@@ -30,6 +33,8 @@ def update_facility(db: Session, facility_data: FacilitiesUpdate, id_facility: i
         setattr(facilities, key, value)
         
     db.commit()
+    # Nama ikut tampil di response wisata yang di-cache
+    invalidate_wisata_cache()
     db.refresh(facilities)
     return facilities
 
@@ -45,5 +50,6 @@ def delete_facility(db: Session, id_facility: int) -> Dict[str, str]:
     
     db.delete(facilities)
     db.commit()
+    invalidate_wisata_cache()
     
     return {"status": "success", "message": f"facility {nama} deleted"}
\ No newline at end of file
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
 from sqlalchemy.orm import Session
 from orm_models import UserRole, WisataStatus
 from app.core.database import get_db
 from app.core.auth import require_role
 from app.api.facilities import facilities_service
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schema.pagination.pagination_schema import Page
 from app.schema.facilities.facilities_schema import FacilitiesCreate, FacilitiesResponse, FacilitiesUpdate
 
 router = APIRouter(
@@ -11,9 +14,9 @@ router = APIRouter(
     tags=["facility"]
 )
 
-@router.get("/", response_model=list[FacilitiesResponse])
-def get_all_facility(db: Session = Depends(get_db)):
-    return facilities_service.get_all_facility(db=db)
+@router.get("/", response_model=Page[FacilitiesResponse])
+def get_all_facility(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None, db: Session = Depends(get_db)):
+    return facilities_service.get_all_facility(db=db, limit=limit, after=after)
 
 @router.get("/{id_facility}", response_model=FacilitiesResponse)
 def get_facility_by_id(id_facility:int, db: Session = Depends(get_db)):
@@ -1,5 +1,268 @@
-from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from orm_models import Tag
-from app.schema.tags.schema import TagsCreate, TagsResponse, TagsUpdate
-from typing import List, Optional, Dict, Any
\ No newline at end of file
+""" image_service.py berisikan helper penyimpanan file gambar wisata (upload streaming, content-addressed, turunan gambar)"""
+
+from fastapi import HTTPException, status, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app.core.static_files import content_etag
+from app.core.storage import get_storage
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Batas ukuran file upload (byte), default 10 MB
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+# File dibaca/ditulis per potongan ini, jadi memori per upload tidak tergantung ukuran file
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Lebar turunan gambar (px) dan jumlah process yang membuatnya
+IMAGE_VARIANT_WIDTHS = tuple(sorted(
+    int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(",") if w.strip()
+))
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+
+# Ekstensi file berdasarkan tipe yang terdeteksi dari isi file
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+}
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Tebak tipe gambar dari magic bytes di awal file, bukan dari content_type kiriman client."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+# Gambar disimpan berdasarkan sha256 isinya (content-addressed), jadi file yang sama cuma disimpan sekali.
+# Isi file dengan key yang sama tidak pernah berubah. Key = nilai kolom image_url (lihat app.core.storage).
+BLOB_URL_PREFIX = "static/images/blobs"
+# Upload lama (sebelum content-addressed) disimpan per wisata: static/images/wisata/{id_wisata}/...
+WISATA_IMAGE_PREFIX = "static/images/wisata"
+
+
+@dataclass
+class StoredImage:
+    """Upload yang sudah ditulis ke temp file; baru masuk storage setelah publish_image."""
+    digest: str
+    url: str
+    content_type: str
+    size: int
+    temp_path: str
+
+
+def blob_key(digest: str, content_type: str) -> str:
+    """Key storage untuk sebuah digest. Dipecah per 2 karakter awal biar folder tidak terlalu besar."""
+    return f"{BLOB_URL_PREFIX}/{digest[:2]}/{digest}{IMAGE_EXTENSIONS[content_type]}"
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Ukuran file maksimal {MAX_UPLOAD_SIZE // (1024 * 1024)} MB",
+    )
+
+
+def _open_temp(folder: str) -> BinaryIO:
+    os.makedirs(folder, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=folder, suffix=".part", delete=False)
+
+
+def _write_chunk(buffer: BinaryIO, hasher, chunk: bytes) -> None:
+    # hashlib melepas GIL untuk data besar, jadi hash + tulis sama-sama di thread
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+def _close(buffer: BinaryIO) -> None:
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_image_upload(file: UploadFile) -> StoredImage:
+    """
+    Tulis upload gambar ke temp file per potongan UPLOAD_CHUNK_SIZE sambil menghitung sha256-nya.
+    Semua operasi disk jalan di threadpool. Panggil publish_image setelah baris DB tersimpan,
+    atau discard_image kalau gagal.
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise _too_large()
+
+    buffer = await run_in_threadpool(_open_temp, get_storage().staging_folder)
+    hasher = hashlib.sha256()
+    try:
+        header = await file.read(UPLOAD_CHUNK_SIZE)
+        content_type = sniff_image_type(header)
+        if content_type is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format file tidak didukung")
+
+        size = 0
+        chunk = header
+        while chunk:
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                raise _too_large()
+            await run_in_threadpool(_write_chunk, buffer, hasher, chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+        await run_in_threadpool(_close, buffer)
+    except BaseException:
+        buffer.close()
+        await run_in_threadpool(_unlink, buffer.name)
+        raise
+
+    digest = hasher.hexdigest()
+    return StoredImage(
+        digest=digest,
+        url=blob_key(digest, content_type),
+        content_type=content_type,
+        size=size,
+        temp_path=buffer.name,
+    )
+
+
+async def publish_image(stored: StoredImage) -> None:
+    # File lama dengan key yang sama ditimpa, bukan dipercaya begitu saja (bisa sedang dihapus)
+    await get_storage().put_file(stored.temp_path, stored.url, stored.content_type, immutable=True)
+
+
+async def discard_image(stored: StoredImage) -> None:
+    await run_in_threadpool(_unlink, stored.temp_path)
+
+
+async def remove_files(keys: Iterable[str]) -> None:
+    await get_storage().delete(keys)
+
+
+# ======================
+# DERIVATIVE (THUMBNAIL / WEBP / AVIF)
+# ======================
+
+_variant_pool: Optional[ProcessPoolExecutor] = None
+_variant_pool_lock = threading.Lock()
+
+
+def pillow_available() -> bool:
+    # Pillow dependency opsional (`uv sync --extra images`); tanpa Pillow upload tetap jalan tanpa varian
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _variant_formats(has_alpha: bool) -> List[str]:
+    from PIL import features
+
+    # Fallback untuk client lama: PNG kalau transparan, selain itu JPEG
+    formats = ["png" if has_alpha else "jpeg", "webp"]
+    if features.check("avif"):
+        formats.append("avif")
+    return formats
+
+
+def render_variants(source_path: str, folder: str, stem: str, widths: tuple = IMAGE_VARIANT_WIDTHS,
+                    quality: int = IMAGE_VARIANT_QUALITY) -> List[Dict]:
+    """
+    Buat semua turunan satu gambar. Jalan di process pool (CPU-bound, tidak boleh di event loop).
+    Gambar tidak pernah diperbesar; kalau aslinya lebih kecil dari semua lebar, dibuat satu turunan seukuran aslinya.
+    """
+    from PIL import Image, ImageOps
+
+    variants = []
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        targets = [w for w in widths if w < image.width] or [image.width]
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in _variant_formats(has_alpha):
+                ext = "jpg" if fmt == "jpeg" else fmt
+                filename = f"{stem}-{width}w.{ext}"
+                tmp_path = os.path.join(folder, f".{filename}.part")
+                options = {"optimize": True} if fmt == "png" else {"quality": quality}
+                resized.save(tmp_path, format=fmt.upper(), **options)
+                os.replace(tmp_path, os.path.join(folder, filename))
+                variants.append({"filename": filename, "format": fmt, "width": width, "height": height})
+    return variants
+
+
+def _get_variant_pool() -> ProcessPoolExecutor:
+    global _variant_pool
+    if _variant_pool is None:
+        with _variant_pool_lock:
+            if _variant_pool is None:
+                _variant_pool = ProcessPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS)
+    return _variant_pool
+
+
+async def render_variants_async(source_path: str, folder: str, stem: str) -> List[Dict]:
+    """Jalankan render_variants di process pool. Pillow harus sudah dicek (lihat store_variants)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_variant_pool(), render_variants, source_path, folder, stem)
+
+
+def _make_temp_dir(parent: str) -> str:
+    os.makedirs(parent, exist_ok=True)
+    return tempfile.mkdtemp(dir=parent)
+
+
+async def store_variants(key: str) -> List[Dict]:
+    """
+    Buat turunan gambar `key` di folder sementara lalu simpan ke storage di sebelah aslinya.
+    Return data turunan ditambah "key"-nya, atau [] kalau Pillow tidak terpasang.
+    """
+    if not pillow_available():
+        logger.info("Pillow tidak terpasang, turunan gambar %s dilewati", key)
+        return []
+
+    storage = get_storage()
+    folder = os.path.dirname(key)
+    stem = os.path.splitext(os.path.basename(key))[0]
+    work_dir = await run_in_threadpool(_make_temp_dir, storage.staging_folder)
+    try:
+        async with storage.local_copy(key) as source_path:
+            rendered = await render_variants_async(source_path, work_dir, stem)
+        for variant in rendered:
+            variant["key"] = f"{folder}/{variant['filename']}"
+            await storage.put_file(
+                os.path.join(work_dir, variant["filename"]),
+                variant["key"],
+                f"image/{variant['format']}",
+                immutable=content_etag(variant["filename"]) is not None,
+            )
+    finally:
+        await run_in_threadpool(shutil.rmtree, work_dir, True)
+    return rendered
+
+
+def shutdown_variant_pool() -> None:
+    global _variant_pool
+    if _variant_pool is not None:
+        _variant_pool.shutdown(wait=False, cancel_futures=True)
+        _variant_pool = None
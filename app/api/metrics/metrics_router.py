@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.core import metrics
+from app.core.database import get_pool_stats
+from app.core.auth import principal_cache
+from app.core.static_files import static_cache
+from app.api.wisata.wisata_service import wisata_cache
+import os
+import secrets
+
+# Kalau diisi, Prometheus harus kirim "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Tanpa METRICS_TOKEN /metrics ditolak, kecuali dibuka eksplisit (development lokal)
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() == "true"
+
+# Statistik pool yang berupa angka: (key dari get_pool_stats, nama metric, tipe, help)
+POOL_METRICS = (
+    ("size", "db_pool_size", "gauge", "Ukuran pool"),
+    ("checked_in", "db_pool_checked_in", "gauge", "Connection idle di pool"),
+    ("checked_out", "db_pool_checked_out", "gauge", "Connection yang sedang dipakai"),
+    ("overflow", "db_pool_overflow", "gauge", "Connection overflow yang terbuka"),
+    ("checkouts", "db_pool_checkouts_total", "counter", "Jumlah checkout connection"),
+    ("timeouts", "db_pool_timeouts_total", "counter", "Checkout yang timeout menunggu connection"),
+    ("wait_seconds_total", "db_pool_wait_seconds_total", "counter", "Total waktu menunggu connection"),
+    ("wait_seconds_max", "db_pool_wait_seconds_max", "gauge", "Waktu tunggu connection terlama"),
+)
+
+CACHES = {
+    "wisata": wisata_cache,
+    "principal": principal_cache,
+    "static": static_cache,
+}
+
+router = APIRouter(tags=["metrics"])
+
+
+def _samples():
+    for engine, stats in get_pool_stats().items():
+        for key, name, metric_type, help_text in POOL_METRICS:
+            if key in stats:
+                yield name, metric_type, help_text, {"engine": engine}, stats[key]
+
+    for name, cache in CACHES.items():
+        stats = cache.stats()
+        yield "cache_hits_total", "counter", "Cache hit", {"cache": name}, stats["hits"]
+        yield "cache_misses_total", "counter", "Cache miss", {"cache": name}, stats["misses"]
+        yield "cache_entries", "gauge", "Jumlah entry di cache", {"cache": name}, stats["size"]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        if not METRICS_PUBLIC:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Set METRICS_TOKEN (atau METRICS_PUBLIC=true untuk development) untuk membuka /metrics",
+            )
+    elif not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token metrics tidak valid")
+    return PlainTextResponse(
+        metrics.registry.render(_samples()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
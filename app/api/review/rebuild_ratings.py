@@ -0,0 +1,31 @@
+""" rebuild_ratings.py berisikan command untuk menghitung ulang tabel wisata_ratings dari user_reviews
+
+Pemakaian:
+    python -m app.api.review.rebuild_ratings
+"""
+
+from sqlalchemy import delete, insert, select
+
+from app.core.database import SessionLocal, get_engine
+from app.api.review.review_service import rating_aggregate_columns
+from orm_models import UserReview, WisataRating, RATING_VALUES
+
+
+def rebuild_ratings() -> int:
+    """Hapus semua agregat lalu isi ulang dengan satu INSERT ... SELECT GROUP BY. Return jumlah wisata."""
+    get_engine()
+    columns = ["id_wisata", "review_count", "rating_sum", *(f"rating_{value}" for value in RATING_VALUES)]
+    aggregates = (
+        select(UserReview.id_wisata, *rating_aggregate_columns())
+        .group_by(UserReview.id_wisata)
+    )
+
+    with SessionLocal() as db:
+        db.execute(delete(WisataRating))
+        result = db.execute(insert(WisataRating).from_select(columns, aggregates))
+        db.commit()
+        return result.rowcount
+
+
+if __name__ == "__main__":
+    print(f"Rating {rebuild_ratings()} wisata berhasil dihitung ulang")
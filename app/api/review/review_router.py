@@ -1,13 +1,54 @@
 from app.core.auth import get_current_user 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from orm_models import UserRole, WisataStatus
-from app.core.database import get_db
-from app.core.auth import require_role
+from app.core.database import get_async_db
+from app.core.auth import require_role, get_current_principal, TokenData
 from app.api.review import review_service
-from app.schema.review.review_schema import UserReviewResponse, UserReviewCreate
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schema.pagination.pagination_schema import CursorPage
+from app.schema.review.review_schema import (
+    UserReviewResponse,
+    UserReviewCreate,
+    UserReviewUpdate,
+    EditorReviewCreate,
+    EditorReviewResponse,
+)
 
 router = APIRouter(
     prefix="/review",
     tags=["review"]
 )
+
+@router.get("/wisata/{id_wisata}", response_model=CursorPage[UserReviewResponse])
+async def get_user_reviews(id_wisata: int, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    return await review_service.get_user_reviews_by_wisata(db=db, id_wisata=id_wisata, limit=limit, after=after)
+
+@router.get("/wisata/{id_wisata}/editor", response_model=CursorPage[EditorReviewResponse])
+async def get_editor_reviews(id_wisata: int, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    return await review_service.get_editor_reviews_by_wisata(db=db, id_wisata=id_wisata, limit=limit, after=after)
+
+@router.post("/", response_model=UserReviewResponse, status_code=status.HTTP_201_CREATED,
+             responses={200: {"model": UserReviewResponse, "description": "Review lama user di wisata ini diperbarui"}})
+async def create_user_review(review_data: UserReviewCreate, response: Response, principal: TokenData = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
+    review, created = await review_service.create_user_review(db=db, review_data=review_data, id_user=principal.id_user)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return review
+
+@router.post("/editor", response_model=EditorReviewResponse, status_code=status.HTTP_201_CREATED)
+async def create_editor_review(
+    review_data: EditorReviewCreate,
+    principal: TokenData = Depends(require_role(UserRole.editor, UserRole.admin)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await review_service.create_editor_review(db=db, review_data=review_data, editor_id=principal.id_user)
+
+@router.patch("/{id_review}", response_model=UserReviewResponse)
+async def update_user_review(id_review: int, review_data: UserReviewUpdate, principal: TokenData = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
+    return await review_service.update_user_review(db=db, id_review=id_review, review_data=review_data, principal=principal)
+
+@router.delete("/{id_review}")
+async def delete_user_review(id_review: int, principal: TokenData = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
+    return await review_service.delete_user_review(db=db, id_review=id_review, principal=principal)
@@ -1,45 +1,272 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, func, case, literal
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from orm_models import UserReview, EditorReview, Wisata
+from orm_models import UserReview, EditorReview, Wisata, WisataRating, UserRole, RATING_VALUES
+from app.core.auth import TokenData
+from app.core.database import upsert_insert
+from app.api.wisata.wisata_service import invalidate_wisata_cache
+from app.core.pagination import keyset_paginate_time_async, DEFAULT_PAGE_SIZE
 from app.schema.review.review_schema import (
     EditorReviewCreate,
     EditorReviewResponse,
     EditorReviewUpdate,
     UserReviewCreate,
     UserReviewResponse,
+    UserReviewUpdate,
 )
+from typing import Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
 
 
+def rating_aggregate_columns():
+    """Kolom agregat (count, sum, histogram) dihitung dari user_reviews, dipakai saat rebuild."""
+    return (
+        func.count(UserReview.id_review).label("review_count"),
+        func.coalesce(func.sum(UserReview.rating), 0).label("rating_sum"),
+        *(
+            func.coalesce(func.sum(case((UserReview.rating == value, 1), else_=0)), 0).label(f"rating_{value}")
+            for value in RATING_VALUES
+        ),
+    )
 
-def create_user_review(db: Session, review_data:UserReviewCreate, id_user:int):
-    wisata = db.query(Wisata).filter(Wisata.id_wisata == review_data.id_wisata).first()
-    
-    if not wisata:
+
+async def _recompute_rating(db: AsyncSession, id_wisata: int) -> None:
+    """
+    Buat baris agregat dari user_reviews yang ada (INSERT ... SELECT).
+    Kalau request lain sudah membuatnya duluan, biarkan (ON CONFLICT DO NOTHING).
+    Wisata yang tidak ada gagal di foreign key -> IntegrityError.
+    """
+    columns = ["id_wisata", "review_count", "rating_sum", *(f"rating_{value}" for value in RATING_VALUES)]
+    aggregates = select(literal(id_wisata), *rating_aggregate_columns()).where(UserReview.id_wisata == id_wisata)
+    await db.execute(
+        upsert_insert(db)(WisataRating).from_select(columns, aggregates).on_conflict_do_nothing()
+    )
+
+
+async def _lock_rating(db: AsyncSession, id_wisata: int) -> None:
+    """
+    Kunci baris wisata_ratings (FOR UPDATE) supaya review ke wisata yang sama diproses bergantian.
+    Statement setelah lock dapat snapshot baru, jadi rating lama yang dibaca upsert pasti yang terbaru.
+    """
+    if db.bind.dialect.name == "sqlite":
+        # SQLite tidak punya FOR UPDATE dan SELECT belum membuka transaksi;
+        # write pertama yang mengambil lock tulis database sampai commit
+        result = await db.execute(
+            update(WisataRating)
+            .where(WisataRating.id_wisata == id_wisata)
+            .values(review_count=WisataRating.review_count)
+        )
+        if result.rowcount == 0:
+            await _recompute_rating(db, id_wisata)
+        return
+
+    lock = select(WisataRating.id_wisata).where(WisataRating.id_wisata == id_wisata).with_for_update()
+    if await db.scalar(lock) is None:
+        await _recompute_rating(db, id_wisata)
+        await db.scalar(lock)
+
+
+async def apply_rating_delta(db: AsyncSession, id_wisata: int, old_rating: Optional[int], new_rating: Optional[int]) -> None:
+    """
+    Update agregat rating secara incremental (satu UPDATE, tanpa scan user_reviews).
+    old_rating None = review baru, new_rating None = review dihapus.
+    Harus dipanggil setelah perubahan review di-flush dan sebelum commit, supaya satu transaksi.
+    """
+    if old_rating == new_rating:
+        return
+
+    count_delta = int(new_rating is not None) - int(old_rating is not None)
+    values = {
+        "review_count": WisataRating.review_count + count_delta,
+        "rating_sum": WisataRating.rating_sum + (new_rating or 0) - (old_rating or 0),
+        "updated_at": datetime.now(timezone.utc),
+    }
+    if old_rating is not None:
+        column = f"rating_{old_rating}"
+        values[column] = getattr(WisataRating, column) - 1
+    if new_rating is not None:
+        column = f"rating_{new_rating}"
+        values[column] = getattr(WisataRating, column) + 1
+
+    result = await db.execute(
+        update(WisataRating).where(WisataRating.id_wisata == id_wisata).values(**values)
+    )
+    if result.rowcount == 0:
+        # Belum ada baris agregat (wisata lama / belum di-rebuild): hitung dari review yang ada
+        await _recompute_rating(db, id_wisata)
+
+
+# Foreign key ke wisata yang bisa gagal saat upsert review (nama default Postgres <tabel>_<kolom>_fkey)
+WISATA_FOREIGN_KEYS = {"user_reviews_id_wisata_fkey", "wisata_ratings_id_wisata_fkey"}
+
+
+def _violated_constraint(error: IntegrityError) -> Optional[str]:
+    """Nama constraint yang gagal kalau driver melaporkannya (asyncpg / psycopg2); SQLite tidak."""
+    orig = error.orig
+    cause = getattr(orig, "__cause__", None)
+    return getattr(cause, "constraint_name", None) or getattr(getattr(orig, "diag", None), "constraint_name", None)
+
+
+async def _ensure_wisata(db: AsyncSession, id_wisata: int) -> None:
+    if await db.scalar(select(Wisata.id_wisata).where(Wisata.id_wisata == id_wisata)) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tempat wisata tidak ditemukan")
-    
-    existing_review = (db.query(UserReview).filter(UserReview.id_wisata == review_data.id_wisata,
-                                                   UserReview.id_user == id_user))
-    
-    if existing_review:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Kamu sudah pernah membuat review di wisata ini, Silahkan update reviewmu saja")
-    
-    new_review = UserReview(
-        id_wisata=review_data.id_wisata,
-        id_user=id_user,
-        rating=review_data.rating,
-        comment=review_data.comment
+
+
+async def get_user_reviews_by_wisata(db: AsyncSession, id_wisata: int, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None) -> Dict[str, Any]:
+    if after is None:
+        await _ensure_wisata(db, id_wisata)
+    items, next_cursor = await keyset_paginate_time_async(
+        db,
+        select(UserReview).where(UserReview.id_wisata == id_wisata),
+        UserReview.created_at,
+        UserReview.id_review,
+        limit=limit,
+        after=after,
     )
-    
-    db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
-    
-    return new_review
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def get_editor_reviews_by_wisata(db: AsyncSession, id_wisata: int, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None) -> Dict[str, Any]:
+    if after is None:
+        await _ensure_wisata(db, id_wisata)
+    items, next_cursor = await keyset_paginate_time_async(
+        db,
+        select(EditorReview).where(EditorReview.id_wisata == id_wisata),
+        EditorReview.created_at,
+        EditorReview.id_review,
+        limit=limit,
+        after=after,
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def get_user_review(db: AsyncSession, id_review: int) -> UserReview:
+    review = await db.get(UserReview, id_review)
+    if not review:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review tidak ditemukan")
+    return review
+
+
+def _check_owner(review: UserReview, principal: TokenData) -> None:
+    if review.id_user != principal.id_user and principal.role != UserRole.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Kamu tidak bisa mengubah review milik user lain")
+
+
+async def create_user_review(db: AsyncSession, review_data:UserReviewCreate, id_user:int) -> Tuple[UserReview, bool]:
+    """
+    Buat review, atau timpa review lama user di wisata yang sama, dengan satu
+    INSERT ... ON CONFLICT (id_wisata, id_user) DO UPDATE di atas unique constraint user_reviews
+    (di SQLite didahului SELECT rating lama).
+    Agregat rating ikut di-update di transaksi yang sama.
+    Return (review, created); created False kalau yang terjadi update review lama.
+    """
+    id_wisata = review_data.id_wisata
+    same_review = (UserReview.id_wisata == id_wisata, UserReview.id_user == id_user)
+
+    try:
+        await _lock_rating(db, id_wisata)
+
+        insert_ = upsert_insert(db)
+        stmt = insert_(UserReview).values(
+            id_wisata=id_wisata,
+            id_user=id_user,
+            rating=review_data.rating,
+            comment=review_data.comment,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserReview.id_wisata, UserReview.id_user],
+            set_={"rating": stmt.excluded.rating, "comment": stmt.excluded.comment},
+        )
+
+        if db.bind.dialect.name == "postgresql":
+            # CTE membaca snapshot sebelum upsert, jadi rating lama ikut di RETURNING
+            old_review = select(UserReview.rating).where(*same_review).cte("old_review")
+            stmt = stmt.add_cte(old_review).returning(
+                UserReview, select(old_review.c.rating).scalar_subquery().label("old_rating")
+            )
+            review, old_rating = (
+                await db.execute(stmt.execution_options(populate_existing=True))
+            ).one()
+        else:
+            # RETURNING di SQLite melihat data setelah upsert, jadi rating lama dibaca dulu:
+            # dua round trip (SELECT lalu upsert), bukan satu. Tetap aman karena lock tulis
+            # dari _lock_rating sudah dipegang sampai commit.
+            old_rating = await db.scalar(select(UserReview.rating).where(*same_review))
+            review = (
+                await db.scalars(stmt.returning(UserReview).execution_options(populate_existing=True))
+            ).one()
+
+        await apply_rating_delta(db, id_wisata, old_rating, review.rating)
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # Cuma foreign key wisata yang jadi 404; yang lain (misal user sudah dihapus) tetap error
+        constraint = _violated_constraint(e)
+        if constraint in WISATA_FOREIGN_KEYS:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tempat wisata tidak ditemukan")
+        if constraint is None:
+            await _ensure_wisata(db, id_wisata)
+        raise
+
+    invalidate_wisata_cache(id_wisata)
+    # rating NOT NULL, jadi old_rating None artinya belum ada review sebelumnya
+    return review, old_rating is None
+
+
+async def _get_locked_review(db: AsyncSession, id_review: int, principal: TokenData) -> UserReview:
+    """
+    Review yang dibaca ulang setelah agregat wisata-nya dikunci, supaya rating lama
+    yang dipakai apply_rating_delta bukan nilai basi dari request lain yang jalan bersamaan.
+    """
+    review = await get_user_review(db, id_review)
+    _check_owner(review, principal)
+    await _lock_rating(db, review.id_wisata)
+    review = await db.get(UserReview, id_review, populate_existing=True)
+    if not review:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review tidak ditemukan")
+    return review
+
+
+async def update_user_review(db: AsyncSession, id_review: int, review_data: UserReviewUpdate, principal: TokenData):
+    review = await _get_locked_review(db, id_review, principal)
+
+    old_rating = review.rating
+    # null yang dikirim eksplisit menghapus comment (rating null sudah ditolak schema)
+    for key, value in review_data.model_dump(exclude_unset=True).items():
+        setattr(review, key, value)
+
+    await db.flush()
+    await apply_rating_delta(db, review.id_wisata, old_rating, review.rating)
+    await db.commit()
+    invalidate_wisata_cache(review.id_wisata)
+    return review
+
+
+async def delete_user_review(db: AsyncSession, id_review: int, principal: TokenData):
+    review = await _get_locked_review(db, id_review, principal)
+
+    id_wisata = review.id_wisata
+    # Agregat cuma dikurangi kalau baris review-nya memang terhapus di transaksi ini
+    rating = await db.scalar(
+        delete(UserReview).where(UserReview.id_review == id_review).returning(UserReview.rating)
+    )
+    if rating is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review tidak ditemukan")
+    await apply_rating_delta(db, id_wisata, rating, None)
+    await db.commit()
+    invalidate_wisata_cache(id_wisata)
+    return {"status": "success", "message": "Review deleted"}
+
+
+async def create_editor_review(db: AsyncSession, review_data: EditorReviewCreate, editor_id: int):
+    wisata = await db.get(Wisata, review_data.id_wisata)
+    if not wisata:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tempat wisata tidak ditemukan")
 
-def create_editor_review(db: Session, review_data: EditorReviewCreate, editor_id: int):
     new_review = EditorReview(**review_data.model_dump(), id_editor=editor_id)
     db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
+    await db.commit()
+    await db.refresh(new_review)
     return new_review
@@ -3,9 +3,12 @@ from sqlalchemy.orm import Session
 from orm_models import Tag
 from app.schema.tags.schema import TagsCreate, TagsResponse, TagsUpdate
 from typing import List, Optional, Dict, Any
+from app.core.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
+from app.api.wisata.wisata_service import invalidate_wisata_cache
 
-def get_all_tags(db: Session) -> List[Tag]:
-    return db.query(Tag).all()
+def get_all_tags(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict[str, Any]:
+    items, next_cursor = keyset_paginate(db.query(Tag), Tag.id_tag, limit=limit, after=after)
+    return {"items": items, "next_cursor": next_cursor}
 
 def get_tags_by_id(db: Session, id_tag: int) -> Tag | None:
     return db.query(Tag).filter(Tag.id_tag == id_tag).first()
@@ -30,6 +33,8 @@ def update_tags(db: Session, tag_data: TagsUpdate, id_tag: int) -> Tag | None:
         setattr(tags, key, value)
         
     db.commit()
+    # Nama ikut tampil di response wisata yang di-cache
+    invalidate_wisata_cache()
     db.refresh(tags)
     return tags
 
@@ -45,5 +50,6 @@ def delete_tags(db: Session, id_tag: int) -> Dict[str, str]:
     
     db.delete(tags)
     db.commit()
+    invalidate_wisata_cache()
     
     return {"status": "success", "message": f"tag {nama} deleted"}
\ No newline at end of file
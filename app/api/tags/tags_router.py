@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
 from sqlalchemy.orm import Session
 from orm_models import Tag
 from app.core.database import get_db
 from app.core.auth import require_role
 from app.api.tags import tag_service  
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schema.pagination.pagination_schema import Page
 from app.schema.tags.schema import TagsCreate, TagsUpdate, TagsResponse
 
 router = APIRouter(
@@ -11,9 +14,9 @@ router = APIRouter(
     tags=["tag"]
 )
 
-@router.get("/", response_model=list[TagsResponse])
-def get_all_tags(db: Session = Depends(get_db)):
-    return tag_service.get_all_tags(db=db)
+@router.get("/", response_model=Page[TagsResponse])
+def get_all_tags(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None, db: Session = Depends(get_db)):
+    return tag_service.get_all_tags(db=db, limit=limit, after=after)
 
 @router.get("/{id_tag}", response_model=TagsResponse)
 def get_tags_by_id(id_tag:int, db: Session = Depends(get_db)):
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import orm_models
-from app.core.database import get_db
-from app.core.auth import require_role, get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.auth import require_role, get_current_user, verify_token, TokenData
 from app.api.user import user_service  
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schema.pagination.pagination_schema import Page
 from app.schema.user.user_schema import UserCreate, UserResponse, UserUpdate, UserRegis
 
 router = APIRouter(
@@ -16,12 +20,12 @@ def get_current_user_profile(current_user=Depends(get_current_user)):
     return UserResponse.model_validate(current_user)
 
 @router.post("/", response_model=UserResponse)
-def create_user(request: UserCreate, db: Session = Depends(get_db)):
-    return user_service.create_user(db, request)
+async def create_user(request: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await user_service.create_user(db, request)
 
-@router.get("/", response_model=list[UserResponse], dependencies=[Depends(require_role(orm_models.UserRole.admin))])
-def get_all_users(db: Session = Depends(get_db)):
-    return user_service.get_all_users(db)
+@router.get("/", response_model=Page[UserResponse], dependencies=[Depends(require_role(orm_models.UserRole.admin))])
+def get_all_users(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None, db: Session = Depends(get_db)):
+    return user_service.get_all_users(db, limit=limit, after=after)
 
 @router.get("/id/{id_user}", response_model=UserResponse, dependencies=[Depends(require_role(orm_models.UserRole.admin))])
 def get_user_by_id(id_user:int, db: Session = Depends(get_db)):
@@ -45,16 +49,16 @@ def get_user_by_username(username:str, db: Session = Depends(get_db)):
     return user
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserRegis, db: Session = Depends(get_db)):
-    return user_service.create_register(db=db, user=user)
+async def register(user: UserRegis, db: AsyncSession = Depends(get_async_db)):
+    return await user_service.create_register(db=db, user=user)
 
 @router.patch("/update-me", response_model=UserResponse)
-def current_user_update(user_data: UserUpdate, current_user: orm_models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return user_service.update_me(db=db, current_user=current_user, user_data=user_data)
+async def current_user_update(user_data: UserUpdate, token_data: TokenData = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    return await user_service.update_me(db=db, id_user=token_data.id_user, user_data=user_data)
 
 @router.patch("/{id_user}", response_model=UserResponse)
-def update_user(id_user:int, user_data:UserUpdate, db: Session = Depends(get_db)):
-    return user_service.update_user(db=db, id_user=id_user, user_data=user_data)
+async def update_user(id_user:int, user_data:UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await user_service.update_user(db=db, id_user=id_user, user_data=user_data)
   
 @router.delete("/{id_user}")
 def delete_user(id_user:int, db: Session = Depends(get_db)):
@@ -1,13 +1,17 @@
 from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.core.security import hash_password, verify_password
-from app.core.auth import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import hash_password_async
+from app.core.auth import invalidate_principal
 from orm_models import User, UserRole
 from app.schema.user.user_schema import UserCreate, UserUpdate, UserRegis
 from typing import List, Optional, Dict, Any
+from app.core.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
 
-def get_all_users(db: Session) -> List[User]:
-    return db.query(User).all()
+def get_all_users(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict[str, Any]:
+    items, next_cursor = keyset_paginate(db.query(User), User.id_user, limit=limit, after=after)
+    return {"items": items, "next_cursor": next_cursor}
 
 def get_user_by_id(db: Session, id_user: int) -> User | None:
     return db.query(User).filter(User.id_user == id_user).first()
@@ -18,123 +22,110 @@ def get_user_by_username(db: Session, username: str) -> Optional[User]:
 def get_user_by_email(db: Session, email:str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user_data: UserCreate) -> User:
+async def _find_user(db: AsyncSession, column, value) -> Optional[User]:
+    return await db.scalar(select(User).where(column == value))
+
+async def _check_duplicate(db: AsyncSession, update_data: Dict[str, Any], id_user: int) -> None:
+    #Cek duplikat username / email milik pengguna lain
+    if "username" in update_data:
+        new_username = update_data["username"]
+        existing_user = await _find_user(db, User.username, new_username)
+        if existing_user and existing_user.id_user != id_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"username {new_username} sudah digunakan oleh pengguna lain"
+            )
+
+    if "email" in update_data:
+        new_email = update_data["email"]
+        existing_user = await _find_user(db, User.email, new_email)
+        if existing_user and existing_user.id_user != id_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Email {new_email} sudah digunakan oleh pengguna lain"
+            )
+
+# Route yang meng-hash password dibuat async: bcrypt jalan di pool khusus lewat
+# hash_password_async, jadi tidak menahan thread threadpool selama hashing
+
+async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
     #Buat ngecek duplikat
-    if get_user_by_username(db, user_data.username):
+    if await _find_user(db, User.username, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    if get_user_by_email(db, user_data.email):
+    if await _find_user(db, User.email, user_data.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Email telah digunakan")
     
     new_user = user_data.model_dump()
-    new_user['password'] = hash_password(user_data.password)
+    new_user['password'] = await hash_password_async(user_data.password)
     
     user = User(**new_user)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
-def create_register(db: Session, user: UserRegis):
+async def create_register(db: AsyncSession, user: UserRegis):
     #Cek duplikat username
-    if get_user_by_username(db, user.username):
+    if await _find_user(db, User.username, user.username):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Username already taken")
         
-    if get_user_by_email(db, user.email):
+    if await _find_user(db, User.email, user.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Email telah digunakan")
     
     new_user_data = user.model_dump()
-    new_user_data["password"] = hash_password(new_user_data["password"])
+    new_user_data["password"] = await hash_password_async(new_user_data["password"])
     
     new_user_data["role"] = UserRole.user.value 
     new_user = User(**new_user_data)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
-def update_user(db: Session, id_user: int, user_data: UserUpdate) -> User | None:
-    user = get_user_by_id(db, id_user)
+async def update_user(db: AsyncSession, id_user: int, user_data: UserUpdate) -> User | None:
+    user = await _find_user(db, User.id_user, id_user)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Pengguna tidak ditemukan")
         
     update_data = user_data.model_dump(exclude_unset=True)
-    
-    #Cek duplikat username    
-    if "username" in update_data:
-        new_username = update_data["username"]
-        
-        existing_user = get_user_by_username(db, new_username)
-        
-        if existing_user and existing_user.id_user != id_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"username {new_username} sudah digunakan oleh pengguna lain"
-            )
-            
-    if "email" in update_data:
-        new_email = update_data["email"]
-        
-        existing_user = get_user_by_email(db, new_email)
-        
-        if existing_user and existing_user.id_user != id_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email {new_email} sudah digunakan oleh pengguna lain"
-            )
+    await _check_duplicate(db, update_data, id_user)
 
     if "password" in update_data:
-        update_data["password"] = hash_password(update_data["password"])
+        update_data["password"] = await hash_password_async(update_data["password"])
 
     for key, value in update_data.items():
         setattr(user, key, value)
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_principal(id_user)
     return user
 
-def update_me(db: Session, current_user: User, user_data:UserUpdate) -> User:
+async def update_me(db: AsyncSession, id_user: int, user_data:UserUpdate) -> User:
+    current_user = await _find_user(db, User.id_user, id_user)
+    if not current_user:
+        raise HTTPException(status_code=404, detail="User not found")
             
     update_data = user_data.model_dump(exclude_unset=True)
-    
-    #Cek duplikat username    
-    if "username" in update_data:
-        new_username = update_data["username"]
-        
-        existing_user = get_user_by_username(db, new_username)
-        
-        if existing_user and existing_user.id_user != current_user.id_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"username {new_username} sudah digunakan oleh pengguna lain"
-            )
-            
-    if "email" in update_data:
-        new_email = update_data["email"]
-        
-        existing_user = get_user_by_email(db, new_email)
-        
-        if existing_user and existing_user.id_user != current_user.id_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email {new_email} sudah digunakan oleh pengguna lain"
-            )
+    await _check_duplicate(db, update_data, id_user)
 
     if "password" in update_data:
-        update_data["password"] = hash_password(update_data["password"])
+        update_data["password"] = await hash_password_async(update_data["password"])
 
     for key, value in update_data.items():
         setattr(current_user, key, value)
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    invalidate_principal(id_user)
     return current_user
     
 
@@ -152,6 +143,7 @@ def delete_and_return_user(db: Session, id_user: int) -> Dict[str, str]:
     
     db.delete(user)
     db.commit()
+    invalidate_principal(id_user)
     
     # Return dictionary aman
     return {"status": "success", "message": f"User {username} deleted"}
\ No newline at end of file
@@ -0,0 +1,313 @@
+""" wisata_bulk.py berisikan import wisata massal (NDJSON / CSV yang di-stream) dan export NDJSON"""
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from orm_models import Wisata, WisataStatus, Category, Tag, WisataTag, Facility, WisataFacility
+from app.schema.wisata.wisata_schema import WisataImportRow, WisataExportRow, BulkImportResult, BulkRowError
+from app.core.database import AsyncSessionLocal
+from app.api.wisata.wisata_service import invalidate_wisata_cache
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import codecs
+import csv
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Jumlah baris per INSERT multi-row, sekaligus per commit
+BULK_BATCH_SIZE = int(os.getenv("WISATA_BULK_BATCH_SIZE", "500"))
+# Error yang dikembalikan per baris dibatasi supaya response tidak membengkak
+BULK_MAX_ERRORS = 1000
+EXPORT_BATCH_SIZE = 500
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json")
+CSV_TYPES = ("text/csv", "application/csv")
+
+# (nomor baris, data, error)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+@dataclass
+class ImportRow:
+    line: int
+    values: dict
+    tag_ids: List[int]
+    facility_ids: List[int]
+
+
+def _bulk_format(content_type: str) -> str:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        return "ndjson"
+    if media_type in CSV_TYPES:
+        return "csv"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Content-Type harus application/x-ndjson atau text/csv",
+    )
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Pecah body request per baris tanpa menampung seluruh body di memori."""
+    # utf-8-sig: CSV dari Excel biasanya diawali BOM
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File harus UTF-8")
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"JSON tidak valid: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield line_no, None, "Setiap baris harus object JSON"
+            continue
+        yield line_no, data, None
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """Baris pertama header. Field ber-quote boleh berisi enter (deskripsi), jadi satu record bisa beberapa baris."""
+    header = None
+    record = ""
+    start = line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            start = line_no
+            record = line
+        else:
+            record = f"{record}\n{line}"
+        if record.count('"') % 2:
+            # Quote belum ditutup, record lanjut di baris berikutnya
+            continue
+
+        values = next(csv.reader([record])) if record.strip() else None
+        record = ""
+        if values is None:
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Jumlah kolom {len(values)}, seharusnya {len(header)}"
+            continue
+        yield start, dict(zip(header, values)), None
+
+    if record:
+        yield start, None, "Tanda kutip tidak ditutup"
+
+
+async def _name_lookups(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """Semua nama kategori/tag/fasilitas diambil sekali di awal (tabel kecil), bukan per baris."""
+    lookups = {}
+    for key, id_column, name_column in (
+        ("category", Category.id_category, Category.name),
+        ("tags", Tag.id_tag, Tag.name),
+        ("facilities", Facility.id_facility, Facility.name),
+    ):
+        rows = await db.execute(select(name_column, id_column))
+        lookups[key] = {name.strip().casefold(): id_ for name, id_ in rows}
+    return lookups
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _resolve(names: List[str], lookup: Dict[str, int], label: str) -> Tuple[List[int], Optional[str]]:
+    ids, missing = [], []
+    for name in names:
+        id_ = lookup.get(name.strip().casefold())
+        if id_ is None:
+            missing.append(name)
+        elif id_ not in ids:
+            ids.append(id_)
+    if missing:
+        return ids, f"{label} tidak ditemukan: {', '.join(missing)}"
+    return ids, None
+
+
+def _prepare_row(line: int, data: dict, lookups: Dict[str, Dict[str, int]]) -> Tuple[Optional[ImportRow], Optional[str]]:
+    try:
+        row = WisataImportRow.model_validate(data)
+    except ValidationError as e:
+        return None, _validation_message(e)
+
+    category_id = lookups["category"].get(row.category.strip().casefold())
+    if category_id is None:
+        return None, f"Kategori tidak ditemukan: {row.category}"
+    tag_ids, error = _resolve(row.tags, lookups["tags"], "Tag")
+    if error:
+        return None, error
+    facility_ids, error = _resolve(row.facilities, lookups["facilities"], "Fasilitas")
+    if error:
+        return None, error
+
+    values = row.model_dump(exclude={"category", "tags", "facilities"})
+    values["category_id"] = category_id
+    return ImportRow(line=line, values=values, tag_ids=tag_ids, facility_ids=facility_ids), None
+
+
+async def _insert_rows(db: AsyncSession, rows: List[ImportRow]) -> None:
+    # Satu INSERT multi-row (insertmanyvalues) + RETURNING id sesuai urutan baris
+    ids = list(await db.scalars(
+        insert(Wisata).returning(Wisata.id_wisata, sort_by_parameter_order=True),
+        [row.values for row in rows],
+    ))
+    tag_links = [
+        {"id_wisata": id_wisata, "id_tag": id_tag}
+        for id_wisata, row in zip(ids, rows) for id_tag in row.tag_ids
+    ]
+    facility_links = [
+        {"id_wisata": id_wisata, "id_facility": id_facility}
+        for id_wisata, row in zip(ids, rows) for id_facility in row.facility_ids
+    ]
+    if tag_links:
+        await db.execute(insert(WisataTag), tag_links)
+    if facility_links:
+        await db.execute(insert(WisataFacility), facility_links)
+
+
+def _add_error(result: BulkImportResult, line: int, error: str) -> None:
+    result.failed += 1
+    if len(result.errors) < BULK_MAX_ERRORS:
+        result.errors.append(BulkRowError(line=line, error=error))
+
+
+async def _flush_batch(db: AsyncSession, batch: List[ImportRow], result: BulkImportResult) -> None:
+    try:
+        await _insert_rows(db, batch)
+        await db.commit()
+        result.created += len(batch)
+        return
+    except DBAPIError:
+        await db.rollback()
+
+    # Batch gagal di database: ulangi satu per satu supaya ketahuan baris mana yang bermasalah
+    for row in batch:
+        try:
+            await _insert_rows(db, [row])
+            await db.commit()
+            result.created += 1
+        except DBAPIError as e:
+            await db.rollback()
+            _add_error(result, row.line, str(e.orig))
+
+
+async def bulk_import_wisata(db: AsyncSession, chunks: AsyncIterator[bytes], content_type: str) -> BulkImportResult:
+    """
+    Import wisata dari body request yang di-stream. Baris yang gagal validasi dilaporkan per nomor baris,
+    sisanya tetap masuk. Commit per BULK_BATCH_SIZE baris, jadi yang sudah di-commit tidak ikut batal
+    kalau batch berikutnya gagal.
+    """
+    fmt = _bulk_format(content_type)
+    lookups = await _name_lookups(db)
+    # Transaksi lookup ditutup dulu, jangan ditahan selama body masih di-upload
+    await db.commit()
+
+    lines = _iter_lines(chunks)
+    records = _csv_records(lines) if fmt == "csv" else _ndjson_records(lines)
+    result = BulkImportResult()
+    batch: List[ImportRow] = []
+
+    async for line, data, error in records:
+        row = None
+        if error is None:
+            row, error = _prepare_row(line, data, lookups)
+        if error is not None:
+            _add_error(result, line, error)
+            continue
+        batch.append(row)
+        if len(batch) >= BULK_BATCH_SIZE:
+            await _flush_batch(db, batch, result)
+            batch = []
+
+    if batch:
+        await _flush_batch(db, batch, result)
+    if result.created:
+        invalidate_wisata_cache()
+
+    logger.info("bulk import wisata: %d masuk, %d gagal", result.created, result.failed)
+    return result
+
+
+async def _names_by_wisata(db: AsyncSession, stmt) -> Dict[int, List[str]]:
+    """stmt: select(id_wisata, name) dari tabel relasi; hasilnya dikelompokkan per wisata."""
+    names: Dict[int, List[str]] = {}
+    for id_wisata, name in await db.execute(stmt):
+        names.setdefault(id_wisata, []).append(name)
+    return names
+
+
+async def export_wisata_ndjson(wisata_status: Optional[WisataStatus] = None) -> AsyncIterator[bytes]:
+    """
+    Semua wisata sebagai NDJSON (format sama dengan input import), per EXPORT_BATCH_SIZE baris pakai keyset.
+    Tiap batch cuma 3 query: kolom wisata + nama kategori, nama tag, nama fasilitas.
+    Pakai session sendiri karena generator ini jalan sambil response di-stream.
+    """
+    async with AsyncSessionLocal() as db:
+        after = 0
+        while True:
+            stmt = (
+                select(*Wisata.__table__.columns, Category.name.label("category"))
+                .join(Category, Category.id_category == Wisata.category_id)
+                .where(Wisata.id_wisata > after)
+                .order_by(Wisata.id_wisata)
+                .limit(EXPORT_BATCH_SIZE)
+            )
+            if wisata_status is not None:
+                stmt = stmt.where(Wisata.status == wisata_status)
+            rows = (await db.execute(stmt)).mappings().all()
+            if not rows:
+                break
+
+            ids = [row["id_wisata"] for row in rows]
+            tags = await _names_by_wisata(db, (
+                select(WisataTag.id_wisata, Tag.name)
+                .join(Tag, Tag.id_tag == WisataTag.id_tag)
+                .where(WisataTag.id_wisata.in_(ids))
+                .order_by(WisataTag.id_wisata, Tag.name)
+            ))
+            facilities = await _names_by_wisata(db, (
+                select(WisataFacility.id_wisata, Facility.name)
+                .join(Facility, Facility.id_facility == WisataFacility.id_facility)
+                .where(WisataFacility.id_wisata.in_(ids))
+                .order_by(WisataFacility.id_wisata, Facility.name)
+            ))
+            # Transaksi baca tidak ditahan selama client lambat menerima data
+            await db.commit()
+
+            lines = [
+                WisataExportRow(
+                    **row,
+                    tags=tags.get(row["id_wisata"], []),
+                    facilities=facilities.get(row["id_wisata"], []),
+                ).model_dump_json()
+                for row in rows
+            ]
+            yield ("\n".join(lines) + "\n").encode()
+            after = ids[-1]
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union
+from decimal import Decimal
+from datetime import time
+from sqlalchemy.ext.asyncio import AsyncSession
 from orm_models import UserRole, WisataStatus
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import require_role
-from app.api.wisata import wisata_service  
-from app.schema.wisata.wisata_schema import WisataCreate, WisataUpdate, WisataResponse, ImageResponse
+from app.api.wisata import wisata_service, wisata_bulk
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schema.pagination.pagination_schema import Page
+from app.schema.wisata.wisata_schema import WisataCreate, WisataUpdate, WisataResponse, ImageResponse, WisataFilter, WisataPage, WisataSummaryPage, WisataView, BulkImportResult
 
 router = APIRouter(
     prefix="/wisata",
@@ -16,36 +21,92 @@ router = APIRouter(
 # GLOBAL / STATIC ROUTES
 # ======================
 
-@router.get("/", response_model=List[WisataResponse],
+@router.get("/", response_model=Page[WisataResponse],
             dependencies=[Depends(require_role(UserRole.editor, UserRole.admin))])
-def get_all_wisata(db: Session = Depends(get_db)):
-    return wisata_service.get_all_wisata(db=db)
+async def get_all_wisata(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.get_all_wisata(db=db, limit=limit, after=after)
 
-@router.get("/published", response_model=List[WisataResponse])
-def get_published_wisata(db: Session = Depends(get_db)):
-    return wisata_service.get_publish_wisata(db=db)
+@router.get("/published", response_model=Union[WisataPage, WisataSummaryPage])
+async def get_published_wisata(
+    request: Request,
+    # summary = kolom untuk kartu listing saja (nama, cover, kategori, harga, rating)
+    view: WisataView = WisataView.full,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    category_id: Optional[int] = None,
+    tag_id: List[int] = Query([]),
+    facility_id: List[int] = Query([]),
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    open_at: Optional[time] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    filters = WisataFilter(
+        category_id=category_id,
+        tag_id=tag_id,
+        facility_id=facility_id,
+        min_price=min_price,
+        max_price=max_price,
+        open_at=open_at,
+    )
+    if view == WisataView.summary:
+        cached = await wisata_service.get_publish_wisata_summary_cached(db=db, limit=limit, after=after, filters=filters)
+    else:
+        cached = await wisata_service.get_publish_wisata_cached(db=db, limit=limit, after=after, filters=filters)
+    return cached.to_response(request)
+
+@router.get("/search", response_model=Page[WisataResponse])
+async def search_wisata(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), offset: int = Query(0, ge=0), db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.search_wisata(db=db, q=q, limit=limit, offset=offset)
+
+@router.get("/images", response_model=Page[ImageResponse])
+async def get_all_images_endpoint(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.get_all_image(db, limit=limit, after=after)
+
+@router.get("/cache/stats",
+            dependencies=[Depends(require_role(UserRole.admin))])
+async def get_cache_stats():
+    return wisata_service.wisata_cache.stats()
 
-@router.get("/images", response_model=List[ImageResponse])
-def get_all_images_endpoint(db: Session = Depends(get_db)):
-    return wisata_service.get_all_image(db)
+@router.post("/bulk", response_model=BulkImportResult,
+             dependencies=[Depends(require_role(UserRole.editor, UserRole.admin))],
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 "application/x-ndjson": {"schema": {"type": "string"}},
+                 "text/csv": {"schema": {"type": "string"}},
+             }}})
+async def bulk_import_wisata(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Body dibaca per potongan sambil diproses, tidak ditampung utuh di memori
+    return await wisata_bulk.bulk_import_wisata(
+        db=db, chunks=request.stream(), content_type=request.headers.get("content-type", "")
+    )
+
+@router.get("/export",
+            dependencies=[Depends(require_role(UserRole.editor, UserRole.admin))])
+async def export_wisata(wisata_status: Optional[WisataStatus] = Query(None, alias="status")):
+    return StreamingResponse(
+        wisata_bulk.export_wisata_ndjson(wisata_status),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="wisata.ndjson"'},
+    )
 
 # ======================
 # DYNAMIC / ID ROUTES
 # ======================
 
 @router.get("/{id_wisata}", response_model=WisataResponse)
-def get_wisata_by_id(id_wisata: int, db: Session = Depends(get_db)):
-    return wisata_service.get_wisata_by_id(db=db, id_wisata=id_wisata)
+async def get_wisata_by_id(request: Request, id_wisata: int, db: AsyncSession = Depends(get_async_db)):
+    cached = await wisata_service.get_wisata_by_id_cached(db=db, id_wisata=id_wisata)
+    return cached.to_response(request)
 
 @router.post("/", response_model=WisataResponse,
              dependencies=[Depends(require_role(UserRole.editor, UserRole.admin))])
-def create_wisata(request: WisataCreate, db: Session = Depends(get_db)):
-    return wisata_service.create_wisata(db=db, wisata_data=request)
+async def create_wisata(request: WisataCreate, db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.create_wisata(db=db, wisata_data=request)
 
 @router.patch("/{id_wisata}", response_model=WisataResponse,
               dependencies=[Depends(require_role(UserRole.editor, UserRole.admin))])
-def update_wisata(id_wisata: int, wisata_data: WisataUpdate, db: Session = Depends(get_db)):
-    return wisata_service.update_wisata(
+async def update_wisata(id_wisata: int, wisata_data: WisataUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.update_wisata(
         id_Wisata=id_wisata,
         wisata_data=wisata_data,
         db=db
@@ -53,21 +114,25 @@ def update_wisata(id_wisata: int, wisata_data: WisataUpdate, db: Session = Depen
 
 @router.delete("/{id_wisata}",
                dependencies=[Depends(require_role(UserRole.editor, UserRole.admin))])
-def delete_wisata(id_wisata: int, db: Session = Depends(get_db)):
-    return wisata_service.delete_wisata(db=db, id_wisata=id_wisata)
+async def delete_wisata(id_wisata: int, db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.delete_wisata(db=db, id_wisata=id_wisata)
 
 # ======================
 # IMAGE ACTIONS
 # ======================
 
-@router.post("/{id_wisata}/upload-image")
-def upload_image(
+@router.post("/{id_wisata}/upload-image", response_model=ImageResponse)
+async def upload_image(
     id_wisata: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return wisata_service.upload_image(db=db, id_wisata=id_wisata, file=file)
+    image = await wisata_service.upload_image(db=db, id_wisata=id_wisata, file=file)
+    # Thumbnail / WebP dibuat setelah response terkirim
+    background_tasks.add_task(wisata_service.generate_image_variants, image.id_image)
+    return image
 
 @router.delete("/image/{id_image}")
-def delete_image(id_image: int, db: Session = Depends(get_db)):
-    return wisata_service.delete_image(db=db, id_image=id_image)
+async def delete_image(id_image: int, db: AsyncSession = Depends(get_async_db)):
+    return await wisata_service.delete_image(db=db, id_image=id_image)
@@ -1,59 +1,482 @@
 from fastapi import HTTPException, status, UploadFile
-from sqlalchemy.orm import Session
-from orm_models import Wisata, WisataStatus, Tag, Facility, WisataImage
-from app.schema.wisata.wisata_schema import WisataCreate, WisataResponse, WisataUpdate
+from sqlalchemy import Select, select, update, delete, func, or_, and_, literal_column, table, column, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload
+from orm_models import Wisata, WisataStatus, Tag, WisataTag, Facility, WisataFacility, Category, WisataImage, WisataImageVariant, WisataRating, ImageBlob, SEARCH_CONFIG, SQLITE_SEARCH_TABLE, search_document
+from app.schema.wisata.wisata_schema import WisataCreate, WisataResponse, WisataUpdate, WisataFilter, WisataPage, WisataSummaryPage
+from app.core.pagination import keyset_paginate_async, keyset_paginate_rows_async, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.cache import TTLCache
+from app.core.http_cache import CachedResponse, as_utc, make_etag
+from app.api.images.image_service import (
+    save_image_upload,
+    publish_image,
+    discard_image,
+    remove_files,
+    store_variants,
+    WISATA_IMAGE_PREFIX,
+)
+from app.core.storage import get_storage
+from app.core.database import AsyncSessionLocal, upsert_insert
+import logging
+import re
 from typing import List, Optional, Dict, Any
-import os, shutil
-import uuid
+import os
+from datetime import datetime, timezone
+
+# Cache response JSON buat endpoint publik (listing published dan detail wisata)
+wisata_cache = TTLCache(
+    maxsize=int(os.getenv("WISATA_CACHE_MAXSIZE", "512")),
+    ttl=float(os.getenv("WISATA_CACHE_TTL", "60")),
+)
+
+logger = logging.getLogger(__name__)
+
+
+def wisata_query() -> Select:
+    """
+    Query dasar Wisata yang sudah eager-load semua relasi yang dipakai WisataResponse.
+    Relasi collection diambil pakai selectinload (satu query IN per relasi),
+    category pakai joinedload, jadi jumlah query tetap berapapun jumlah wisatanya.
+    Di AsyncSession lazy load tidak boleh, jadi semua pembacaan wisata harus lewat sini.
+    """
+    return select(Wisata).options(
+        selectinload(Wisata.images).selectinload(WisataImage.variants),
+        selectinload(Wisata.tag),
+        selectinload(Wisata.facilities),
+        joinedload(Wisata.category),
+        joinedload(Wisata.rating),
+    )
+
+
+async def get_all_wisata(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict[str, Any]:
+    items, next_cursor = await keyset_paginate_async(db, wisata_query(), Wisata.id_wisata, limit=limit, after=after)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _having_all(link_fk, link_wisata, ids: List[int]):
+    # Wisata yang punya SEMUA id yang diminta (AND), bukan salah satu
+    return (
+        select(link_wisata)
+        .where(link_fk.in_(ids))
+        .group_by(link_wisata)
+        .having(func.count() == len(ids))
+    )
+
+
+def apply_wisata_filters(stmt: Select, filters: Optional[WisataFilter]) -> Select:
+    if filters is None:
+        return stmt
+
+    if filters.category_id is not None:
+        stmt = stmt.where(Wisata.category_id == filters.category_id)
+
+    tag_ids = sorted(set(filters.tag_id))
+    if tag_ids:
+        stmt = stmt.where(Wisata.id_wisata.in_(_having_all(WisataTag.id_tag, WisataTag.id_wisata, tag_ids)))
+
+    facility_ids = sorted(set(filters.facility_id))
+    if facility_ids:
+        stmt = stmt.where(Wisata.id_wisata.in_(
+            _having_all(WisataFacility.id_facility, WisataFacility.id_wisata, facility_ids)
+        ))
+
+    # ticket_price NULL artinya gratis (dianggap 0)
+    if filters.min_price:
+        stmt = stmt.where(Wisata.ticket_price >= filters.min_price)
+    if filters.max_price is not None:
+        stmt = stmt.where(or_(Wisata.ticket_price.is_(None), Wisata.ticket_price <= filters.max_price))
+
+    if filters.open_at is not None:
+        t = filters.open_at
+        stmt = stmt.where(or_(
+            # Jam biasa, misal 08:00 - 17:00
+            and_(Wisata.open_time < Wisata.close_time, Wisata.open_time <= t, Wisata.close_time > t),
+            # Lewat tengah malam (misal 18:00 - 02:00) atau buka 24 jam (open == close)
+            and_(Wisata.open_time >= Wisata.close_time, or_(Wisata.open_time <= t, Wisata.close_time > t)),
+        ))
+
+    return stmt
+
+
+def filter_key(filters: Optional[WisataFilter]) -> tuple:
+    """Bentuk filter yang stabil buat cache key / ETag (urutan dan duplikat id tidak berpengaruh)."""
+    if filters is None:
+        return ()
+    return (
+        filters.category_id,
+        tuple(sorted(set(filters.tag_id))),
+        tuple(sorted(set(filters.facility_id))),
+        filters.min_price,
+        filters.max_price,
+        filters.open_at,
+    )
+
+
+async def get_wisata_facets(db: AsyncSession, filters: Optional[WisataFilter] = None) -> Dict[str, Any]:
+    """
+    Jumlah wisata published per kategori, tag dan fasilitas, dihitung dari hasil filter saat ini.
+    Tiga query GROUP BY kecil, tidak perlu load object Wisata.
+    """
+    matching = apply_wisata_filters(
+        select(Wisata.id_wisata).where(Wisata.status == WisataStatus.published), filters
+    ).scalar_subquery()
+
+    category_rows = await db.execute(
+        select(Category.id_category, Category.name, func.count(Wisata.id_wisata))
+        .join(Wisata, Wisata.category_id == Category.id_category)
+        .where(Wisata.id_wisata.in_(matching))
+        .group_by(Category.id_category, Category.name)
+        .order_by(func.count(Wisata.id_wisata).desc(), Category.name)
+    )
+    tag_rows = await db.execute(
+        select(Tag.id_tag, Tag.name, func.count(WisataTag.id_wisata))
+        .join(WisataTag, WisataTag.id_tag == Tag.id_tag)
+        .where(WisataTag.id_wisata.in_(matching))
+        .group_by(Tag.id_tag, Tag.name)
+        .order_by(func.count(WisataTag.id_wisata).desc(), Tag.name)
+    )
+    facility_rows = await db.execute(
+        select(Facility.id_facility, Facility.name, func.count(WisataFacility.id_wisata))
+        .join(WisataFacility, WisataFacility.id_facility == Facility.id_facility)
+        .where(WisataFacility.id_wisata.in_(matching))
+        .group_by(Facility.id_facility, Facility.name)
+        .order_by(func.count(WisataFacility.id_wisata).desc(), Facility.name)
+    )
+
+    def as_counts(rows):
+        return [{"id": id_, "name": name, "count": count} for id_, name, count in rows]
+
+    return {
+        "category": as_counts(category_rows),
+        "tag": as_counts(tag_rows),
+        "facility": as_counts(facility_rows),
+    }
+
+
+def _check_price_range(filters: Optional[WisataFilter]) -> None:
+    if filters and filters.min_price is not None and filters.max_price is not None \
+            and filters.min_price > filters.max_price:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="min_price tidak boleh lebih besar dari max_price")
+
+
+async def get_publish_wisata(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    filters: Optional[WisataFilter] = None,
+) -> Dict[str, Any]:
+    _check_price_range(filters)
+
+    items, next_cursor = await keyset_paginate_async(
+        db,
+        apply_wisata_filters(wisata_query().where(Wisata.status == WisataStatus.published), filters),
+        Wisata.id_wisata,
+        limit=limit,
+        after=after,
+        descending=True,
+    )
+    page = {"items": items, "next_cursor": next_cursor}
+    if after is None:
+        # Facet cukup dihitung sekali di halaman pertama, halaman berikutnya tidak berubah filternya
+        page["facets"] = await get_wisata_facets(db, filters)
+    return page
+
+
+def wisata_summary_query() -> Select:
+    """
+    Kolom untuk kartu listing saja (WisataSummary), tanpa object ORM dan tanpa load relasi.
+    Deskripsi / lokasi tidak ikut diambil; cover lewat subquery per baris (index ix_wisata_images_wisata_cover).
+    """
+    cover = (
+        select(WisataImage.image_url)
+        .where(WisataImage.id_wisata == Wisata.id_wisata)
+        .order_by(WisataImage.is_primary.desc(), WisataImage.id_image)
+        .limit(1)
+        .correlate(Wisata)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Wisata.id_wisata,
+            Wisata.nama_wisata,
+            Wisata.category_id,
+            Category.name.label("category"),
+            Wisata.ticket_price,
+            cover.label("image_cover"),
+            WisataRating.review_count,
+            WisataRating.rating_sum,
+        )
+        .join(Category, Category.id_category == Wisata.category_id)
+        .outerjoin(WisataRating, WisataRating.id_wisata == Wisata.id_wisata)
+    )
+
+
+def _summary(row) -> Dict[str, Any]:
+    # Wisata yang belum pernah di-review tidak punya baris wisata_ratings
+    review_count = row.review_count or 0
+    return {
+        "id_wisata": row.id_wisata,
+        "nama_wisata": row.nama_wisata,
+        "category_id": row.category_id,
+        "category": row.category,
+        "ticket_price": row.ticket_price,
+        "image_cover": row.image_cover,
+        "rating_average": round(row.rating_sum / review_count, 2) if review_count else None,
+        "review_count": review_count,
+    }
+
+
+async def get_publish_wisata_summary(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    filters: Optional[WisataFilter] = None,
+) -> Dict[str, Any]:
+    """Listing published versi ringkas (?view=summary): satu query untuk item, filter dan urutan sama dengan versi lengkap."""
+    _check_price_range(filters)
+
+    rows, next_cursor = await keyset_paginate_rows_async(
+        db,
+        apply_wisata_filters(wisata_summary_query().where(Wisata.status == WisataStatus.published), filters),
+        Wisata.id_wisata,
+        limit=limit,
+        after=after,
+        descending=True,
+    )
+    page = {"items": [_summary(row) for row in rows], "next_cursor": next_cursor}
+    if after is None:
+        page["facets"] = await get_wisata_facets(db, filters)
+    return page
+
+
+async def _offset_page(db: AsyncSession, stmt: Select, limit: int, offset: int) -> Dict[str, Any]:
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = list(await db.scalars(stmt.offset(offset).limit(limit + 1)))
+    next_cursor = offset + limit if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+def _fts5_query(q: str) -> Optional[str]:
+    # Setiap kata dikutip supaya operator FTS5 (AND/OR/NEAR, *, :) di input user tidak ikut diproses
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+
+def _search_conditions(dialect: str, q: str):
+    """
+    Return (kondisi full-text, urutan relevansi, kondisi fuzzy, urutan fuzzy).
+    Postgres: tsvector + trigram di nama. SQLite (dev/test): FTS5 + substring di nama.
+    """
+    if dialect == "postgresql":
+        document = search_document(Wisata.nama_wisata, Wisata.deskripsi, Wisata.lokasi)
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+        return (
+            document.op("@@")(ts_query),
+            func.ts_rank(document, ts_query).desc(),
+            Wisata.nama_wisata.op("%")(q),
+            func.similarity(Wisata.nama_wisata, q).desc(),
+        )
+
+    fuzzy = Wisata.nama_wisata.ilike(f"%{q}%")
+    fts_query = _fts5_query(q)
+    if fts_query is None:
+        return false(), Wisata.id_wisata.desc(), fuzzy, Wisata.id_wisata.desc()
+
+    fts = table(SQLITE_SEARCH_TABLE, column("rowid"), column("rank"))
+    fts_match = literal_column(SQLITE_SEARCH_TABLE).op("MATCH")(fts_query)
+    # rank FTS5 = bm25, makin kecil makin relevan
+    rank = select(fts.c.rank).where(fts_match, fts.c.rowid == Wisata.id_wisata).scalar_subquery()
+    return (
+        Wisata.id_wisata.in_(select(fts.c.rowid).where(fts_match)),
+        rank,
+        fuzzy,
+        Wisata.id_wisata.desc(),
+    )
 
 
-def get_all_wisata(db: Session) -> List[Wisata]:
-    return db.query(Wisata).order_by(Wisata.id_wisata.asc()).all()
+async def search_wisata(db: AsyncSession, q: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> Dict[str, Any]:
+    """
+    Cari wisata published berdasarkan nama, deskripsi dan lokasi, diurutkan dari yang paling relevan.
+    Hasil ranking tidak bisa di-keyset, jadi pagination-nya pakai offset (next_cursor = offset berikutnya).
+    Kalau full-text tidak menemukan apa-apa sama sekali (kemungkinan typo), pakai pencarian fuzzy di nama.
+    """
+    published = Wisata.status == WisataStatus.published
+    match, rank, fuzzy, fuzzy_rank = _search_conditions(db.bind.dialect.name, q)
 
+    stmt = wisata_query().where(published, match).order_by(rank, Wisata.id_wisata.desc())
+    page = await _offset_page(db, stmt, limit, offset)
+    if page["items"]:
+        return page
 
-def get_publish_wisata(db: Session) -> List[Wisata]:
+    # Halaman kosong di offset > 0 bisa berarti hasil full-text sudah habis; fallback cuma
+    # dipakai kalau full-text memang tidak punya hasil, supaya dua jenis hasil tidak tercampur
+    if offset > 0 and await db.scalar(select(select(Wisata.id_wisata).where(published, match).exists())):
+        return page
+
+    stmt = wisata_query().where(published, fuzzy).order_by(fuzzy_rank, Wisata.id_wisata.desc())
+    return await _offset_page(db, stmt, limit, offset)
+
+
+def wisata_version(wisata: Wisata) -> tuple:
+    """
+    Versi sebuah wisata buat ETag. updated_at saja tidak cukup karena
+    rename tag/fasilitas tidak mengubah updated_at milik wisata.
+    """
     return (
-        db.query(Wisata)
-        .filter(Wisata.status == WisataStatus.published)
-        .order_by(Wisata.id_wisata.desc())
-        .all()
+        wisata.id_wisata,
+        wisata.updated_at,
+        wisata.status.value,
+        tuple(
+            (img.id_image, img.image_url, bool(img.is_primary), tuple(v.image_url for v in img.variants))
+            for img in wisata.images
+        ),
+        tuple((t.id_tag, t.name) for t in wisata.tag),
+        tuple((f.id_facility, f.name) for f in wisata.facilities),
+        (wisata.rating.review_count, wisata.rating.rating_sum) + tuple(wisata.rating.histogram.values())
+        if wisata.rating else None,
     )
 
 
+def wisata_last_modified(wisata: Wisata) -> Optional[datetime]:
+    # Review baru tidak mengubah updated_at wisata, tapi mengubah rating di response
+    stamps = [wisata.updated_at, wisata.rating.updated_at if wisata.rating else None]
+    return max((s for s in stamps if s), default=None)
+
+
+def _latest(*stamps: Optional[datetime]) -> Optional[datetime]:
+    # Presigned URL berganti tiap url_epoch, jadi body dengan URL baru juga dianggap berubah
+    return max((as_utc(s) for s in stamps if s), default=None)
+
+
+async def get_publish_wisata_cached(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    filters: Optional[WisataFilter] = None,
+) -> CachedResponse:
+    """Sama seperti get_publish_wisata, tapi return JSON yang sudah jadi (plus ETag) dan disimpan di cache."""
+    url_epoch = get_storage().url_epoch()
+    key = ("published", limit, after, filter_key(filters), url_epoch)
+    cached = wisata_cache.get(key)
+    if cached is None:
+        # Dibaca sebelum query: kalau ada invalidate selama query jalan, hasilnya tidak di-cache
+        generation = wisata_cache.generation
+        page = await get_publish_wisata(db, limit=limit, after=after, filters=filters)
+        items = page["items"]
+        facets = page.get("facets")
+        # Tanpa Last-Modified: wisata yang keluar dari halaman (unpublish / hapus) tidak
+        # memajukan updated_at item yang tersisa, jadi cuma ETag yang bisa mendeteksinya
+        cached = CachedResponse(
+            body=WisataPage.model_validate(page).model_dump_json().encode(),
+            etag=make_etag(
+                page["next_cursor"],
+                # Facet bisa berubah tanpa item di halaman ini berubah
+                repr(facets) if facets is not None else None,
+                url_epoch,
+                *(wisata_version(w) for w in items),
+            ),
+        )
+        wisata_cache.set(key, cached, generation=generation)
+    return cached
+
+
+
+async def get_publish_wisata_summary_cached(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    filters: Optional[WisataFilter] = None,
+) -> CachedResponse:
+    # Prefix "published" sama, jadi ikut hilang di invalidate_wisata_cache
+    url_epoch = get_storage().url_epoch()
+    key = ("published", "summary", limit, after, filter_key(filters), url_epoch)
+    cached = wisata_cache.get(key)
+    if cached is None:
+        generation = wisata_cache.generation
+        page = await get_publish_wisata_summary(db, limit=limit, after=after, filters=filters)
+        facets = page.get("facets")
+        cached = CachedResponse(
+            body=WisataSummaryPage.model_validate(page).model_dump_json().encode(),
+            # Item-nya sudah kolom polos, jadi isi item itu sendiri yang jadi versinya
+            etag=make_etag(
+                "summary",
+                page["next_cursor"],
+                repr(facets) if facets is not None else None,
+                url_epoch,
+                *(tuple(item.values()) for item in page["items"]),
+            ),
+        )
+        wisata_cache.set(key, cached, generation=generation)
+    return cached
+
 
-def get_wisata_by_id(db: Session, id_wisata: int) -> Wisata | None:
-    wisatas = db.query(Wisata).filter(Wisata.id_wisata == id_wisata).first()
+async def get_wisata_by_id(db: AsyncSession, id_wisata: int, reload: bool = False) -> Wisata | None:
+    stmt = wisata_query().where(Wisata.id_wisata == id_wisata)
+    if reload:
+        # Timpa object yang sudah ada di identity map (dipakai setelah commit)
+        stmt = stmt.execution_options(populate_existing=True)
+    wisatas = await db.scalar(stmt)
     if not wisatas:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="wisata tidak ditemukan")
 
     return wisatas
 
 
-def create_wisata(db: Session, wisata_data: WisataCreate) -> Wisata:
+async def get_wisata_by_id_cached(db: AsyncSession, id_wisata: int) -> CachedResponse:
+    url_epoch = get_storage().url_epoch()
+    key = ("wisata", id_wisata, url_epoch)
+    cached = wisata_cache.get(key)
+    if cached is None:
+        generation = wisata_cache.generation
+        wisata = await get_wisata_by_id(db=db, id_wisata=id_wisata)
+        cached = CachedResponse(
+            body=WisataResponse.model_validate(wisata).model_dump_json().encode(),
+            etag=make_etag(wisata_version(wisata), url_epoch),
+            last_modified=_latest(url_epoch, wisata_last_modified(wisata)),
+        )
+        wisata_cache.set(key, cached, generation=generation)
+    return cached
+
+
+def invalidate_wisata_cache(id_wisata: Optional[int] = None) -> None:
+    """
+    Dipanggil setiap ada perubahan wisata/gambar supaya pembaca tidak dapat data lama.
+    Tanpa id_wisata semua detail wisata ikut dibuang (rename / hapus tag, fasilitas, kategori).
+    """
+    if id_wisata is not None:
+        wisata_cache.invalidate_prefix("wisata", id_wisata)
+    else:
+        wisata_cache.invalidate_prefix("wisata")
+    wisata_cache.invalidate_prefix("published")
+
+
+async def create_wisata(db: AsyncSession, wisata_data: WisataCreate) -> Wisata:
     data = wisata_data.model_dump()
 
     facility_ids = data.pop("facility_id", [])
     tag_ids = data.pop("tag_id", [])
 
     wisata = Wisata(**data)
-    db.add(wisata)
-    db.flush()
 
+    # Relasi di-set sebelum object masuk session, kalau sesudah flush
+    # SQLAlchemy akan mencoba lazy load nilai lama (tidak boleh di async)
     if facility_ids:
-        wisata.facilities = (
-            db.query(Facility).filter(Facility.id_facility.in_(facility_ids)).all()
+        wisata.facilities = list(
+            await db.scalars(select(Facility).where(Facility.id_facility.in_(facility_ids)))
         )
 
     if tag_ids:
-        wisata.tag = db.query(Tag).filter(Tag.id_tag.in_(tag_ids)).all()
+        wisata.tag = list(await db.scalars(select(Tag).where(Tag.id_tag.in_(tag_ids))))
 
-    db.commit()
-    db.refresh(wisata)
-    return wisata
+    db.add(wisata)
+    await db.commit()
+    invalidate_wisata_cache(wisata.id_wisata)
+    return await get_wisata_by_id(db=db, id_wisata=wisata.id_wisata, reload=True)
 
 
-def update_wisata(db: Session, wisata_data: WisataUpdate, id_Wisata: int) -> Wisata | None:
-    wisata = get_wisata_by_id(db=db, id_wisata=id_Wisata)
+async def update_wisata(db: AsyncSession, wisata_data: WisataUpdate, id_Wisata: int) -> Wisata | None:
+    wisata = await get_wisata_by_id(db=db, id_wisata=id_Wisata)
     if not wisata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Wisata Tidak Ditemukan"
@@ -67,133 +490,266 @@ def update_wisata(db: Session, wisata_data: WisataUpdate, id_Wisata: int) -> Wis
 
     if "tag_id" in update_wisata:
         tag_ids = update_wisata.pop("tag_id")
-        wisata.tag = db.query(Tag).filter(Tag.id_tag.in_(tag_ids)).all()
+        wisata.tag = list(await db.scalars(select(Tag).where(Tag.id_tag.in_(tag_ids))))
     
     if "facility_id" in update_wisata:
         facility_ids = update_wisata.pop("facility_id")
-        wisata.facilities = (
-        db.query(Facility).filter(Facility.id_facility.in_(facility_ids)).all()
+        wisata.facilities = list(
+            await db.scalars(select(Facility).where(Facility.id_facility.in_(facility_ids)))
         )
 
     for key, value in update_wisata.items():
         setattr(wisata, key, value)
 
-    db.commit()
-    db.refresh(wisata)
-    return wisata
+    await db.commit()
+    invalidate_wisata_cache(id_Wisata)
+    return await get_wisata_by_id(db=db, id_wisata=id_Wisata, reload=True)
 
 
-def delete_wisata(db: Session, id_wisata: int) -> Dict[str, str]:
-    wisata = db.query(Wisata).filter(Wisata.id_wisata == id_wisata).first()
+async def delete_wisata(db: AsyncSession, id_wisata: int) -> Dict[str, str]:
+    wisata = await db.get(
+        Wisata, id_wisata, options=[selectinload(Wisata.images).selectinload(WisataImage.variants)]
+    )
     if not wisata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Wisata tidak ditemukan"
         )
-    
-    #Buat hapus folder gambar
-    folder_path = f"app/static/image/wisata{id_wisata}"
-    if os.path.exists(folder_path):
-        shutil.rmtree(folder_path) 
 
     nama = wisata.nama_wisata
+    images = list(wisata.images)
 
-    db.delete(wisata)
-    db.commit()
+    await db.delete(wisata)
+    await db.flush()
+    released = await _release_images(db, images)
+    await db.commit()
+    await _remove_released(db, released)
+    # Sisa folder upload lama milik wisata ini (file yang tidak tercatat di DB)
+    await get_storage().delete_prefix(f"{WISATA_IMAGE_PREFIX}/{id_wisata}/")
+    invalidate_wisata_cache(id_wisata)
 
     return {"status": "success", "message": f"Wisata {nama} deleted"}
 
-def get_all_image(db: Session):
-    return db.query(WisataImage).all()
+async def get_all_image(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict[str, Any]:
+    items, next_cursor = await keyset_paginate_async(
+        db, select(WisataImage).options(selectinload(WisataImage.variants)), WisataImage.id_image, limit=limit, after=after
+    )
+    return {"items": items, "next_cursor": next_cursor}
 
-def get_image_by_id(db: Session, id_image:int):
-    return db.query(WisataImage).filter(WisataImage.id_image == id_image).first()
+async def get_image_by_id(db: AsyncSession, id_image:int):
+    return await db.get(WisataImage, id_image, options=[selectinload(WisataImage.variants)])
 
-def upload_image(db: Session, id_wisata: int, file: UploadFile):
+async def upload_image(db: AsyncSession, id_wisata: int, file: UploadFile):
     #Cek apakah wisata ada?
-    wisata = db.query(Wisata).filter(Wisata.id_wisata == id_wisata).first()
+    wisata = await db.get(Wisata, id_wisata)
     if not wisata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Wisata dengan ID {id_wisata} tidak ditemukan. Tidak bisa upload gambar."
         )
 
-    allowed_types = ["image/jpeg", "image/png", "image/webp"]
-
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-        status_code=400,
-        detail="Format file tidak didukung"
-    )
-
     #Ngecek apakah sudah ada gambar untuk wisata ini?
-    existing_images_count = db.query(WisataImage).filter(WisataImage.id_wisata == id_wisata).count()
+    existing_images_count = await db.scalar(
+        select(func.count()).select_from(WisataImage).where(WisataImage.id_wisata == id_wisata)
+    )
     
     # Jika belum ada gambar sama sekali, set is_primary jadi True otomatis
     set_as_primary = True if existing_images_count == 0 else False
-    #Buat Nentukan dia nyimpan ke folder mana
-    base_folder = f"app/static/images/wisata/{id_wisata}"
-    if not os.path.exists(base_folder):
-        os.makedirs(base_folder)
-        
-    #buat bikin nama filenya
-    filename = f"{uuid.uuid4()}-{file.filename}"
-    file_path = os.path.join(base_folder, filename)
-    
-    db_path = f"static/images/wisata/{id_wisata}/{filename}"
-    
-    #Simpan ke storage
-    with open(file_path, "wb") as buffer:
-        buffer.write(file.file.read())
-        
-    #simpan path ke supabase
-    new_image = WisataImage(id_wisata=id_wisata, image_url=db_path, is_primary=set_as_primary)
-    db.add(new_image)
-    db.commit()
-    db.refresh(new_image)
+    #Simpan ke storage per potongan sambil di-hash; tipe file dicek dari isinya
+    stored = await save_image_upload(file)
+
+    try:
+        # File dengan isi sama cukup disimpan sekali, blob-nya cuma ditambah ref_count
+        insert_ = upsert_insert(db)
+        await db.execute(
+            insert_(ImageBlob)
+            .values(
+                digest=stored.digest,
+                image_url=stored.url,
+                content_type=stored.content_type,
+                size=stored.size,
+                ref_count=1,
+            )
+            .on_conflict_do_update(
+                index_elements=[ImageBlob.digest],
+                set_={"ref_count": ImageBlob.ref_count + 1},
+            )
+        )
+
+        #simpan path ke supabase
+        new_image = WisataImage(
+            id_wisata=id_wisata, image_url=stored.url, digest=stored.digest, is_primary=set_as_primary
+        )
+        db.add(new_image)
+        # Gambar bagian dari representasi wisata, jadi Last-Modified ikut maju
+        wisata.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+    except BaseException:
+        # Jangan tinggalkan file yatim kalau baris gambarnya gagal disimpan
+        await db.rollback()
+        await discard_image(stored)
+        raise
+
+    await publish_image(stored)
+    await db.refresh(new_image, ["variants"])
+    invalidate_wisata_cache(id_wisata)
     
     return new_image
 
-def delete_image(db: Session, id_image:int):
-    image_data = get_image_by_id(db=db, id_image=id_image)
+async def _copy_variants(db: AsyncSession, image: WisataImage) -> bool:
+    """Blob yang sama sudah punya turunan dari upload sebelumnya: pakai file yang ada, cukup salin barisnya."""
+    existing = await db.scalars(
+        select(WisataImageVariant)
+        .join(WisataImage, WisataImage.id_image == WisataImageVariant.id_image)
+        .where(WisataImage.digest == image.digest, WisataImage.id_image != image.id_image)
+    )
+    copies = {}
+    for variant in existing:
+        copies.setdefault((variant.format, variant.width), variant)
+    if not copies:
+        return False
+
+    db.add_all(
+        WisataImageVariant(
+            id_image=image.id_image,
+            image_url=v.image_url,
+            format=v.format,
+            width=v.width,
+            height=v.height,
+        )
+        for v in copies.values()
+    )
+    return True
+
+
+async def generate_image_variants(id_image: int) -> None:
+    """
+    Background task setelah upload: buat thumbnail / WebP / AVIF di process pool lalu catat di DB.
+    Pakai session sendiri karena session request sudah ditutup saat task ini jalan.
+    """
+    async with AsyncSessionLocal() as db:
+        image = await db.get(WisataImage, id_image)
+        if image is None:
+            return
+
+        if image.digest is not None and await _copy_variants(db, image):
+            await db.commit()
+            invalidate_wisata_cache(image.id_wisata)
+            return
+
+        try:
+            rendered = await store_variants(_storage_key(image.image_url))
+        except Exception:
+            logger.exception("gagal membuat turunan gambar %s", image.image_url)
+            return
+        if not rendered:
+            return
+
+        db.add_all(
+            WisataImageVariant(
+                id_image=id_image,
+                image_url=v["key"],
+                format=v["format"],
+                width=v["width"],
+                height=v["height"],
+            )
+            for v in rendered
+        )
+        wisata = await db.get(Wisata, image.id_wisata)
+        if wisata is not None:
+            wisata.updated_at = datetime.now(timezone.utc)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Gambar keburu dihapus saat turunan dibuat
+            await db.rollback()
+            await remove_files(v["key"] for v in rendered)
+            return
+        invalidate_wisata_cache(image.id_wisata)
+
+
+def _storage_key(url: str) -> str:
+    # Baris lama ada yang menyimpan path lengkap "app/static/..."
+    return url.removeprefix("app/")
+
+
+async def _release_images(db: AsyncSession, images: List[WisataImage]) -> Dict[Optional[str], List[str]]:
+    """
+    Kurangi ref_count blob milik gambar yang sudah dihapus (baris gambarnya harus sudah di-flush).
+    Return key file yang sudah tidak dipakai siapapun per digest (None = gambar lama),
+    untuk dihapus lewat _remove_released setelah commit.
+    """
+    released: Dict[Optional[str], List[str]] = {}
+    shared: Dict[str, List[str]] = {}
+    for image in images:
+        files = [_storage_key(image.image_url), *(_storage_key(v.image_url) for v in image.variants)]
+        if image.digest is None:
+            # Gambar lama (sebelum content-addressed), file-nya milik gambar ini sendiri
+            released.setdefault(None, []).extend(files)
+            continue
+        await db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.digest == image.digest)
+            .values(ref_count=ImageBlob.ref_count - 1)
+        )
+        shared.setdefault(image.digest, []).extend(files)
+
+    if shared:
+        # Hapus bersyarat: upload yang menambah ref_count di transaksi lain tetap aman,
+        # dan file cuma dihapus kalau baris blob-nya benar-benar terhapus di sini
+        deleted = await db.scalars(
+            delete(ImageBlob)
+            .where(ImageBlob.digest.in_(list(shared)), ImageBlob.ref_count <= 0)
+            .returning(ImageBlob.digest)
+        )
+        for digest in deleted:
+            released[digest] = shared[digest]
+    return released
+
+
+async def _remove_released(db: AsyncSession, released: Dict[Optional[str], List[str]]) -> None:
+    """
+    Hapus file dari _release_images, dipanggil setelah commit. Digest yang sudah punya baris
+    image_blobs lagi (isi yang sama di-upload ulang setelah commit) dilewati, file-nya milik blob baru.
+    """
+    digests = [digest for digest in released if digest is not None]
+    revived = set()
+    if digests:
+        revived = set(await db.scalars(select(ImageBlob.digest).where(ImageBlob.digest.in_(digests))))
+    await remove_files(dict.fromkeys(
+        key for digest, keys in released.items() if digest not in revived for key in keys
+    ))
+
+
+async def delete_image(db: AsyncSession, id_image:int):
+    image_data = await get_image_by_id(db=db, id_image=id_image)
     
     if not image_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tidak menemukan gambar")
     
-    file_path = image_data.image_url
-    
-    if not file_path.startswith("app/"):
-        full_path = f"app/{file_path}"
-    else:
-        full_path = file_path 
-        
-    next_image = None
-
-    if image_data.is_primary:
-        image_data.is_primary = False
-
-    next_image = (
-        db.query(WisataImage)
-        .filter(
-            WisataImage.id_wisata == image_data.id_wisata,
-            WisataImage.id_image != image_data.id_image
+    id_wisata = image_data.id_wisata
+    was_primary = image_data.is_primary
+
+    # Baris gambar (dan turunannya, lewat cascade) dihapus dulu sebelum blob-nya dilepas
+    await db.delete(image_data)
+    await db.flush()
+    released = await _release_images(db, [image_data])
+
+    # Kalau yang dihapus gambar utama, gambar berikutnya jadi utama
+    if was_primary:
+        next_image = await db.scalar(
+            select(WisataImage)
+            .where(WisataImage.id_wisata == id_wisata)
+            .order_by(WisataImage.id_image.asc())
+            .limit(1)
         )
-        .order_by(WisataImage.id_image.asc())
-        .first()
-    )
-
-    if next_image:
-        next_image.is_primary = True
-
-
-
-        
-    try:
-        if os.path.exists(full_path):
-            os.remove(full_path)
-    except Exception as e:
-        print(f"gagal menghapus file di server: {e}")
-        
-    db.delete(image_data)
-    db.commit()
+        if next_image:
+            next_image.is_primary = True
+
+    wisata = await db.get(Wisata, id_wisata)
+    wisata.updated_at = datetime.now(timezone.utc)
+    await db.commit()
+    # File baru dihapus setelah commit, supaya kalau commit gagal file-nya masih ada
+    await _remove_released(db, released)
+    invalidate_wisata_cache(id_wisata)
 
     return {"status": "success", "message": "Gambar berhasil dihapus selamanya."}
\ No newline at end of file
@@ -4,11 +4,14 @@ from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
-from app.core.database import get_db
+from app.core.cache import TTLCache
+from app.core.database import get_db, get_async_db
 from orm_models import User, UserRole
 
 load_dotenv()
@@ -18,6 +21,12 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Cache singkat role user per id_user, supaya cek role tidak query tabel users tiap request
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+)
+
 class TokenData(BaseModel):
     id_user: int
     role: UserRole 
@@ -81,12 +90,36 @@ def get_current_user(db: Session = Depends(get_db), token_data: TokenData = Depe
     return user
     
     
+async def get_current_principal(
+    token_data: TokenData = Depends(verify_token), db: AsyncSession = Depends(get_async_db)
+) -> TokenData:
+    """
+    Identitas user dari token tanpa load object User.
+    Role diambil dari cache (bukan dari claim) supaya user yang dihapus atau
+    diturunkan role-nya tidak bisa akses lagi setelah cache di-invalidate.
+    """
+    role = principal_cache.get(token_data.id_user)
+    if role is None:
+        # Dibaca sebelum query: kalau role berubah selama query jalan, role lama tidak di-cache
+        generation = principal_cache.generation
+        role = await db.scalar(select(User.role).where(User.id_user == token_data.id_user))
+        if role is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal_cache.set(token_data.id_user, role, generation=generation)
+    return TokenData(id_user=token_data.id_user, role=role)
+
+
+def invalidate_principal(id_user: int) -> None:
+    """Dipanggil setiap data user (role) berubah atau user dihapus."""
+    principal_cache.invalidate(id_user)
+
+
 def require_role(*allowed_roles: UserRole):
-    def dependency(current_user: User = Depends(get_current_user)):
-        if current_user.role not in allowed_roles:
+    async def dependency(principal: TokenData = Depends(get_current_principal)):
+        if principal.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have permission to access this resource."
             )
-        return current_user
+        return principal
     return dependency
\ No newline at end of file
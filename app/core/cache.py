@@ -0,0 +1,92 @@
+""" cache.py berisikan cache in-process (LRU + TTL) buat response yang sering diakses"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Cache LRU dengan batas ukuran dan masa berlaku (TTL) per entry.
+    Aman dipakai dari banyak thread (route sync jalan di threadpool).
+    Cache ini per-proses, jadi kalau ada beberapa worker, TTL yang
+    membatasi seberapa lama worker lain bisa melihat data lama.
+
+    `generation` naik setiap ada invalidate. Pembaca yang load dari database mencatat
+    generation sebelum query lalu mengirimnya ke set(); kalau di tengah jalan ada
+    invalidate, hasil lama itu tidak disimpan.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """Return False kalau tidak disimpan karena ada invalidate setelah `generation` dibaca."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            # Buang entry yang paling lama tidak dipakai kalau sudah penuh
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def invalidate_prefix(self, *prefix: Any) -> None:
+        """Hapus semua key tuple yang diawali `prefix`, misal ("published",)."""
+        n = len(prefix)
+        with self._lock:
+            self._generation += 1
+            stale = [k for k in self._data if isinstance(k, tuple) and k[:n] == prefix]
+            for k in stale:
+                del self._data[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else None,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
@@ -1,38 +1,289 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from app.core.metrics import instrument_engine
+from app.core.query_debug import install_query_debug
+import logging
 import os
+import threading
+import time
+import uuid
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_TRANSACTION = os.getenv("DATABASE_TRANSACTION")
 DATABASE_SESSION = os.getenv("DATABASE_SESSION")
 
-try:
-    #buat coba ke Transaction pooler
-    engine = create_engine(DATABASE_TRANSACTION, pool_pre_ping=True)
-    with engine.connect() as conn:
-        print("Connected via Transaction pooler")
-except Exception as e:
-    print(f"gagal konek via Trasaction pooler, mencoba Session pooler...")
-    try:
-        #buat coba session pooler
-        engine = create_engine(DATABASE_SESSION, pool_pre_ping=True)
-        with engine.connect() as conn:
-            print("Connected via pooler")
-    except Exception as e1:
-        print("Both connections failed.")
-        print(f"Transaction error: {e}")
-        print(f"Session error: {e1}")
+#Setting pool, bisa diatur dari .env
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# "transaction" / "session"; kosong = tebak dari URL (port 6543 atau ?pgbouncer=true)
+DB_POOLER_MODE = os.getenv("DB_POOLER_MODE", "").lower()
+
+#Driver async untuk URL yang sama dengan engine sync
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+class PoolMetrics:
+    """Counter checkout dan waktu tunggu connection dari pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+class _InstrumentedPoolMixin:
+    # Bungkus _do_get supaya kelihatan berapa lama request nunggu connection kosong
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+
+def is_transaction_pooler(url: URL) -> bool:
+    """
+    Pooler mode transaction (pgbouncer / Supavisor port 6543) tidak bisa dipakai
+    bareng prepared statement, karena statement berikutnya bisa jalan di backend lain.
+    """
+    if DB_POOLER_MODE:
+        return DB_POOLER_MODE == "transaction"
+    return url.port == 6543 or url.query.get("pgbouncer") == "true"
+
+
+def _engine_options(url: URL, use_async: bool) -> dict:
+    if url.get_backend_name() != "postgresql":
+        # SQLite (dev/test) pakai pool bawaan SQLAlchemy
+        return {}
+
+    options = {
+        "pool_pre_ping": True,
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+    if use_async:
+        # psycopg2 tidak pakai prepared statement di server, asyncpg pakai
+        cache_size = 0 if is_transaction_pooler(url) else DB_STATEMENT_CACHE_SIZE
+        connect_args = {
+            "statement_cache_size": cache_size,
+            "prepared_statement_cache_size": cache_size,
+        }
+        if cache_size == 0:
+            # Nama unik supaya tidak bentrok dengan statement milik client lain di pooler
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        options["connect_args"] = connect_args
+
+    return options
+
+
+def _enable_sqlite_foreign_keys(engine: Engine) -> None:
+    # SQLite defaultnya tidak cek foreign key; dinyalakan supaya perilaku dev sama dengan Postgres
+    @event.listens_for(engine, "connect")
+    def _set_pragma(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def create_db_engine(url: str | URL) -> Engine:
+    url = make_url(url)
+    engine = create_engine(url.difference_update_query(["pgbouncer"]), **_engine_options(url, use_async=False))
+    if url.get_backend_name() == "sqlite":
+        _enable_sqlite_foreign_keys(engine)
+    instrument_engine(engine)
+    install_query_debug(engine)
+    return engine
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def create_async_db_engine(url: str | URL) -> AsyncEngine:
+    url = make_url(url)
+    async_url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+    engine = create_async_engine(async_url.difference_update_query(["pgbouncer"]), **_engine_options(url, use_async=True))
+    if url.get_backend_name() == "sqlite":
+        _enable_sqlite_foreign_keys(engine.sync_engine)
+    # Event cursor dipasang di engine sync di belakang AsyncEngine
+    instrument_engine(engine.sync_engine)
+    install_query_debug(engine.sync_engine)
+    return engine
+
+
+def pool_stats(engine: Engine | AsyncEngine) -> dict:
+    pool = engine.pool if isinstance(engine, Engine) else engine.sync_engine.pool
+    stats = {"status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
+
+
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_engine_lock = threading.Lock()
+
+# Bind-nya diisi saat engine pertama kali dibuat (lihat get_engine/get_async_engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# expire_on_commit=False supaya object masih bisa dibaca setelah commit tanpa lazy load
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+
+def database_url() -> str:
+    """Transaction pooler diutamakan, Session pooler jadi cadangan."""
+    return DATABASE_TRANSACTION or DATABASE_SESSION
+
+
+def get_engine() -> Engine:
+    """Engine sync dibuat saat pertama dipakai, bukan saat module di-import."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine(database_url())
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_db_engine(database_url())
+                AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+def startup_check_enabled() -> bool:
+    """
+    DB_STARTUP_CHECK=true/false. Kalau tidak di-set, cek koneksi jalan otomatis saat
+    Transaction dan Session pooler dua-duanya diisi, supaya fallback ke Session pooler tetap aktif.
+    """
+    value = os.getenv("DB_STARTUP_CHECK", "").lower()
+    if not value:
+        return bool(DATABASE_TRANSACTION and DATABASE_SESSION)
+    return value == "true"
+
+
+async def check_connection() -> None:
+    """
+    Tes koneksi ke Transaction pooler, kalau gagal pindah ke Session pooler.
+    Dipanggil dari lifespan kalau startup_check_enabled().
+    """
+    global DATABASE_TRANSACTION
+    try:
+        async with get_async_engine().connect():
+            logger.info("Connected via %s", "Transaction pooler" if DATABASE_TRANSACTION else "Session pooler")
+    except Exception as e:
+        if not (DATABASE_TRANSACTION and DATABASE_SESSION):
+            raise
+        logger.warning("gagal konek via Transaction pooler (%s), mencoba Session pooler...", e)
+        await dispose_engines()
+        DATABASE_TRANSACTION = None
+        async with get_async_engine().connect():
+            logger.info("Connected via Session pooler")
+
+
+async def dispose_engines() -> None:
+    global _engine, _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# insert() yang punya ON CONFLICT, per dialect
+UPSERT_INSERT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def upsert_insert(db: AsyncSession):
+    """insert() sesuai dialect session, supaya bisa pakai on_conflict_do_update / do_nothing."""
+    return UPSERT_INSERT[db.bind.dialect.name]
+
+def get_pool_stats() -> dict:
+    stats = {}
+    if _engine is not None:
+        stats["sync"] = pool_stats(_engine)
+    if _async_engine is not None:
+        stats["async"] = pool_stats(_async_engine)
+    return stats
@@ -0,0 +1,65 @@
+""" http_cache.py berisikan helper ETag / Last-Modified buat conditional GET (304 Not Modified)"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag dari versi data (bukan dari body), jadi tidak perlu serialize dulu."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Kolom DateTime di DB tidak menyimpan timezone, isinya selalu UTC
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match lebih diutamakan daripada If-Modified-Since (RFC 9110)
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return as_utc(last_modified).replace(microsecond=0) <= since
+
+    return False
+
+
+@dataclass
+class CachedResponse:
+    """Body JSON yang sudah jadi beserta validator HTTP-nya."""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(as_utc(self.last_modified), usegmt=True)
+        return headers
+
+    def to_response(self, request: Request) -> Response:
+        if is_not_modified(request, self.etag, self.last_modified):
+            return Response(status_code=304, headers=self.headers())
+        return Response(content=self.body, media_type="application/json", headers=self.headers())
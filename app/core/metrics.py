@@ -0,0 +1,264 @@
+""" metrics.py berisikan instrumentasi request: histogram latency per route, request in-flight, jumlah/waktu SQL per request"""
+
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import os
+import threading
+import time
+
+# Detik
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Jumlah query per request; request yang jatuh di bucket atas biasanya N+1
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Header Server-Timing bisa dimatikan kalau tidak mau membocorkan waktu DB ke client
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+
+@dataclass
+class RequestStats:
+    """Dikumpulkan selama satu request; diisi event cursor SQLAlchemy lewat contextvar."""
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    # False setelah body terakhir terkirim, query background task tidak ikut dihitung
+    active: bool = True
+    # Jumlah SELECT per bentuk statement, cuma diisi kalau query_debug aktif
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def server_timing(self, total_seconds: float) -> str:
+        # app = kode Python (handler + serialisasi response) di luar waktu tunggu DB
+        db_ms = self.sql_seconds * 1000
+        total_ms = total_seconds * 1000
+        return (
+            f'db;dur={db_ms:.1f};desc="{self.sql_count} queries", '
+            f"app;dur={max(total_ms - db_ms, 0):.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+
+
+# Request yang sedang berjalan. Ikut ke threadpool (route sync) dan greenlet SQLAlchemy async
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[RequestStats]:
+    """Hitung query di dalam blok `with` (script / test yang memanggil service langsung, tanpa request HTTP)."""
+    stats = RequestStats()
+    token = _current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_request.reset(token)
+
+
+# Dipanggil setiap request selesai: hook(method, route, status_code, detik, stats)
+RequestHook = Callable[[str, str, int, float, RequestStats], None]
+_request_hooks: List[RequestHook] = []
+
+
+def add_request_hook(hook: RequestHook) -> Callable[[], None]:
+    """Return fungsi untuk melepas hook-nya lagi."""
+    _request_hooks.append(hook)
+    return lambda: _request_hooks.remove(hook)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is not None and stats.active and context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    start = getattr(context, "_metrics_start", None)
+    if stats is None or start is None or not stats.active:
+        return
+    stats.sql_count += 1
+    stats.sql_seconds += time.perf_counter() - start
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Pasang event cursor di engine sync (untuk AsyncEngine pakai engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # Bucket "le": value <= batas
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield _format_value(bound), running
+        yield "+Inf", self.count
+
+
+@dataclass
+class RouteMetrics:
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    db_seconds: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    queries: Histogram = field(default_factory=lambda: Histogram(QUERY_COUNT_BUCKETS))
+    status: Dict[int, int] = field(default_factory=dict)
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """
+    Penyimpanan metric dalam memori (per process), dirender ke format teks Prometheus.
+    Label route pakai template path (/wisata/{id_wisata}), bukan path asli, supaya jumlah seri tetap kecil.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            metrics.latency.observe(seconds)
+            metrics.db_seconds.observe(stats.sql_seconds)
+            metrics.queries.observe(stats.sql_count)
+            metrics.status[status_code] = metrics.status.get(status_code, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+
+    def render(self, samples: Iterable[Tuple[str, str, str, Dict[str, str], float]] = ()) -> str:
+        """samples: metric tambahan (nama, tipe, help, label, nilai), misal statistik pool / cache."""
+        lines = []
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines += [
+                "# HELP http_requests_in_flight Request yang sedang diproses",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP http_requests_total Jumlah request per route dan status",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route), metrics in routes:
+                for status_code, count in sorted(metrics.status.items()):
+                    lines.append(f"http_requests_total{_labels(method=method, route=route, status=status_code)} {count}")
+
+            for name, help_text, attr in (
+                ("http_request_duration_seconds", "Latency request sampai body terakhir terkirim", "latency"),
+                ("http_request_db_seconds", "Total waktu query SQL per request", "db_seconds"),
+                ("http_request_db_queries", "Jumlah query SQL per request", "queries"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (method, route), metrics in routes:
+                    histogram: Histogram = getattr(metrics, attr)
+                    for le, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_labels(method=method, route=route, le=le)} {count}")
+                    lines.append(f"{name}_sum{_labels(method=method, route=route)} {_format_value(float(histogram.sum))}")
+                    lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+
+        described = set()
+        for name, metric_type, help_text, labels, value in sorted(samples, key=lambda sample: sample[0]):
+            if name not in described:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+                described.add(name)
+            lines.append(f"{name}{_labels(**labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _route_label(scope: Scope, root_path: str) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mount (misal /static) tidak mengisi scope["route"], tapi menambah root_path
+    mounted = scope.get("root_path", "")[len(root_path):]
+    return mounted or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI murni (bukan BaseHTTPMiddleware, supaya streaming response tidak ditampung).
+    Latency dihitung sampai body terakhir terkirim, background task tidak ikut.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+        finished: Optional[float] = None
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, finished
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing(time.perf_counter() - start))
+                    # Supaya browser dari origin lain (frontend) juga bisa membaca Server-Timing
+                    headers.append("Timing-Allow-Origin", "*")
+            elif message["type"] == "http.response.pathsend" or (
+                message["type"] == "http.response.body" and not message.get("more_body", False)
+            ):
+                finished = time.perf_counter()
+                stats.active = False
+            await send(message)
+
+        self.registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.registry.in_flight -= 1
+            _current_request.reset(token)
+            elapsed = (finished or time.perf_counter()) - start
+            route = _route_label(scope, root_path)
+            self.registry.observe(scope["method"], route, status_code, elapsed, stats)
+            for hook in list(_request_hooks):
+                hook(scope["method"], route, status_code, elapsed, stats)
@@ -0,0 +1,120 @@
+""" pagination.py berisikan helper keyset (cursor) pagination berbasis primary key integer"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+from datetime import datetime
+import base64
+import json
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def _clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _split_page(rows: List[Any], key_column: Any, limit: int) -> Tuple[List[Any], Optional[int]]:
+    # Kita ambil satu baris lebih buat tahu masih ada halaman berikutnya atau tidak
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], key_column.key)
+    return rows, next_cursor
+
+def keyset_paginate(
+    query: Query,
+    key_column: Any,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[int]]:
+    """
+    Ambil satu halaman dari query, diurutkan berdasarkan key_column.
+    `after` adalah nilai key terakhir dari halaman sebelumnya, jadi database
+    langsung lompat lewat index tanpa OFFSET. Return (rows, next_cursor).
+    """
+    limit = _clamp_limit(limit)
+
+    if after is not None:
+        query = query.filter(key_column < after if descending else key_column > after)
+
+    order = key_column.desc() if descending else key_column.asc()
+    rows = query.order_by(order).limit(limit + 1).all()
+    return _split_page(rows, key_column, limit)
+
+def _keyset_stmt(stmt: Select, key_column: Any, limit: int, after: Optional[int], descending: bool) -> Select:
+    if after is not None:
+        stmt = stmt.where(key_column < after if descending else key_column > after)
+    order = key_column.desc() if descending else key_column.asc()
+    return stmt.order_by(order).limit(limit + 1)
+
+async def keyset_paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    key_column: Any,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[int]]:
+    """Versi async dari keyset_paginate untuk statement select() 2.0."""
+    limit = _clamp_limit(limit)
+    rows = (await db.scalars(_keyset_stmt(stmt, key_column, limit, after, descending))).all()
+    return _split_page(list(rows), key_column, limit)
+
+async def keyset_paginate_rows_async(
+    db: AsyncSession,
+    stmt: Select,
+    key_column: Any,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[int]]:
+    """Sama seperti keyset_paginate_async, tapi untuk select beberapa kolom: hasilnya Row, bukan object ORM."""
+    limit = _clamp_limit(limit)
+    rows = (await db.execute(_keyset_stmt(stmt, key_column, limit, after, descending))).all()
+    return _split_page(list(rows), key_column, limit)
+
+
+def encode_cursor(created_at: datetime, id_: int) -> str:
+    """Cursor (created_at, id) dibungkus jadi string opaque buat client."""
+    raw = json.dumps([created_at.isoformat(), id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id_ = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor tidak valid")
+
+async def keyset_paginate_time_async(
+    db: AsyncSession,
+    stmt: Select,
+    time_column: Any,
+    id_column: Any,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    Keyset pagination terbaru-dulu berdasarkan (time_column, id_column).
+    id ikut di cursor supaya baris dengan created_at sama tidak terlewat/dobel.
+    Butuh index (..., time_column DESC, id_column DESC) supaya tiap halaman cuma index scan pendek.
+    """
+    limit = _clamp_limit(limit)
+
+    if after is not None:
+        created_at, id_ = decode_cursor(after)
+        stmt = stmt.where(tuple_(time_column, id_column) < tuple_(created_at, id_))
+
+    stmt = stmt.order_by(time_column.desc(), id_column.desc()).limit(limit + 1)
+    rows = list((await db.scalars(stmt)).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, time_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
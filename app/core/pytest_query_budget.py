@@ -0,0 +1,74 @@
+""" pytest_query_budget.py berisikan plugin pytest yang menggagalkan test kalau request melebihi budget query
+
+Aktifkan dengan `pytest -p app.core.pytest_query_budget` atau `pytest_plugins = ["app.core.pytest_query_budget"]`
+di conftest.py, lalu tandai test-nya:
+
+    @pytest.mark.query_budget(5)                  # tiap request maksimal 5 query
+    @pytest.mark.query_budget(5, n_plus_one=True) # juga gagal kalau ada SELECT berulang (N+1)
+
+`--query-budget N` memberi budget default ke semua test tanpa marker. Yang dihitung request lewat
+app FastAPI (TestClient / httpx ASGITransport); untuk memanggil service langsung pakai
+`app.core.metrics.track_queries()`.
+"""
+
+import pytest
+
+from app.core import metrics, query_debug
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("query budget")
+    group.addoption(
+        "--query-budget",
+        type=int,
+        default=None,
+        help="Budget query per request untuk test yang tidak punya marker query_budget",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, n_plus_one=False): gagal kalau ada request yang menjalankan lebih dari max_queries query",
+    )
+    # Bentuk query dicatat supaya pesan gagal bisa menunjukkan query mana yang berulang
+    query_debug.enable_tracking()
+
+
+def _budget(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return item.config.getoption("query_budget"), False
+    max_queries = marker.args[0] if marker.args else marker.kwargs.get("max_queries")
+    return max_queries, marker.kwargs.get("n_plus_one", False)
+
+
+def _describe(method, route, stats):
+    lines = [f"{method} {route}: {stats.sql_count} query"]
+    for fp, count in stats.fingerprints.most_common(3):
+        lines.append(f"    {count}x {fp[:200]}")
+    return "\n".join(lines)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    max_queries, check_n_plus_one = _budget(item)
+    if max_queries is None and not check_n_plus_one:
+        return (yield)
+
+    violations = []
+
+    def check(method, route, status_code, seconds, stats):
+        if max_queries is not None and stats.sql_count > max_queries:
+            violations.append(f"melebihi budget {max_queries}: " + _describe(method, route, stats))
+        elif check_n_plus_one and query_debug.repeated_selects(stats):
+            violations.append("kemungkinan N+1: " + _describe(method, route, stats))
+
+    remove = metrics.add_request_hook(check)
+    try:
+        result = yield
+    finally:
+        remove()
+    if violations:
+        pytest.fail("Query budget terlampaui:\n" + "\n".join(violations), pytrace=False)
+    return result
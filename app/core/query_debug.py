@@ -0,0 +1,145 @@
+""" query_debug.py berisikan detektor N+1 dan log query lambat (opt-in, untuk development / staging)"""
+
+from functools import lru_cache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import RequestStats, add_request_hook, current_request_stats
+from dotenv import load_dotenv
+import hashlib
+import logging
+import os
+import re
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Hitung bentuk SELECT per request dan log request yang mengulang bentuk yang sama (N+1)
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "false").lower() == "true"
+# Berapa kali SELECT dengan bentuk sama dalam satu request sebelum dianggap N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Query lebih lama dari ini (ms) di-log beserta EXPLAIN-nya; 0 = mati
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+
+# EXPLAIN tanpa ANALYZE, jadi query-nya tidak dijalankan ulang
+EXPLAIN_PREFIX = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+_tracking = QUERY_DEBUG
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Placeholder asyncpg ($1::INTEGER), psycopg2 (%(name)s / %s), sqlite (?)
+_PLACEHOLDER = re.compile(
+    r"\$\d+(?:::(?:(?:TIMESTAMP|TIME) WITH(?:OUT)? TIME ZONE|\w+)(?:\[\])?)?|%\(\w+\)s|%s|\?"
+)
+# IN (?, ?, ?) -> IN (?), supaya jumlah id tidak bikin bentuk baru
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SELECT = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def enable_tracking(enabled: bool = True) -> None:
+    """Nyalakan pencatatan bentuk query tanpa env (dipakai plugin pytest)."""
+    global _tracking
+    _tracking = enabled
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Bentuk statement tanpa nilai: angka, string dan parameter jadi `?`."""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    return _PLACEHOLDER_LIST.sub("(?)", normalized)
+
+
+def fingerprint_id(fp: str) -> str:
+    # Id pendek buat grep log
+    return hashlib.sha1(fp.encode()).hexdigest()[:12]
+
+
+def _is_select(statement: str) -> bool:
+    return _SELECT.match(statement) is not None
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None:
+        return "(EXPLAIN tidak didukung untuk dialect ini)"
+    # EXPLAIN yang gagal di Postgres membuat transaksi request jadi aborted, jadi dibungkus SAVEPOINT
+    savepoint = conn.dialect.name == "postgresql" and conn.in_transaction()
+    # Lewat cursor DBAPI langsung supaya event cursor tidak terpanggil lagi
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT query_debug_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" | ".join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception as e:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_debug_explain")
+            return f"(EXPLAIN gagal: {e})"
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT query_debug_explain")
+        return plan
+    except Exception as e:
+        return f"(EXPLAIN gagal: {e})"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if SLOW_QUERY_MS and context is not None:
+        context._debug_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _tracking and _is_select(statement):
+        stats = current_request_stats()
+        if stats is not None and stats.active:
+            stats.fingerprints[fingerprint(statement)] += 1
+
+    start = getattr(context, "_debug_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+
+    fp = fingerprint(statement)
+    plan = ""
+    if SLOW_QUERY_EXPLAIN and not executemany and _is_select(statement):
+        plan = "\n" + _explain(conn, statement, parameters)
+    logger.warning("query lambat %.1f ms [%s]: %s%s", elapsed_ms, fingerprint_id(fp), fp, plan)
+
+
+def install_query_debug(engine: Engine) -> None:
+    """Dipasang di semua engine; listener langsung return kalau QUERY_DEBUG / SLOW_QUERY_MS tidak diisi."""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def repeated_selects(stats: RequestStats, threshold: int = N_PLUS_ONE_THRESHOLD) -> list:
+    """[(fingerprint, jumlah)] yang berulang >= threshold, paling banyak dulu."""
+    return [(fp, count) for fp, count in stats.fingerprints.most_common() if count >= threshold]
+
+
+def _report_n_plus_one(method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+    if not _tracking:
+        return
+    for fp, count in repeated_selects(stats):
+        logger.warning(
+            "kemungkinan N+1 di %s %s: %d SELECT dengan bentuk sama [%s] (total %d query): %s",
+            method, route, count, fingerprint_id(fp), stats.sql_count, fp[:500],
+        )
+
+
+add_request_hook(_report_n_plus_one)
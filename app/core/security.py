@@ -1,15 +1,59 @@
 """ security.py berisikan fungsi untuk menghandle hashing password user bcrypt"""
 
 from passlib.context import CryptContext
+from concurrent.futures import Future, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Callable, Optional, Tuple
+import asyncio
 import hashlib
+import os
+import threading
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cost bcrypt; kalau dinaikkan, hash lama otomatis di-rehash saat user login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Jumlah thread khusus bcrypt dan berapa banyak request yang boleh antri di belakangnya
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
 
-def hash_password(password: str) -> str:
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt melepas GIL saat hashing, jadi thread pool sudah cukup paralel
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
+
+def _prehash(password: str) -> str:
     #buat mastikan password 32 bytes sebelum di-hash
-    sha = hashlib.sha256(password.encode('utf-8')).hexdigest()
-    return pwd_context.hash(sha)
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(_prehash(password))
 
 def verify_password(plain:str, hashed: str) -> bool:
-    sha = hashlib.sha256(plain.encode('utf-8')).hexdigest()
-    return pwd_context.verify(sha, hashed)
\ No newline at end of file
+    return pwd_context.verify(_prehash(plain), hashed)
+
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Return (valid, hash_baru). hash_baru terisi kalau hash lama perlu di-upgrade (needs_update)."""
+    return pwd_context.verify_and_update(_prehash(plain), hashed)
+
+def _submit(fn: Callable, *args) -> Future:
+    # Tolak langsung kalau antrian penuh, daripada request lain ikut kelaparan
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server sedang sibuk, silahkan coba lagi",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+# Dipanggil dari route async; hashing jalan di pool bcrypt, bukan di event loop / threadpool
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(hash_password, password))
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_submit(verify_and_update_password, plain, hashed))
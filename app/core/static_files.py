@@ -0,0 +1,126 @@
+""" static_files.py berisikan StaticFiles untuk /static dengan header cache (immutable untuk file ber-hash, ETag di memori)"""
+
+import os
+import re
+import stat
+from dataclasses import dataclass, field
+from typing import Dict, Iterable
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+
+# File yang namanya sha256 isinya (lihat image_service.blob_key) tidak pernah berubah
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# File lain (gambar lama per-wisata, aset) boleh di-cache sebentar lalu divalidasi ulang pakai ETag
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
+
+_CONTENT_ADDRESSED = re.compile(r"^(?P<etag>[0-9a-f]{64}(?:-\d+w)?)\.[A-Za-z0-9]+$")
+
+# Entry file ber-hash: path + stat + header yang sudah jadi, supaya request berikutnya tidak perlu stat lagi.
+# Cache ini per worker: file yang dihapus worker lain baru ketahuan saat dibuka (jadi 404, lihat _CachedFileResponse)
+static_cache = TTLCache(
+    maxsize=int(os.getenv("STATIC_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("STATIC_CACHE_TTL", "300")),
+)
+
+
+@dataclass
+class _StaticEntry:
+    full_path: str
+    stat_result: os.stat_result
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def content_etag(path: str) -> str | None:
+    """ETag kuat dari nama file ber-hash (tanpa baca isi file), None kalau bukan file ber-hash."""
+    match = _CONTENT_ADDRESSED.match(os.path.basename(path))
+    return f'"{match.group("etag")}"' if match else None
+
+
+def invalidate_static(paths: Iterable[str], directory: str = "app/static") -> None:
+    """Dipanggil setelah file dihapus supaya entry-nya tidak dilayani dari memori lagi."""
+    for path in paths:
+        static_cache.invalidate(os.path.normpath(os.path.relpath(path, directory)))
+
+
+class _CachedFileResponse(FileResponse):
+    """
+    FileResponse dari entry static_cache. Header baru dikirim setelah file berhasil dibuka,
+    jadi file yang sudah dihapus (misal oleh worker lain) jadi 404 dan entry-nya dibuang, bukan 500.
+    """
+
+    def __init__(self, cache_key: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        pending: list[Message] = []
+
+        async def send_after_open(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                pending.append(message)
+                return
+            while pending:
+                await send(pending.pop())
+            await send(message)
+
+        try:
+            await super().__call__(scope, receive, send_after_open)
+        except FileNotFoundError:
+            if not pending:
+                # Header sudah terkirim, tidak bisa diganti 404 lagi
+                raise
+            static_cache.invalidate(self.cache_key)
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles dengan:
+    - Cache-Control immutable + ETag dari digest untuk file ber-hash, tanpa stat per request
+    - Cache-Control max-age pendek untuk file lain (ETag bawaan Starlette dari mtime/size)
+    Response tetap FileResponse, jadi server yang mendukung ekstensi ASGI
+    `http.response.pathsend` (misal Granian) mengirim file langsung lewat sendfile.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        etag = content_etag(path)
+        if etag is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        entry = static_cache.get(path)
+        if entry is None:
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                raise HTTPException(status_code=404)
+            entry = _StaticEntry(
+                full_path=full_path,
+                stat_result=stat_result,
+                headers={"etag": etag, "cache-control": IMMUTABLE_CACHE_CONTROL},
+            )
+            static_cache.set(path, entry)
+
+        return self._conditional(
+            _CachedFileResponse(path, entry.full_path, stat_result=entry.stat_result, headers=entry.headers),
+            scope,
+        )
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers={"cache-control": f"public, max-age={STATIC_MAX_AGE}"},
+        )
+        return self._conditional(response, scope)
+
+    def _conditional(self, response: Response, scope: Scope) -> Response:
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
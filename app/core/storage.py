@@ -0,0 +1,305 @@
+""" storage.py berisikan backend penyimpanan file gambar: disk lokal atau object storage S3-compatible"""
+
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from app.core.static_files import IMMUTABLE_CACHE_CONTROL, invalidate_static
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# local (default) / s3
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "app")
+
+# S3-compatible (AWS S3, MinIO, Cloudflare R2, Supabase Storage, ...)
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+# Kalau bucket publik / di belakang CDN isi base URL-nya; kosong = pakai presigned URL
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "3600"))
+
+
+class StorageBackend(ABC):
+    """
+    Key file adalah path relatif yang juga disimpan di kolom image_url,
+    misal "static/images/blobs/ab/<sha256>.jpg". Semua I/O jalan di threadpool.
+    """
+
+    # Folder untuk temp file upload sebelum masuk storage
+    staging_folder: str = tempfile.gettempdir()
+
+    @abstractmethod
+    async def put_file(self, source_path: str, key: str, content_type: str, immutable: bool = False) -> None:
+        """Masukkan file lokal ke storage (key yang sudah ada ditimpa); source_path sudah tidak ada setelahnya."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]) -> None:
+        """Hapus file; key yang sudah tidak ada diabaikan."""
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        ...
+
+    @abstractmethod
+    async def download(self, key: str, dest_path: str) -> None:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """URL yang dikirim ke client untuk sebuah key."""
+
+    def url_epoch(self) -> Optional[datetime]:
+        """
+        Awal periode berlakunya URL dari url(), untuk response yang menyimpan URL di cache.
+        None kalau URL-nya tidak pernah kedaluwarsa.
+        """
+        return None
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        """Path file lokal berisi `key` (buat diproses Pillow), dihapus setelah selesai."""
+        suffix = os.path.splitext(key)[1]
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        try:
+            await self.download(key, path)
+            yield path
+        finally:
+            await run_in_threadpool(_unlink, path)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class LocalStorage(StorageBackend):
+    """File di disk server, dilayani mount /static (lihat app.core.static_files)."""
+
+    def __init__(self, root: str = LOCAL_STORAGE_ROOT):
+        self.root = root
+        # Temp file di filesystem yang sama supaya pindahnya atomic (rename),
+        # tapi di luar root/static supaya upload yang belum selesai tidak ikut dilayani /static
+        self.staging_folder = os.path.join(root, ".staging")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _put(self, source_path: str, key: str, immutable: bool) -> None:
+        # Selalu ditimpa (rename, murah): file lama dengan key yang sama bisa saja sedang dihapus
+        # oleh delete yang melepas blob-nya tepat sebelum isi yang sama di-upload ulang
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source_path, target)
+
+    async def put_file(self, source_path: str, key: str, content_type: str, immutable: bool = False) -> None:
+        await run_in_threadpool(self._put, source_path, key, immutable)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self.path(key))
+
+    def _delete(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                _unlink(self.path(key))
+            except OSError as e:
+                logger.warning("gagal menghapus file di server: %s", e)
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        await run_in_threadpool(self._delete, keys)
+        # Supaya CachedStaticFiles tidak melayani file yang sudah dihapus dari memori
+        invalidate_static([self.path(key) for key in keys], directory=os.path.join(self.root, "static"))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        folder = self.path(prefix)
+        if os.path.isdir(folder):
+            await run_in_threadpool(shutil.rmtree, folder, True)
+
+    async def download(self, key: str, dest_path: str) -> None:
+        await run_in_threadpool(shutil.copyfile, self.path(key), dest_path)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        # Sudah di disk, tidak perlu disalin
+        yield self.path(key)
+
+    def url(self, key: str) -> str:
+        return key
+
+
+class S3Storage(StorageBackend):
+    """
+    Object storage S3-compatible, supaya beberapa node API bisa berbagi gambar tanpa shared filesystem.
+    boto3 di-import saat dipakai saja (`uv sync --extra s3`).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_url: Optional[str] = None,
+        presign_expires: int = S3_PRESIGN_EXPIRES,
+    ):
+        if not bucket:
+            raise RuntimeError("S3_BUCKET wajib diisi kalau STORAGE_BACKEND=s3")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.presign_expires = presign_expires
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        import boto3
+                        from botocore.config import Config
+                    except ImportError as e:
+                        raise RuntimeError("STORAGE_BACKEND=s3 butuh boto3 (uv sync --extra s3)") from e
+                    self._client = boto3.client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region,
+                        aws_access_key_id=self.access_key_id,
+                        aws_secret_access_key=self.secret_access_key,
+                        config=Config(signature_version="s3v4"),
+                    )
+        return self._client
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def _put(self, source_path: str, key: str, content_type: str, immutable: bool) -> None:
+        try:
+            # Selalu di-upload, walaupun key-nya sudah ada (lihat LocalStorage._put)
+            extra = {"ContentType": content_type}
+            if immutable:
+                extra["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+            self.client.upload_file(source_path, self.bucket, key, ExtraArgs=extra)
+        finally:
+            _unlink(source_path)
+
+    async def put_file(self, source_path: str, key: str, content_type: str, immutable: bool = False) -> None:
+        await run_in_threadpool(self._put, source_path, key, content_type, immutable)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._exists, key)
+
+    def _delete(self, keys: List[str]) -> None:
+        # delete_objects maksimal 1000 key per request
+        for i in range(0, len(keys), 1000):
+            batch = [{"Key": key} for key in keys[i:i + 1000]]
+            self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": batch, "Quiet": True})
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            await run_in_threadpool(self._delete, keys)
+
+    def _delete_prefix(self, prefix: str) -> None:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys = [obj["Key"] for obj in page.get("Contents", [])]
+            if keys:
+                self._delete(keys)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        await run_in_threadpool(self._delete_prefix, prefix)
+
+    async def download(self, key: str, dest_path: str) -> None:
+        await run_in_threadpool(self.client.download_file, self.bucket, key, dest_path)
+
+    def url_epoch(self) -> Optional[datetime]:
+        if self.public_url:
+            return None
+        # URL yang dibuat di periode ini masih berlaku minimal setengah presign_expires setelah periodenya habis
+        period = max(1, self.presign_expires // 2)
+        return datetime.fromtimestamp(time.time() // period * period, tz=timezone.utc)
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        # Presigned URL dihitung lokal (tanpa request ke S3)
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=self.presign_expires
+        )
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def create_storage() -> StorageBackend:
+    if STORAGE_BACKEND == "local":
+        return LocalStorage()
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=S3_BUCKET,
+            endpoint_url=S3_ENDPOINT_URL,
+            region=S3_REGION,
+            access_key_id=S3_ACCESS_KEY_ID,
+            secret_access_key=S3_SECRET_ACCESS_KEY,
+            public_url=S3_PUBLIC_URL,
+        )
+    raise RuntimeError(f"STORAGE_BACKEND tidak dikenal: {STORAGE_BACKEND}")
+
+
+def get_storage() -> StorageBackend:
+    """Backend dibuat saat pertama dipakai, sama seperti engine database."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage: StorageBackend) -> None:
+    """Ganti backend (misal di script atau test)."""
+    global _storage
+    _storage = storage
+
+
+def public_url(key: Optional[str]) -> Optional[str]:
+    """URL gambar untuk response. URL yang sudah absolut dibiarkan (gambar lama / sudah diproses)."""
+    if key is None or key.startswith(("http://", "https://")):
+        return key
+    return get_storage().url(key)
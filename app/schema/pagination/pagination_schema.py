@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[int] = None
+
+class CursorPage(BaseModel, Generic[T]):
+    """Halaman dengan cursor string opaque (dipakai untuk urutan composite, misal created_at + id)."""
+    items: List[T]
+    next_cursor: Optional[str] = None
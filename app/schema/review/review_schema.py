@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional
 from datetime import datetime
 from orm_models import RecommendationLevel
@@ -11,6 +11,18 @@ class UserReviewBase(BaseModel):
 class UserReviewCreate(UserReviewBase):
     id_wisata: int
 
+class UserReviewUpdate(BaseModel):
+    rating: Optional[int] = Field(None, ge=1, le=5)
+    comment: Optional[str] = None # null menghapus comment
+
+    @field_validator("rating")
+    @classmethod
+    def rating_not_null(cls, value):
+        # Rating boleh tidak dikirim, tapi tidak bisa dikosongkan
+        if value is None:
+            raise ValueError("rating tidak boleh null")
+        return value
+
 class UserReviewResponse(UserReviewBase):
     id_review: int
     id_user: int
@@ -1,8 +1,11 @@
 from pydantic import BaseModel, Field, EmailStr, StringConstraints, ConfigDict, field_validator, field_serializer, model_validator
-from typing import Optional, Annotated, List, Any
+from typing import Optional, Annotated, List, Dict
 from decimal import Decimal
+from enum import Enum
 from datetime import time, datetime
 from orm_models import WisataStatus, Wisata, Tag
+from app.schema.pagination.pagination_schema import Page
+from app.core.storage import public_url
 
 class WisataBase(BaseModel):
     nama_wisata: str
@@ -29,6 +32,27 @@ class WisataUpdate(BaseModel):
     facility_id: Optional[List[int]] = None
     tag_id: Optional[List[int]] = None
     
+class ImageVariantResponse(BaseModel):
+    image_url: str
+    format: str
+    width: int
+    height: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("image_url")
+    @classmethod
+    def resolve_url(cls, value: str) -> str:
+        # Di DB tersimpan key storage, ke client dikirim URL-nya (path /static atau URL S3)
+        return public_url(value)
+
+class RatingSummary(BaseModel):
+    review_count: int = 0
+    average: Optional[float] = None
+    histogram: Dict[int, int] = Field(default_factory=lambda: {value: 0 for value in range(1, 6)})
+
+    model_config = ConfigDict(from_attributes=True)
+
 class WisataResponse(WisataBase):
     id_wisata: int
     status: WisataStatus
@@ -36,58 +60,143 @@ class WisataResponse(WisataBase):
     updated_at: datetime
     category_id: int
     
-    facilities: List[Any] = Field(default_factory=list)
-    tag: List[Any] = Field(default_factory=list)
-    images: List[Any] = Field(default_factory=list) # Tambahkan default factory biar aman kalau kosong
+    # Nama fasilitas / tag dan URL gambar; diisi dari relasi ORM di from_wisata
+    facilities: List[str] = Field(default_factory=list)
+    tag: List[str] = Field(default_factory=list)
+    images: List[str] = Field(default_factory=list)
     image_cover: Optional[str] = None
+    # Turunan image_cover (thumbnail / WebP / AVIF), client pilih yang paling kecil tapi cukup
+    cover_variants: List[ImageVariantResponse] = Field(default_factory=list)
+    rating: RatingSummary = Field(default_factory=RatingSummary)
     
     model_config = ConfigDict(from_attributes=True)
-    
-    @model_validator(mode="after")
-    def set_image_cover(self) -> "WisataResponse":
-        # self.images di sini sudah diproses
-        # Kita cari yang primary
-        if self.images:
-            # Jika images berisi object ORM (saat awal dari DB)
-            for img in self.images:
-                # Cek atribut .is_primary dari object WisataImage
-                if getattr(img, 'is_primary', False):
-                    self.image_cover = getattr(img, 'image_url', None)
-                    break
-            
-            # Jika tidak ada yang primary, ambil gambar pertama sebagai cadangan
-            if not self.image_cover and len(self.images) > 0:
-                self.image_cover = getattr(self.images[0], 'image_url', None)
-        
-        return self
+
+    @model_validator(mode="before")
+    @classmethod
+    def from_wisata(cls, data):
+        """
+        Object Wisata (relasi sudah di-load wisata_query) diproyeksikan jadi dict sekali di sini,
+        supaya semua field bertipe jelas dan serialisasi jalan di pydantic-core tanpa callback per field.
+        """
+        if not isinstance(data, Wisata):
+            return data
+        images = data.images
+        # Gambar primary jadi cover, kalau tidak ada pakai gambar pertama
+        cover = next((img for img in images if img.is_primary), images[0] if images else None)
+        return {
+            "id_wisata": data.id_wisata,
+            "nama_wisata": data.nama_wisata,
+            "deskripsi": data.deskripsi,
+            "lokasi": data.lokasi,
+            "ticket_price": data.ticket_price,
+            "open_time": data.open_time,
+            "close_time": data.close_time,
+            "status": data.status,
+            "created_at": data.created_at,
+            "updated_at": data.updated_at,
+            "category_id": data.category_id,
+            "facilities": [f.name for f in data.facilities],
+            "tag": [t.name for t in data.tag],
+            "images": [public_url(img.image_url) for img in images],
+            "image_cover": public_url(cover.image_url) if cover is not None else None,
+            "cover_variants": cover.variants if cover is not None else [],
+            # Wisata yang belum pernah di-review belum punya baris wisata_ratings
+            "rating": data.rating if data.rating is not None else RatingSummary(),
+        }
     
     @field_serializer("open_time", "close_time")
     def serialize_time(self, value: time):
         return value.strftime("%H:%M")
-    
-    @field_serializer("facilities")
-    def serialize_facilities(self, value):
-        # value adalah list object SQLAlchemy. Kita ambil namanya saja.
-        return [f.name for f in value]
-
-    @field_serializer("tag")
-    def serialize_tags(self, value):
-        return [t.name for t in value]
-        
-    # Kamu mungkin perlu serializer untuk images juga jika di DB bentuknya Object
-    @field_serializer("images")
-    def serialize_images(self, value):
-        # Asumsi: value adalah list object Image, dan punya atribut 'image_url'
-        # Jika value sudah string (karena logic lain), serializer ini opsional
-        try:
-            return [img.image_url for img in value]
-        except AttributeError:
-            return value
+
+class WisataFilter(BaseModel):
+    category_id: Optional[int] = None
+    tag_id: List[int] = []
+    facility_id: List[int] = []
+    min_price: Optional[Decimal] = Field(None, ge=0)
+    max_price: Optional[Decimal] = Field(None, ge=0)
+    open_at: Optional[time] = None
+
+class FacetCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+class WisataFacets(BaseModel):
+    category: List[FacetCount] = []
+    tag: List[FacetCount] = []
+    facility: List[FacetCount] = []
+
+class WisataPage(Page[WisataResponse]):
+    # Hanya diisi di halaman pertama (tanpa cursor)
+    facets: Optional[WisataFacets] = None
+
+class WisataView(str, Enum):
+    full = "full"
+    # Ringkas untuk kartu listing, lihat WisataSummary
+    summary = "summary"
+
+class WisataSummary(BaseModel):
+    """Satu kartu di listing: tanpa deskripsi, lokasi, tag, fasilitas dan varian gambar."""
+    id_wisata: int
+    nama_wisata: str
+    category_id: int
+    category: str
+    ticket_price: Optional[Decimal]
+    image_cover: Optional[str] = None
+    rating_average: Optional[float] = None
+    review_count: int = 0
+
+    @field_validator("image_cover")
+    @classmethod
+    def resolve_url(cls, value: Optional[str]) -> Optional[str]:
+        return public_url(value)
+
+class WisataSummaryPage(Page[WisataSummary]):
+    facets: Optional[WisataFacets] = None
 
 class ImageResponse(BaseModel):
     id_image: int
     id_wisata: int
     image_url: str
     is_primary: bool
+    variants: List[ImageVariantResponse] = Field(default_factory=list)
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("image_url")
+    @classmethod
+    def resolve_url(cls, value: str) -> str:
+        return public_url(value)
+class WisataImportRow(WisataBase):
+    """Satu baris import bulk (NDJSON / CSV). Relasi ditulis pakai nama, bukan id."""
+    status: WisataStatus = WisataStatus.draft
+    category: str
+    tags: List[str] = []
+    facilities: List[str] = []
+
+    @field_validator("ticket_price", mode="before")
+    @classmethod
+    def empty_price(cls, value):
+        # Kolom CSV kosong artinya gratis
+        return None if value == "" else value
+
+    @field_validator("tags", "facilities", mode="before")
+    @classmethod
+    def split_names(cls, value):
+        # Di CSV beberapa nama dipisah "|", misal "Pantai|Keluarga"
+        if isinstance(value, str):
+            return [name.strip() for name in value.split("|") if name.strip()]
+        return value
+
+class WisataExportRow(WisataImportRow):
+    id_wisata: int
+
+class BulkRowError(BaseModel):
+    line: int
+    error: str
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class BulkImportResult(BaseModel):
+    created: int = 0
+    failed: int = 0
+    # Dibatasi BULK_MAX_ERRORS, jumlah lengkapnya ada di `failed`
+    errors: List[BulkRowError] = []
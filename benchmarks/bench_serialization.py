@@ -0,0 +1,113 @@
+""" bench_serialization.py mengukur waktu serialisasi WisataResponse per 1.000 wisata
+
+Pemakaian (dari root project):
+    python -m benchmarks.bench_serialization --wisata 1000 --images 3 --variants 3 --rounds 20
+
+Object ORM dibuat di memori (tanpa database), bentuknya sama dengan hasil wisata_query():
+relasi tag, fasilitas, gambar + varian dan rating sudah ter-load. Yang diukur:
+  validate   WisataResponse.model_validate per object ORM
+  dump_json  model_dump_json (pydantic-core), cara body cache listing / detail dibuat
+  fastapi    model_dump(mode="json") + json.dumps, jalur response_model FastAPI yang belum memakai dump_json
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, time as dt_time, timezone
+from decimal import Decimal
+
+import orm_models as m
+from app.schema.wisata.wisata_schema import WisataPage, WisataResponse
+
+
+def make_wisata(count: int, images: int, variants: int) -> list:
+    categories = [m.Category(id_category=i, name=f"kategori-{i}") for i in range(8)]
+    tags = [m.Tag(id_tag=i, name=f"tag-{i}") for i in range(20)]
+    facilities = [m.Facility(id_facility=i, name=f"fasilitas-{i}") for i in range(15)]
+    now = datetime.now(timezone.utc)
+
+    items = []
+    for i in range(count):
+        wisata = m.Wisata(
+            id_wisata=i + 1,
+            nama_wisata=f"Wisata {i}",
+            deskripsi="Pantai pasir putih dengan air jernih " * 5,
+            lokasi=f"Kecamatan {i % 50}, Kalimantan Timur",
+            ticket_price=Decimal("15000.00") if i % 3 else None,
+            open_time=dt_time(8),
+            close_time=dt_time(17, 30),
+            category_id=categories[i % 8].id_category,
+            status=m.WisataStatus.published,
+            created_at=now,
+            updated_at=now,
+        )
+        wisata.tag = [tags[(i + n) % 20] for n in range(3)]
+        wisata.facilities = [facilities[(i + n) % 15] for n in range(4)]
+        wisata.images = [
+            m.WisataImage(
+                id_image=i * images + n,
+                image_url=f"static/images/blobs/ab/{i:08d}{n:056d}.jpg",
+                is_primary=n == 0,
+                variants=[
+                    m.WisataImageVariant(
+                        image_url=f"static/images/blobs/cd/{i:08d}{n:04d}{v:052d}.webp",
+                        format="webp",
+                        width=320 * (v + 1),
+                        height=240 * (v + 1),
+                    )
+                    for v in range(variants)
+                ],
+            )
+            for n in range(images)
+        ]
+        wisata.rating = m.WisataRating(
+            review_count=10, rating_sum=42, rating_1=0, rating_2=1, rating_3=1, rating_4=3, rating_5=5,
+        )
+        items.append(wisata)
+    return items
+
+
+def measure(fn, rounds: int) -> float:
+    """Median detik per panggilan."""
+    fn()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wisata", type=int, default=1000)
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    items = make_wisata(args.wisata, args.images, args.variants)
+    validated = [WisataResponse.model_validate(w) for w in items]
+    page = {"items": items, "next_cursor": None}
+    scale = 1000 / args.wisata
+
+    results = {
+        "validate": measure(lambda: [WisataResponse.model_validate(w) for w in items], args.rounds),
+        "dump_json": measure(lambda: [r.model_dump_json() for r in validated], args.rounds),
+        "fastapi": measure(lambda: [json.dumps(r.model_dump(mode="json")) for r in validated], args.rounds),
+        "page_total": measure(lambda: WisataPage.model_validate(page).model_dump_json(), args.rounds),
+    }
+    results_ms = {name: round(seconds * scale * 1000, 2) for name, seconds in results.items()}
+
+    if args.json:
+        print(json.dumps({"ms_per_1000_wisata": results_ms, "settings": vars(args)}, indent=2))
+        return
+    print(f"{'step':<12} {'ms / 1.000 wisata':>18}")
+    for name, value in results_ms.items():
+        print(f"{name:<12} {value:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
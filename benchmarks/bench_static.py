@@ -0,0 +1,95 @@
+""" bench_static.py membandingkan StaticFiles bawaan dengan CachedStaticFiles untuk gambar ber-hash
+
+Pemakaian (dari root project):
+    python -m benchmarks.bench_static --requests 2000 --concurrency 20 --size-kb 200
+
+Request dikirim lewat httpx ASGITransport (in-process, tanpa network), jadi yang diukur
+overhead Python per request: lookup/stat, header, conditional GET, baca file.
+Zero-copy (pathsend) tidak kelihatan di sini karena hanya aktif di server yang mendukungnya.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.core.static_files import CachedStaticFiles, static_cache
+
+
+def make_tree(root: str, size_kb: int) -> str:
+    """Buat satu file ber-hash seperti yang ditulis image_service, return URL-nya."""
+    data = os.urandom(size_kb * 1024)
+    digest = hashlib.sha256(data).hexdigest()
+    folder = os.path.join(root, "images", "blobs", digest[:2])
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"{digest}.jpg"), "wb") as f:
+        f.write(data)
+    return f"/static/images/blobs/{digest[:2]}/{digest}.jpg"
+
+
+async def run(app, url: str, requests: int, concurrency: int, conditional: bool) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get(url)
+        first.raise_for_status()
+        headers = {"if-none-match": first.headers["etag"]} if conditional else {}
+
+        latencies = []
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == (304 if conditional else 200), response.status_code
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "cache_control": first.headers.get("cache-control", "-"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        url = make_tree(root, args.size_kb)
+        apps = {
+            "StaticFiles": Starlette(routes=[Mount("/static", StaticFiles(directory=root))]),
+            "CachedStaticFiles": Starlette(routes=[Mount("/static", CachedStaticFiles(directory=root))]),
+        }
+
+        print(f"{'mount':<20} {'mode':<12} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}  cache-control")
+        for name, app in apps.items():
+            static_cache.clear()
+            for conditional in (False, True):
+                result = asyncio.run(run(app, url, args.requests, args.concurrency, conditional))
+                mode = "304 (etag)" if conditional else "200 full"
+                print(
+                    f"{name:<20} {mode:<12} {result['rps']:>9.0f} {result['p50_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f}  {result['cache_control']}"
+                )
+
+
+if __name__ == "__main__":
+    main()
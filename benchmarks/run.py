@@ -0,0 +1,372 @@
+""" run.py berisikan benchmark endpoint utama lewat client ASGI in-process, hasilnya disimpan sebagai JSON
+
+Pemakaian (dari root project):
+    python -m benchmarks.run --reseed --wisata 2000 --users 500 --reviews 20000
+    python -m benchmarks.run --requests 1000 --concurrency 20 --compare benchmarks/results/baseline.json
+    python -m benchmarks.run --scenarios published wisata_detail --output hasil.json
+
+Database diisi benchmarks.seed (otomatis kalau file SQLite-nya belum ada, atau pakai --reseed).
+Request dikirim lewat httpx ASGITransport tanpa network, jadi yang diukur kode aplikasi + database.
+Per skenario dicatat req/s dan p50/p90/p99 dari sisi client, latency dari MetricsMiddleware
+(sampai body terakhir terkirim, tanpa background task) dan rata-rata query per request.
+Skenario upload menambah gambar ke wisata draft; --reseed sebelum membandingkan hasil antar commit.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, DRAFT_EVERY, add_seed_arguments, configure_env, row_counts, seed
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+# Metric yang dibandingkan dengan --compare; True = makin besar makin baik
+COMPARED_METRICS = {"rps": True, "p50_ms": False, "p99_ms": False, "queries_per_request": False}
+
+SCENARIOS = (
+    "published",
+    "published_uncached",
+    "published_summary",
+    "published_summary_uncached",
+    "wisata_detail",
+    "wisata_detail_uncached",
+    "login",
+    "profile",
+    "upload",
+)
+
+
+@dataclass
+class Scenario:
+    name: str
+    # request(client, i) -> response
+    request: Callable
+    expected_status: int = 200
+    # Dipanggil sebelum tiap request, misal untuk mengosongkan cache
+    before_request: Optional[Callable[[], None]] = None
+    # Coroutine yang dijalankan sekali sebelum warmup, misal mengisi cache
+    prepare: Optional[Callable] = None
+
+
+@dataclass
+class ServerSamples:
+    """Diisi hook MetricsMiddleware: latency tanpa background task dan jumlah query per request."""
+    seconds: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    db_seconds: List[float] = field(default_factory=list)
+
+    def __call__(self, method, route, status_code, seconds, stats) -> None:
+        self.seconds.append(seconds)
+        self.queries.append(stats.sql_count)
+        self.db_seconds.append(stats.sql_seconds)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int, server: ServerSamples) -> dict:
+    latencies = sorted(latencies)
+    server_seconds = sorted(server.seconds)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "server_p50_ms": round(percentile(server_seconds, 50) * 1000, 3),
+        "server_p99_ms": round(percentile(server_seconds, 99) * 1000, 3),
+        "queries_per_request": round(statistics.fmean(server.queries), 2) if server.queries else 0.0,
+        "db_ms_per_request": round(statistics.fmean(server.db_seconds) * 1000, 3) if server.db_seconds else 0.0,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    from app.core import metrics
+
+    if scenario.prepare:
+        await scenario.prepare(client)
+    for i in range(warmup):
+        if scenario.before_request:
+            scenario.before_request()
+        await scenario.request(client, i)
+
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(range(requests))
+    server = ServerSamples()
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            if scenario.before_request:
+                scenario.before_request()
+            start = time.perf_counter()
+            response = await scenario.request(client, warmup + i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != scenario.expected_status:
+                errors += 1
+
+    remove = metrics.add_request_hook(server)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        remove()
+    return summarize(latencies, elapsed, errors, server)
+
+
+def _jpeg(rng: random.Random) -> bytes:
+    """JPEG kecil dengan isi unik, supaya tiap upload jadi blob baru (bukan dedupe)."""
+    from PIL import Image
+
+    image = Image.new("RGB", (64, 64), tuple(rng.randrange(256) for _ in range(3)))
+    image.putpixel((rng.randrange(64), rng.randrange(64)), tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+async def _ids(status) -> List[int]:
+    import orm_models as m
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal, get_async_engine
+
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        return list(await db.scalars(select(m.Wisata.id_wisata).where(m.Wisata.status == status).order_by(m.Wisata.id_wisata)))
+
+
+async def build_scenarios(client: httpx.AsyncClient, names: List[str], args: argparse.Namespace) -> List[Scenario]:
+    import orm_models as m
+    from app.api.wisata.wisata_service import wisata_cache
+
+    rng = random.Random(args.seed)
+    published = await _ids(m.WisataStatus.published)
+    drafts = await _ids(m.WisataStatus.draft)
+    usernames = [f"bench{i}" for i in range(row_counts()["users"])]
+    if not published or not usernames:
+        raise SystemExit("Database kosong; jalankan dengan --reseed")
+
+    async def published_page(client, i):
+        return await client.get("/wisata/published", params={"limit": args.page_size})
+
+    async def published_summary(client, i):
+        return await client.get("/wisata/published", params={"limit": args.page_size, "view": "summary"})
+
+    # Versi cached memakai sekumpulan kecil id yang sering dibuka; versi uncached acak dari semua wisata
+    hot = rng.sample(published, min(len(published), 20))
+
+    async def wisata_detail(client, i):
+        return await client.get(f"/wisata/{hot[i % len(hot)]}")
+
+    async def open_hot(client):
+        for id_wisata in hot:
+            await client.get(f"/wisata/{id_wisata}")
+
+    async def wisata_detail_uncached(client, i):
+        return await client.get(f"/wisata/{rng.choice(published)}")
+
+    async def login(client, i):
+        return await client.post("/auth/login", data={"username": rng.choice(usernames), "password": BENCH_PASSWORD})
+
+    tokens: List[str] = []
+
+    async def profile(client, i):
+        return await client.get("/user/profile", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+
+    uploads: List[bytes] = []
+
+    async def upload(client, i):
+        # Ke wisata draft saja supaya listing / detail published di run berikutnya tidak berubah
+        files = {"file": (f"bench-{i}.jpg", uploads[i], "image/jpeg")}
+        return await client.post(f"/wisata/{drafts[i % len(drafts)]}/upload-image", files=files)
+
+    scenarios = {
+        "published": Scenario("published", published_page),
+        "published_uncached": Scenario("published_uncached", published_page, before_request=wisata_cache.clear),
+        "published_summary": Scenario("published_summary", published_summary),
+        "published_summary_uncached": Scenario(
+            "published_summary_uncached", published_summary, before_request=wisata_cache.clear
+        ),
+        "wisata_detail": Scenario("wisata_detail", wisata_detail, prepare=open_hot),
+        "wisata_detail_uncached": Scenario("wisata_detail_uncached", wisata_detail_uncached, before_request=wisata_cache.clear),
+        "login": Scenario("login", login),
+        "profile": Scenario("profile", profile),
+        "upload": Scenario("upload", upload),
+    }
+
+    if "profile" in names:
+        # Token diambil sekali di awal; yang diukur verifikasi JWT + load user, bukan bcrypt
+        for username in usernames[:min(len(usernames), 20)]:
+            response = await client.post("/auth/login", data={"username": username, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            tokens.append(response.json()["access_token"])
+    if "upload" in names:
+        if not drafts:
+            raise SystemExit(f"Skenario upload butuh wisata draft (setiap wisata ke-{DRAFT_EVERY} dari seed)")
+        uploads += [_jpeg(rng) for _ in range(args.warmup + args.requests)]
+
+    return [scenarios[name] for name in names]
+
+
+def git_commit() -> Dict[str, Optional[str]]:
+    def git(*cmd: str) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *cmd], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def metadata(args: argparse.Namespace) -> dict:
+    import sqlalchemy
+    import fastapi
+    import pydantic
+    from sqlalchemy.engine import make_url
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"fastapi": fastapi.__version__, "pydantic": pydantic.VERSION, "sqlalchemy": sqlalchemy.__version__},
+        "database": make_url(args.database_url).get_backend_name(),
+        "dataset": row_counts(),
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "page_size": args.page_size,
+            "seed": args.seed,
+            "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import main as app_main
+    from app.api.images import image_service
+    from app.core import database
+    from app.core.storage import LocalStorage, set_storage
+
+    # File upload masuk ke folder sementara, bukan app/static
+    storage_root = tempfile.mkdtemp(prefix="bench-storage-")
+    set_storage(LocalStorage(root=storage_root))
+
+    results = {"meta": metadata(args), "scenarios": {}}
+    transport = httpx.ASGITransport(app=app_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in await build_scenarios(client, args.scenarios, args):
+                result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+                results["scenarios"][scenario.name] = result
+                print_row(scenario.name, result)
+    finally:
+        image_service.shutdown_variant_pool()
+        await database.dispose_engines()
+        shutil.rmtree(storage_root, ignore_errors=True)
+    return results
+
+
+def print_row(name: str, result: dict) -> None:
+    print(
+        f"{name:<24} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} "
+        f"{result['p99_ms']:>9.2f} {result['server_p50_ms']:>9.2f} {result['queries_per_request']:>7.1f} "
+        f"{result['errors']:>6}"
+    )
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Cetak selisih dengan hasil sebelumnya; tanda `!` kalau lebih buruk dari threshold."""
+    base_commit = (baseline.get("meta", {}).get("git", {}).get("commit") or "?")[:12]
+    print(f"\nDibanding {base_commit} (threshold {current['meta']['compare_threshold']:.0%}):")
+    threshold = current["meta"]["compare_threshold"]
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        parts = []
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            parts.append(f"{metric} {old:g} -> {new:g} ({change:+.1%}){' !' if worse > threshold else ''}")
+        print(f"  {name:<24} " + ", ".join(parts))
+
+
+def default_output(meta: dict) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    commit = (meta["git"]["commit"] or "nogit")[:12] + ("-dirty" if meta["git"]["dirty"] else "")
+    return os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser)
+    parser.add_argument("--reseed", action="store_true", help="Isi ulang database sebelum benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Request per skenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--output", help=f"File JSON hasil (default {RESULTS_DIR}/<waktu>-<commit>.json)")
+    parser.add_argument("--compare", help="File JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--compare-threshold", type=float, default=0.1, help="Selisih yang ditandai regresi (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    configure_env(args.database_url)
+    sqlite_path = args.database_url.split(":///", 1)[-1] if args.database_url.startswith("sqlite") else None
+    if args.reseed or (sqlite_path and not os.path.exists(sqlite_path)):
+        print("Mengisi database benchmark...")
+        seed(args)
+
+    print(f"{'scenario':<24} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'srv p50':>9} {'query':>7} {'error':>6}")
+    results = asyncio.run(run(args))
+    results["meta"]["compare_threshold"] = args.compare_threshold
+
+    output = args.output or default_output(results["meta"])
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nHasil disimpan di {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+    if any(result["errors"] for result in results["scenarios"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
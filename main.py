@@ -1,20 +1,44 @@
+from contextlib import asynccontextmanager
+import os
 import orm_models
-from app.core.database import engine
-orm_models.Base.metadata.create_all(bind=engine)
-from sqlalchemy.orm import Session
+from app.core import database
 from fastapi import FastAPI
 from app.api import routers
+from app.api.images import image_service
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from app.core.static_files import CachedStaticFiles
+from app.core.storage import LOCAL_STORAGE_ROOT
+from app.core.metrics import MetricsMiddleware
+
+"""Startup / shutdown"""
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engine dibuat lazy; cek koneksi (dan fallback pooler) lihat database.startup_check_enabled
+    if database.startup_check_enabled():
+        await database.check_connection()
+
+    # Schema dikelola Alembic, create_all cuma buat dev lokal
+    if os.getenv("DB_CREATE_ALL", "false").lower() == "true":
+        async with database.get_async_engine().begin() as conn:
+            await conn.run_sync(orm_models.Base.metadata.create_all)
+
+    yield
+
+    image_service.shutdown_variant_pool()
+    await database.dispose_engines()
 
 """"Inisialisasi aplikasi"""
 app = FastAPI(
     title="Borneo",
     description="Sistem informasi wisata Kaltim",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Sama dengan folder tempat LocalStorage menyimpan file (key "static/..." relatif ke LOCAL_STORAGE_ROOT)
+STATIC_FOLDER = os.path.join(LOCAL_STORAGE_ROOT, "static")
+os.makedirs(STATIC_FOLDER, exist_ok=True)
+app.mount("/static", CachedStaticFiles(directory=STATIC_FOLDER), name="static")
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +48,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paling luar (ditambah terakhir) supaya latency mencakup semua middleware lain
+app.add_middleware(MetricsMiddleware)
+
 """Masukin Router"""
 for r in routers:
     app.include_router(r)
@@ -12,9 +12,14 @@ from sqlalchemy import (
     CheckConstraint,
     UniqueConstraint,
     SmallInteger,
-    Index
+    Index,
+    DDL,
+    event,
+    func,
+    literal_column,
     
 )
+from sqlalchemy.dialects import postgresql  # noqa: F401 (registrasi func.to_tsvector versi Postgres)
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import enum
@@ -36,6 +41,21 @@ class RecommendationLevel(enum.Enum):
     not_recommended = "not_recommended"
     neutral = "neutral"
 
+# Konfigurasi full-text search Postgres (Snowball punya stemmer bahasa Indonesia).
+# Harus sama di index dan di query, jadi jangan diubah tanpa rebuild index.
+SEARCH_CONFIG = "indonesian"
+
+def search_document(nama_wisata, deskripsi, lokasi):
+    """Expression tsvector wisata; harus identik di index dan query supaya index GIN terpakai."""
+    space = literal_column("' '")
+    empty = literal_column("''")
+    return func.to_tsvector(
+        literal_column(f"'{SEARCH_CONFIG}'"),
+        func.coalesce(nama_wisata, empty) + space
+        + func.coalesce(deskripsi, empty) + space
+        + func.coalesce(lokasi, empty),
+    )
+
 class User(Base):
     __tablename__ = "users"
     
@@ -71,6 +91,24 @@ class Wisata(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
+    # Index khusus Postgres: GIN full-text + trigram buat toleransi typo di nama
+    __table_args__ = (
+        Index(
+            "ix_wisata_search",
+            search_document(nama_wisata, deskripsi, lokasi),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_wisata_nama_trgm",
+            nama_wisata,
+            postgresql_using="gin",
+            postgresql_ops={"nama_wisata": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Filter listing published per kategori / range harga
+        Index("ix_wisata_status_category", "status", "category_id", "id_wisata"),
+        Index("ix_wisata_status_price", "status", "ticket_price"),
+    )
+    
     images = relationship(
         "WisataImage", 
         back_populates="wisata", 
@@ -86,6 +124,12 @@ class Wisata(Base):
         back_populates="wisata", 
         cascade="all, delete-orphan" 
     )
+    rating = relationship(
+        "WisataRating",
+        back_populates="wisata",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
     
     tag = relationship("Tag", secondary="wisata_tag", back_populates="wisata")
     facilities = relationship("Facility", secondary="wisata_facilities", back_populates="wisata")
@@ -116,6 +160,11 @@ class WisataTag(Base):
     id_wisata = Column(Integer, ForeignKey(Wisata.id_wisata), nullable=False, primary_key=True)
     id_tag = Column(Integer, ForeignKey(Tag.id_tag), nullable=False, primary_key=True)
     
+    # PK diawali id_wisata, index ini buat arah sebaliknya (cari wisata per tag)
+    __table_args__ = (
+        Index("ix_wisata_tag_tag_wisata", "id_tag", "id_wisata"),
+    )
+    
 class Facility(Base):
     __tablename__ = "facilities"
     
@@ -130,6 +179,24 @@ class WisataFacility(Base):
     id_wisata = Column(Integer, ForeignKey(Wisata.id_wisata), nullable=False, primary_key=True)
     id_facility = Column(Integer, ForeignKey(Facility.id_facility), nullable=False, primary_key=True)
     
+    __table_args__ = (
+        Index("ix_wisata_facilities_facility_wisata", "id_facility", "id_wisata"),
+    )
+    
+class ImageBlob(Base):
+    """
+    Satu file gambar di disk, dikenali dari sha256 isinya. Beberapa WisataImage bisa
+    menunjuk blob yang sama; file baru dihapus saat ref_count-nya habis.
+    """
+    __tablename__ = "image_blobs"
+
+    digest = Column(String(64), primary_key=True)
+    image_url = Column(String, nullable=False)
+    content_type = Column(String(50), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
 class WisataImage(Base):
     __tablename__ = "wisata_images"
     
@@ -137,17 +204,45 @@ class WisataImage(Base):
     id_wisata = Column(Integer, ForeignKey(Wisata.id_wisata), nullable=False)
     image_url = Column(String, nullable=False)
     is_primary = Column(Boolean, default=False,)
+    # NULL untuk gambar lama yang disimpan sebelum content-addressed storage
+    digest = Column(String(64), ForeignKey(ImageBlob.digest), nullable=True, index=True)
     
     __table_args__ = (
         Index(
             "unique_primary_per_wisata",
             "id_wisata",
             unique=True,
-            postgresql_where=(is_primary == True) # Hanya berlaku jika is_primary True
+            postgresql_where=(is_primary == True), # Hanya berlaku jika is_primary True
+            sqlite_where=(is_primary == True),
         ),
+        # Gambar per wisata (selectinload) dan cover: primary dulu, lalu gambar paling lama
+        Index("ix_wisata_images_wisata_cover", "id_wisata", is_primary.desc(), "id_image"),
     )
     
     wisata = relationship("Wisata", back_populates="images")
+    variants = relationship(
+        "WisataImageVariant",
+        back_populates="image",
+        cascade="all, delete-orphan",
+        order_by="WisataImageVariant.width",
+    )
+
+class WisataImageVariant(Base):
+    """Turunan gambar (thumbnail / WebP / AVIF) yang dibuat di background setelah upload."""
+    __tablename__ = "wisata_image_variants"
+
+    id_variant = Column(Integer, primary_key=True, index=True)
+    id_image = Column(Integer, ForeignKey(WisataImage.id_image, ondelete="CASCADE"), nullable=False)
+    image_url = Column(String, nullable=False)
+    format = Column(String(10), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("id_image", "format", "width"),
+    )
+
+    image = relationship("WisataImage", back_populates="variants")
     
 class EditorReview(Base):
     __tablename__ = "editor_reviews"
@@ -161,6 +256,11 @@ class EditorReview(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    # Feed review per wisata, terbaru dulu (lihat keyset_paginate_time_async)
+    __table_args__ = (
+        Index("ix_editor_reviews_wisata_created", "id_wisata", created_at.desc(), id_review.desc()),
+    )
+
     wisata = relationship("Wisata", back_populates="editor_reviews")
     editor = relationship("User", back_populates="editor_reviews")
     
@@ -178,9 +278,75 @@ class UserReview(Base):
     __table_args__ = (
     CheckConstraint("rating BETWEEN 1 AND 5"),
     UniqueConstraint("id_wisata", "id_user"),
+    Index("ix_user_reviews_wisata_created", "id_wisata", created_at.desc(), id_review.desc()),
 )
 
 
     wisata = relationship("Wisata", back_populates="user_reviews")
     user = relationship("User", back_populates="user_reviews")
-    
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+class WisataRating(Base):
+    """
+    Agregat rating user_reviews per wisata, di-update setiap ada review dibuat/diubah/dihapus.
+    Kalau isinya tidak sinkron, bangun ulang dengan `python -m app.api.review.rebuild_ratings`.
+    """
+    __tablename__ = "wisata_ratings"
+
+    id_wisata = Column(Integer, ForeignKey(Wisata.id_wisata, ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5 = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    wisata = relationship("Wisata", back_populates="rating")
+
+    @property
+    def average(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    @property
+    def histogram(self):
+        return {value: getattr(self, f"rating_{value}") for value in RATING_VALUES}
+
+# gin_trgm_ops butuh extension pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Pengganti tsvector di SQLite (dev/test): tabel FTS5 external-content yang diisi trigger dari wisata
+SQLITE_SEARCH_TABLE = "wisata_fts"
+SQLITE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} USING fts5("
+    "nama_wisata, deskripsi, lokasi, content='wisata', content_rowid='id_wisata', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS wisata_fts_ai AFTER INSERT ON wisata BEGIN "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES (new.id_wisata, new.nama_wisata, new.deskripsi, new.lokasi); END",
+    f"CREATE TRIGGER IF NOT EXISTS wisata_fts_ad AFTER DELETE ON wisata BEGIN "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES ('delete', old.id_wisata, old.nama_wisata, old.deskripsi, old.lokasi); END",
+    f"CREATE TRIGGER IF NOT EXISTS wisata_fts_au AFTER UPDATE ON wisata BEGIN "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES ('delete', old.id_wisata, old.nama_wisata, old.deskripsi, old.lokasi); "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, nama_wisata, deskripsi, lokasi) "
+    "VALUES (new.id_wisata, new.nama_wisata, new.deskripsi, new.lokasi); END",
+    # Isi ulang dari baris wisata yang sudah ada
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')",
+)
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Wisata.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Wisata.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SQLITE_SEARCH_TABLE}").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,139 @@
+""" conftest.py berisikan fixture test: database SQLite sementara, TestClient dan data wisata contoh
+
+Postgres opsional: set TEST_POSTGRES_URL (database sekali pakai, semua tabel di-drop) supaya
+test yang butuh tsvector / trigram / row lock ikut jalan; tanpa itu test-nya di-skip.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import time as dt_time
+
+# URL database dan secret dibaca saat module app di-import, jadi env harus siap duluan
+_TMP = tempfile.mkdtemp(prefix="wisata-test-")
+os.environ["DATABASE_TRANSACTION"] = f"sqlite:///{_TMP}/test.sqlite"
+os.environ.pop("DATABASE_SESSION", None)
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["ALGORITHM"] = "HS256"
+os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "30"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["LOCAL_STORAGE_ROOT"] = f"{_TMP}/storage"
+os.environ["STORAGE_BACKEND"] = "local"
+
+import asyncio  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import orm_models as m  # noqa: E402
+from app.core import database  # noqa: E402
+from app.core.auth import create_access_token, principal_cache  # noqa: E402
+from app.api.wisata.wisata_service import wisata_cache  # noqa: E402
+
+pytest_plugins = ["app.core.pytest_query_budget", "pytester"]
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    asyncio.run(database.dispose_engines())
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def db_schema():
+    """Setiap test mulai dari database kosong dan cache kosong."""
+    engine = database.get_engine()
+    m.Base.metadata.drop_all(engine)
+    m.Base.metadata.create_all(engine)
+    wisata_cache.clear()
+    principal_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    with database.SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    from main import app
+
+    return TestClient(app)
+
+
+def _add_wisata(db, count: int, images: int = 2, status=m.WisataStatus.published) -> list:
+    """Wisata contoh lengkap dengan kategori, tag, fasilitas dan gambar. Return list id_wisata."""
+    category = db.query(m.Category).first() or m.Category(name="Pantai")
+    tags = db.query(m.Tag).all() or [m.Tag(name=f"tag-{i}") for i in range(3)]
+    facilities = db.query(m.Facility).all() or [m.Facility(name=f"fasilitas-{i}") for i in range(3)]
+
+    wisata = []
+    for i in range(count):
+        item = m.Wisata(
+            nama_wisata=f"Wisata {i}",
+            deskripsi=f"Deskripsi wisata {i}",
+            lokasi="Samarinda, Kalimantan Timur",
+            ticket_price=10000,
+            open_time=dt_time(8),
+            close_time=dt_time(17),
+            category=category,
+            status=status,
+            tag=tags[:2],
+            facilities=facilities[:2],
+            images=[
+                m.WisataImage(image_url=f"static/images/wisata/test/{i}-{n}.jpg", is_primary=n == 0)
+                for n in range(images)
+            ],
+        )
+        wisata.append(item)
+    db.add_all(wisata)
+    db.commit()
+    return [item.id_wisata for item in wisata]
+
+
+def _add_user(db, username: str, role=m.UserRole.user) -> m.User:
+    user = m.User(
+        name=username,
+        username=username,
+        email=f"{username}@example.com",
+        password="tidak-dipakai",
+        role=role,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _auth_headers(user: m.User) -> dict:
+    token = create_access_token(str(user.id_user), {"username": user.username, "role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def add_wisata(db):
+    return lambda count, **kwargs: _add_wisata(db, count, **kwargs)
+
+
+@pytest.fixture
+def add_user(db):
+    return lambda username, **kwargs: _add_user(db, username, **kwargs)
+
+
+@pytest.fixture
+def auth_headers():
+    return _auth_headers
+
+
+@pytest.fixture
+def pg_url():
+    """Database Postgres sekali pakai dari TEST_POSTGRES_URL, skema dibuat ulang setiap test."""
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL tidak di-set")
+    engine = database.create_db_engine(TEST_POSTGRES_URL)
+    m.Base.metadata.drop_all(engine)
+    m.Base.metadata.create_all(engine)
+    engine.dispose()
+    return TEST_POSTGRES_URL
@@ -0,0 +1,20 @@
+import pytest
+
+from app.core import database
+
+
+@pytest.mark.parametrize("env, transaction, session, expected", [
+    (None, "postgresql://t", "postgresql://s", True),
+    (None, "postgresql://t", None, False),
+    ("false", "postgresql://t", "postgresql://s", False),
+    ("true", "postgresql://t", None, True),
+])
+def test_startup_check_default_keeps_pooler_fallback(monkeypatch, env, transaction, session, expected):
+    if env is None:
+        monkeypatch.delenv("DB_STARTUP_CHECK", raising=False)
+    else:
+        monkeypatch.setenv("DB_STARTUP_CHECK", env)
+    monkeypatch.setattr(database, "DATABASE_TRANSACTION", transaction)
+    monkeypatch.setattr(database, "DATABASE_SESSION", session)
+
+    assert database.startup_check_enabled() is expected
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+from app.api.metrics import metrics_router
+from app.core import metrics
+
+# Satu baris sample format teks Prometheus 0.0.4: nama{label="..."} nilai
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? -?[0-9.e+Inf-]+$')
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "rahasia")
+    return {"Authorization": "Bearer rahasia"}
+
+
+def test_metrics_denied_without_token_config(client):
+    assert client.get("/metrics").status_code == 403
+
+
+def test_metrics_public_opt_in(client, monkeypatch):
+    monkeypatch.setattr(metrics_router, "METRICS_PUBLIC", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_token_guard(client, metrics_token):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer salah"}).status_code == 401
+    assert client.get("/metrics", headers=metrics_token).status_code == 200
+
+
+def test_metrics_prometheus_format(client, add_wisata, metrics_token):
+    metrics.registry.reset()
+    add_wisata(2)
+    ids = client.get("/wisata/published").json()["items"]
+    client.get(f"/wisata/{ids[0]['id_wisata']}")
+
+    response = client.get("/metrics", headers=metrics_token)
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    lines = response.text.splitlines()
+
+    for line in lines:
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE_LINE.match(line), line
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    # Label route pakai template path, bukan id asli
+    assert 'http_requests_total{method="GET",route="/wisata/{id_wisata}",status="200"} 1' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/wisata/published",le="+Inf"} 1' in lines
+    assert any(line.startswith('cache_misses_total{cache="wisata"}') for line in lines)
+    assert any(line.startswith('db_pool_size{engine="async"}') for line in lines)
+
+
+def test_server_timing_header(client, add_wisata, monkeypatch):
+    add_wisata(1)
+    response = client.get("/wisata/published")
+
+    timing = response.headers["server-timing"]
+    assert re.fullmatch(r'db;dur=[0-9.]+;desc="8 queries", app;dur=[0-9.]+, total;dur=[0-9.]+', timing)
+    assert response.headers["timing-allow-origin"] == "*"
+
+    monkeypatch.setattr(metrics, "SERVER_TIMING_ENABLED", False)
+    assert "server-timing" not in client.get("/wisata/published").headers
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import query_debug
+
+BUDGET_TESTS = '''
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.core.query_debug import install_query_debug
+
+engine = create_engine("sqlite://")
+instrument_engine(engine)
+install_query_debug(engine)
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/items")
+def items(n: int):
+    with engine.connect() as conn:
+        for i in range(n):
+            conn.execute(text(f"SELECT {i}"))
+    return {}
+
+
+@pytest.mark.query_budget(2)
+def test_within_budget():
+    TestClient(app).get("/items", params={"n": 2})
+
+
+@pytest.mark.query_budget(2)
+def test_over_budget():
+    TestClient(app).get("/items", params={"n": 3})
+
+
+@pytest.mark.query_budget(10, n_plus_one=True)
+def test_repeated_select():
+    TestClient(app).get("/items", params={"n": 6})
+
+
+def test_default_budget_from_option():
+    TestClient(app).get("/items", params={"n": 4})
+'''
+
+
+def test_query_budget_plugin_fails_tests_over_budget(pytester):
+    pytester.makepyfile(test_budget=BUDGET_TESTS)
+
+    result = pytester.runpytest("-p", "app.core.pytest_query_budget", "--query-budget", "3")
+
+    result.assert_outcomes(passed=1, failed=3)
+    result.stdout.fnmatch_lines([
+        "*melebihi budget 2: GET /items: 3 query*",
+        "*kemungkinan N+1: GET /items: 6 query*",
+        "*melebihi budget 3: GET /items: 4 query*",
+    ])
+
+
+def test_explain_failure_is_reported_on_sqlite():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        assert "SCAN" in query_debug._explain(conn, "SELECT * FROM t WHERE id > ?", (1,))
+        # Jumlah parameter salah
+        assert query_debug._explain(conn, "SELECT * FROM t WHERE id > ?", ()).startswith("(EXPLAIN gagal")
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+
+
+def test_explain_failure_keeps_pg_transaction_usable(pg_url):
+    from app.core import database
+
+    engine = database.create_db_engine(pg_url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+            # EXPLAIN gagal (di sini tabelnya tidak ada): tanpa SAVEPOINT transaksi request jadi aborted
+            assert query_debug._explain(conn, "SELECT * FROM tabel_tidak_ada", ()).startswith("(EXPLAIN gagal")
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+    finally:
+        engine.dispose()
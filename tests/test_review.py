@@ -0,0 +1,255 @@
+import asyncio
+import base64
+from datetime import datetime, time, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import orm_models as m
+from app.core import database
+from app.core.auth import TokenData
+from app.api.review import review_service
+from app.schema.review.review_schema import UserReviewCreate, UserReviewUpdate
+
+
+def rating_row(db, id_wisata):
+    db.expire_all()
+    return db.get(m.WisataRating, id_wisata)
+
+
+def test_create_then_update_review(client, db, add_wisata, add_user, auth_headers):
+    (id_wisata,) = add_wisata(1)
+    headers = auth_headers(add_user("budi"))
+
+    created = client.post("/review/", json={"id_wisata": id_wisata, "rating": 5}, headers=headers)
+    assert created.status_code == 201
+
+    updated = client.post("/review/", json={"id_wisata": id_wisata, "rating": 2, "comment": "ramai"}, headers=headers)
+    assert updated.status_code == 200
+    assert updated.json()["id_review"] == created.json()["id_review"]
+
+    rating = rating_row(db, id_wisata)
+    assert (rating.review_count, rating.rating_sum, rating.rating_5, rating.rating_2) == (1, 2, 0, 1)
+
+
+def test_sqlite_double_submit_counts_once(client, db, add_wisata, add_user, auth_headers):
+    # Jalur upsert SQLite (SELECT rating lama lalu upsert) selalu teruji tanpa Postgres
+    assert db.bind.dialect.name == "sqlite"
+    (id_wisata,) = add_wisata(1)
+    headers = auth_headers(add_user("budi"))
+    payload = {"id_wisata": id_wisata, "rating": 4, "comment": "bagus"}
+
+    first = client.post("/review/", json=payload, headers=headers)
+    second = client.post("/review/", json=payload, headers=headers)
+    assert (first.status_code, second.status_code) == (201, 200)
+    assert second.json()["id_review"] == first.json()["id_review"]
+
+    db.expire_all()
+    assert len(db.scalars(select(m.UserReview).where(m.UserReview.id_wisata == id_wisata)).all()) == 1
+    rating = rating_row(db, id_wisata)
+    assert (rating.review_count, rating.rating_sum, rating.rating_4) == (1, 4, 1)
+
+
+def test_review_unknown_wisata_is_404(client, add_user, auth_headers):
+    response = client.post("/review/", json={"id_wisata": 999, "rating": 4}, headers=auth_headers(add_user("budi")))
+    assert response.status_code == 404
+
+
+def test_review_from_deleted_user_is_not_404(add_wisata):
+    (id_wisata,) = add_wisata(1)
+
+    async def run():
+        database.get_async_engine()
+        async with database.AsyncSessionLocal() as db:
+            await review_service.create_user_review(db, UserReviewCreate(id_wisata=id_wisata, rating=4), id_user=999)
+
+    # Foreign key user yang gagal bukan "wisata tidak ditemukan"
+    with pytest.raises(IntegrityError):
+        asyncio.run(run())
+
+
+def test_pg_concurrent_upserts_keep_aggregate_consistent(pg_url):
+    engine = database.create_db_engine(pg_url)
+    with Session(engine) as db:
+        wisata = m.Wisata(
+            nama_wisata="Pantai Manggar",
+            deskripsi="Pantai",
+            lokasi="Balikpapan",
+            open_time=time(8),
+            close_time=time(17),
+            category=m.Category(name="Pantai"),
+            status=m.WisataStatus.published,
+        )
+        users = [m.User(name=f"u{i}", username=f"u{i}", email=f"u{i}@example.com", password="x") for i in range(3)]
+        db.add_all([wisata, *users])
+        db.commit()
+        id_wisata, user_ids = wisata.id_wisata, [u.id_user for u in users]
+
+    async def upsert(async_engine, id_user, rating):
+        async with database.AsyncSessionLocal(bind=async_engine) as db:
+            _, created = await review_service.create_user_review(
+                db, UserReviewCreate(id_wisata=id_wisata, rating=rating), id_user=id_user
+            )
+            return created
+
+    async def run():
+        async_engine = database.create_async_db_engine(pg_url)
+        try:
+            # Satu user mengirim banyak upsert sekaligus, ditambah dua user lain
+            jobs = [upsert(async_engine, user_ids[0], 1 + i % 5) for i in range(20)]
+            jobs += [upsert(async_engine, id_user, 3) for id_user in user_ids[1:]]
+            return await asyncio.gather(*jobs)
+        finally:
+            await async_engine.dispose()
+
+    created = asyncio.run(run())
+
+    with Session(engine) as db:
+        reviews = db.scalars(select(m.UserReview).where(m.UserReview.id_wisata == id_wisata)).all()
+        rating = db.get(m.WisataRating, id_wisata)
+        assert len(reviews) == 3
+        assert created.count(True) == 3
+        assert rating.review_count == 3
+        assert rating.rating_sum == sum(r.rating for r in reviews)
+        assert sum(rating.histogram.values()) == 3
+    engine.dispose()
+
+
+def _add_review(db, id_wisata, user, rating):
+    review = m.UserReview(id_wisata=id_wisata, id_user=user.id_user, rating=rating)
+    db.add(review)
+    db.commit()
+    db.add(m.WisataRating(id_wisata=id_wisata, review_count=1, rating_sum=rating, **{f"rating_{rating}": 1}))
+    db.commit()
+    return review.id_review
+
+
+def _run_concurrently(*jobs):
+    async def run():
+        database.get_async_engine()
+
+        async def in_session(job):
+            async with database.AsyncSessionLocal() as session:
+                try:
+                    return await job(session)
+                except HTTPException as e:
+                    return e.status_code
+
+        return await asyncio.gather(*(in_session(job) for job in jobs))
+
+    return asyncio.run(run())
+
+
+def test_concurrent_review_updates_keep_aggregate_consistent(db, add_wisata, add_user):
+    (id_wisata,) = add_wisata(1)
+    user = add_user("budi")
+    id_review = _add_review(db, id_wisata, user, 3)
+    principal = TokenData(id_user=user.id_user, role=user.role)
+
+    _run_concurrently(*(
+        lambda session, rating=rating: review_service.update_user_review(
+            session, id_review, UserReviewUpdate(rating=rating), principal
+        )
+        for rating in (4, 5)
+    ))
+
+    rating = rating_row(db, id_wisata)
+    final = db.get(m.UserReview, id_review).rating
+    assert (rating.review_count, rating.rating_sum) == (1, final)
+    assert rating.histogram == {value: int(value == final) for value in m.RATING_VALUES}
+
+
+def test_concurrent_review_deletes_decrement_once(db, add_wisata, add_user):
+    (id_wisata,) = add_wisata(1)
+    user = add_user("budi")
+    id_review = _add_review(db, id_wisata, user, 4)
+    principal = TokenData(id_user=user.id_user, role=user.role)
+
+    results = _run_concurrently(*(
+        lambda session: review_service.delete_user_review(session, id_review, principal) for _ in range(2)
+    ))
+
+    assert results.count(404) == 1
+    rating = rating_row(db, id_wisata)
+    assert (rating.review_count, rating.rating_sum, rating.rating_4) == (0, 0, 0)
+
+
+def test_update_review_clears_comment(client, db, add_wisata, add_user, auth_headers):
+    (id_wisata,) = add_wisata(1)
+    headers = auth_headers(add_user("budi"))
+    created = client.post("/review/", json={"id_wisata": id_wisata, "rating": 4, "comment": "bagus"}, headers=headers)
+    id_review = created.json()["id_review"]
+
+    response = client.patch(f"/review/{id_review}", json={"comment": None}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["comment"] is None
+    assert response.json()["rating"] == 4
+
+    assert client.patch(f"/review/{id_review}", json={"rating": None}, headers=headers).status_code == 422
+
+
+def _feed(client, url, limit):
+    """Semua halaman feed lewat next_cursor; return (id per halaman)."""
+    pages, after = [], None
+    while True:
+        params = {"limit": limit, **({"after": after} if after else {})}
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        pages.append([item["id_review"] for item in body["items"]])
+        after = body["next_cursor"]
+        if after is None:
+            return pages
+
+
+def test_user_review_feed_cursor_round_trip_with_ties(client, db, add_wisata, add_user):
+    (id_wisata, other) = add_wisata(2)
+    same_time = datetime(2026, 5, 1, 10, 0)
+    reviews = []
+    for i in range(7):
+        user = add_user(f"user{i}")
+        # Lima review dengan created_at sama persis, dua lebih baru
+        created_at = same_time + timedelta(minutes=i - 4) if i >= 5 else same_time
+        reviews.append(m.UserReview(id_wisata=id_wisata, id_user=user.id_user, rating=4, created_at=created_at))
+    reviews.append(m.UserReview(id_wisata=other, id_user=user.id_user, rating=1))
+    db.add_all(reviews)
+    db.commit()
+
+    pages = _feed(client, f"/review/wisata/{id_wisata}", limit=2)
+
+    expected = [r.id_review for r in sorted(reviews[:7], key=lambda r: (r.created_at, r.id_review), reverse=True)]
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert sum(pages, []) == expected
+
+
+def test_editor_review_feed_cursor_round_trip(client, db, add_wisata, add_user):
+    (id_wisata,) = add_wisata(1)
+    editor = add_user("editor", role=m.UserRole.editor)
+    same_time = datetime(2026, 5, 1, 10, 0)
+    reviews = [
+        m.EditorReview(
+            id_wisata=id_wisata, id_editor=editor.id_user, title=f"Ulasan {i}", content="Isi",
+            recommendation_level=m.RecommendationLevel.recommended, created_at=same_time,
+        )
+        for i in range(3)
+    ]
+    db.add_all(reviews)
+    db.commit()
+
+    pages = _feed(client, f"/review/wisata/{id_wisata}/editor", limit=2)
+    assert pages == [[reviews[2].id_review, reviews[1].id_review], [reviews[0].id_review]]
+
+
+@pytest.mark.parametrize("cursor", [
+    "bukan-cursor",
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b'["bukan tanggal", 1]').decode(),
+    base64.urlsafe_b64encode(b'["2026-05-01T10:00:00"]').decode(),
+])
+def test_review_feed_rejects_malformed_cursor(client, add_wisata, cursor):
+    (id_wisata,) = add_wisata(1)
+    response = client.get(f"/review/wisata/{id_wisata}", params={"after": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.core.static_files import CachedStaticFiles, static_cache
+from app.core.storage import LocalStorage
+
+DIGEST = "ab" * 32
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    static_cache.clear()
+    yield tmp_path
+    static_cache.clear()
+
+
+def _client(directory) -> TestClient:
+    return TestClient(Starlette(routes=[Mount("/static", CachedStaticFiles(directory=directory))]))
+
+
+def test_cached_file_deleted_elsewhere_returns_404(static_dir):
+    path = static_dir / f"{DIGEST}.jpg"
+    path.write_bytes(b"isi")
+    client = _client(static_dir)
+
+    first = client.get(f"/static/{DIGEST}.jpg")
+    assert first.status_code == 200
+    assert first.headers["etag"] == f'"{DIGEST}"'
+    assert static_cache.get(f"{DIGEST}.jpg") is not None
+
+    # Dihapus worker lain: entry cache di worker ini masih ada
+    os.unlink(path)
+    assert client.get(f"/static/{DIGEST}.jpg").status_code == 404
+    assert static_cache.get(f"{DIGEST}.jpg") is None
+
+
+def test_staging_folder_is_not_served(tmp_path):
+    storage = LocalStorage(root=str(tmp_path))
+    static_root = os.path.join(str(tmp_path), "static")
+
+    assert os.path.commonpath([storage.staging_folder, static_root]) != static_root
@@ -0,0 +1,74 @@
+import asyncio
+
+import orm_models as m
+from app.core.auth import TokenData, get_current_principal, invalidate_principal, principal_cache
+
+
+def login(client, username, password):
+    return client.post("/auth/login", data={"username": username, "password": password})
+
+
+def test_register_then_login(client):
+    response = client.post("/user/register", json={
+        "name": "Budi", "username": "budi", "email": "budi@example.com", "password": "rahasia123",
+    })
+    assert response.status_code == 200
+    assert response.json()["role"] == "user"
+
+    assert login(client, "budi", "rahasia123").status_code == 200
+    assert login(client, "budi", "salah12345").status_code == 401
+
+
+def test_register_duplicate_username(client, add_user):
+    add_user("budi")
+    response = client.post("/user/register", json={
+        "name": "Budi", "username": "budi", "email": "lain@example.com", "password": "rahasia123",
+    })
+    assert response.status_code == 400
+
+
+def test_update_me_password(client):
+    client.post("/user/register", json={
+        "name": "Sari", "username": "sari", "email": "sari@example.com", "password": "rahasia123",
+    })
+    token = login(client, "sari", "rahasia123").json()["access_token"]
+
+    response = client.patch(
+        "/user/update-me", json={"password": "rahasia456"}, headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert login(client, "sari", "rahasia456").status_code == 200
+
+
+def test_update_user_email_taken(client, add_user):
+    add_user("andi")
+    other = add_user("sari")
+    response = client.patch(f"/user/{other.id_user}", json={"email": "andi@example.com"})
+    assert response.status_code == 400
+
+
+def test_role_change_and_delete_invalidate_cached_role(client, add_user, auth_headers):
+    editor = add_user("editor", role=m.UserRole.editor)
+    headers = auth_headers(editor)
+    assert client.get("/wisata/", headers=headers).status_code == 200
+    assert principal_cache.get(editor.id_user) == m.UserRole.editor
+
+    # Token lama masih bilang editor, tapi role diambil dari cache yang sudah di-invalidate
+    assert client.patch(f"/user/{editor.id_user}", json={"role": "user"}).status_code == 200
+    assert client.get("/wisata/", headers=headers).status_code == 403
+
+    assert client.delete(f"/user/{editor.id_user}").status_code == 200
+    assert client.get("/wisata/", headers=headers).status_code == 404
+
+
+def test_role_changed_during_lookup_is_not_cached():
+    class ChangedWhileReading:
+        async def scalar(self, stmt):
+            # Role diubah (dan cache di-invalidate) saat query role masih jalan
+            invalidate_principal(7)
+            return m.UserRole.admin
+
+    principal = asyncio.run(get_current_principal(TokenData(id_user=7, role=m.UserRole.user), ChangedWhileReading()))
+
+    assert principal.role == m.UserRole.admin
+    assert principal_cache.get(7) is None
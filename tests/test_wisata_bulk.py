@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from sqlalchemy import select, text
+
+import orm_models as m
+from app.api.wisata import wisata_bulk
+
+
+@pytest.fixture
+def editor(add_user, auth_headers):
+    return auth_headers(add_user("editor", role=m.UserRole.editor))
+
+
+@pytest.fixture
+def names(db):
+    """Kategori, tag dan fasilitas yang dirujuk pakai nama di file import."""
+    db.add_all([m.Category(name="Pantai"), m.Tag(name="Keluarga"), m.Tag(name="Sunset"), m.Facility(name="Parkir")])
+    db.commit()
+
+
+def _row(nama, **extra):
+    row = {
+        "nama_wisata": nama,
+        "deskripsi": f"Deskripsi {nama}",
+        "lokasi": "Balikpapan",
+        "ticket_price": 5000,
+        "open_time": "08:00",
+        "close_time": "17:00",
+        "category": "Pantai",
+    }
+    row.update(extra)
+    return row
+
+
+def _import(client, headers, body, content_type):
+    response = client.post("/wisata/bulk", content=body, headers={**headers, "Content-Type": content_type})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _imported(db):
+    db.expire_all()
+    return {
+        w.nama_wisata: w
+        for w in db.scalars(select(m.Wisata).order_by(m.Wisata.id_wisata))
+    }
+
+
+def test_import_ndjson(client, db, names, editor):
+    body = "\n".join([
+        json.dumps(_row("Manggar", tags=["keluarga", "Sunset"], facilities=["parkir"], status="published")),
+        "",
+        "{bukan json",
+        json.dumps(_row("Lamaru", category="Gunung")),
+        json.dumps(_row("Kemala", ticket_price=None)),
+    ]).encode()
+
+    result = _import(client, editor, body, "application/x-ndjson")
+
+    assert (result["created"], result["failed"]) == (2, 2)
+    assert [e["line"] for e in result["errors"]] == [3, 4]
+    assert "Kategori tidak ditemukan" in result["errors"][1]["error"]
+
+    wisata = _imported(db)
+    assert sorted(wisata) == ["Kemala", "Manggar"]
+    assert sorted(t.name for t in wisata["Manggar"].tag) == ["Keluarga", "Sunset"]
+    assert [f.name for f in wisata["Manggar"].facilities] == ["Parkir"]
+    assert wisata["Manggar"].status == m.WisataStatus.published
+    assert wisata["Kemala"].ticket_price is None
+
+
+def test_import_csv_with_multiline_field(client, db, names, editor):
+    body = (
+        # Diawali BOM seperti CSV dari Excel
+        "\ufeffnama_wisata,deskripsi,lokasi,ticket_price,open_time,close_time,category,tags,facilities\r\n"
+        'Manggar,"Pantai pasir putih,\r\nramai saat sore",Balikpapan,,08:00,17:00,Pantai,Keluarga|Sunset,Parkir\r\n'
+        "Kolom,kurang\r\n"
+        "Lamaru,Pantai,Balikpapan,10000,07:00,18:00,pantai,,\r\n"
+    ).encode()
+
+    result = _import(client, editor, body, "text/csv; charset=utf-8")
+
+    assert (result["created"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["line"] == 4
+    wisata = _imported(db)
+    assert wisata["Manggar"].deskripsi == "Pantai pasir putih,\nramai saat sore"
+    assert wisata["Manggar"].ticket_price is None
+    assert sorted(t.name for t in wisata["Manggar"].tag) == ["Keluarga", "Sunset"]
+    assert wisata["Lamaru"].tag == []
+
+
+def test_import_bad_row_in_batch_falls_back_per_row(client, db, names, editor, monkeypatch):
+    monkeypatch.setattr(wisata_bulk, "BULK_BATCH_SIZE", 3)
+    # Lolos validasi tapi ditolak database, di tengah batch pertama
+    db.execute(text(
+        "CREATE TRIGGER tolak_rusak BEFORE INSERT ON wisata WHEN NEW.nama_wisata = 'Rusak' "
+        "BEGIN SELECT RAISE(ABORT, 'baris rusak'); END"
+    ))
+    db.commit()
+    body = "\n".join(
+        json.dumps(_row(nama, tags=["Keluarga"])) for nama in ("A", "Rusak", "B", "C", "D")
+    ).encode()
+
+    result = _import(client, editor, body, "application/x-ndjson")
+
+    assert (result["created"], result["failed"]) == (4, 1)
+    assert result["errors"] == [{"line": 2, "error": "baris rusak"}]
+    wisata = _imported(db)
+    assert list(wisata) == ["A", "B", "C", "D"]
+    # Link tag ikut masuk untuk baris yang diulang satu per satu
+    assert all([t.name for t in w.tag] == ["Keluarga"] for w in wisata.values())
+
+
+def test_import_unsupported_content_type(client, names, editor):
+    response = client.post("/wisata/bulk", content=b"x", headers={**editor, "Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_export_keeps_order_across_batches(client, add_wisata, editor, monkeypatch):
+    monkeypatch.setattr(wisata_bulk, "EXPORT_BATCH_SIZE", 2)
+    published = add_wisata(3)
+    draft = add_wisata(1, status=m.WisataStatus.draft)
+    published += add_wisata(2)
+
+    response = client.get("/wisata/export", headers=editor)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    # Batch 2 baris: tidak ada yang terlewat atau terulang di batas batch
+    assert [row["id_wisata"] for row in rows] == sorted(published + draft)
+    assert rows[0]["tags"] == ["tag-0", "tag-1"]
+    assert rows[0]["facilities"] == ["fasilitas-0", "fasilitas-1"]
+
+    only_published = client.get("/wisata/export", params={"status": "published"}, headers=editor)
+    assert [json.loads(line)["id_wisata"] for line in only_published.text.splitlines()] == published
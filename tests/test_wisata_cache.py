@@ -0,0 +1,40 @@
+from app.core.cache import TTLCache
+from app.api.wisata import wisata_service
+
+
+def test_set_skipped_after_invalidate():
+    cache = TTLCache()
+    generation = cache.generation
+    cache.invalidate_prefix("published")
+
+    assert cache.set(("published", 1), "lama", generation=generation) is False
+    assert cache.get(("published", 1)) is None
+    assert cache.set(("published", 1), "baru", generation=cache.generation) is True
+
+
+def test_invalidate_during_load_is_not_cached(client, add_wisata, monkeypatch):
+    ids = add_wisata(3)
+    load = wisata_service.get_wisata_by_id
+
+    async def load_then_write(db, id_wisata, reload=False):
+        wisata = await load(db, id_wisata, reload)
+        # Writer commit + invalidate saat reader masih membangun response
+        wisata_service.invalidate_wisata_cache(id_wisata)
+        return wisata
+
+    monkeypatch.setattr(wisata_service, "get_wisata_by_id", load_then_write)
+    assert client.get(f"/wisata/{ids[0]}").status_code == 200
+    assert wisata_service.wisata_cache.get(("wisata", ids[0], None)) is None
+
+
+def test_tag_rename_invalidates_listing_and_detail(client, add_wisata):
+    ids = add_wisata(2)
+    detail = client.get(f"/wisata/{ids[0]}").json()
+    client.get("/wisata/published")
+    id_tag = client.get("/tag/").json()["items"][0]["id_tag"]
+
+    assert client.patch(f"/tag/{id_tag}", json={"name": "pantai-baru"}).status_code == 200
+
+    assert "pantai-baru" not in detail["tag"]
+    assert "pantai-baru" in client.get(f"/wisata/{ids[0]}").json()["tag"]
+    assert "pantai-baru" in client.get("/wisata/published").json()["items"][0]["tag"]
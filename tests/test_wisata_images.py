@@ -0,0 +1,245 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import event, select
+
+import orm_models as m
+from app.api.images import image_service
+from app.api.wisata import wisata_service
+from app.core import database
+from app.core.storage import LocalStorage, get_storage, set_storage
+
+# Diambil sebelum fixture no_variants menggantinya
+generate_image_variants = wisata_service.generate_image_variants
+
+# Cukup magic bytes PNG; isi gambarnya tidak dibaca karena turunan gambar dimatikan
+PNG = b"\x89PNG\r\n\x1a\n" + b"isi-gambar" * 10
+
+
+@pytest.fixture(autouse=True)
+def no_variants(monkeypatch):
+    async def skip(id_image):
+        return None
+
+    monkeypatch.setattr(wisata_service, "generate_image_variants", skip)
+
+
+def _upload(client, id_wisata, content=PNG):
+    response = client.post(f"/wisata/{id_wisata}/upload-image", files={"file": ("a.png", content, "image/png")})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _blob(db, digest):
+    db.expire_all()
+    return db.get(m.ImageBlob, digest)
+
+
+def test_shared_blob_kept_until_last_image_deleted(client, db, add_wisata):
+    ids = add_wisata(2, images=0)
+    first = _upload(client, ids[0])
+    second = _upload(client, ids[1])
+    image = db.get(m.WisataImage, first["id_image"])
+    digest, key = image.digest, image.image_url
+    path = get_storage().path(key)
+
+    assert second["image_url"] == first["image_url"]
+    assert _blob(db, digest).ref_count == 2
+
+    assert client.delete(f"/wisata/image/{first['id_image']}").status_code == 200
+    assert _blob(db, digest).ref_count == 1
+    assert os.path.exists(path)
+
+    assert client.delete(f"/wisata/image/{second['id_image']}").status_code == 200
+    assert _blob(db, digest) is None
+    assert not os.path.exists(path)
+
+
+def test_blob_revived_before_delete_keeps_file(client, db, add_wisata):
+    ids = add_wisata(1, images=0)
+    uploaded = _upload(client, ids[0])
+    digest = db.get(m.WisataImage, uploaded["id_image"]).digest
+    path = get_storage().path(db.get(m.ImageBlob, digest).image_url)
+    engine = database.get_async_engine().sync_engine
+
+    def upload_in_between(conn, cursor, statement, parameters, context, executemany):
+        # Upload file yang sama menaikkan ref_count setelah dikurangi, sebelum blob-nya dihapus
+        if statement.startswith("DELETE FROM image_blobs"):
+            cursor.execute("UPDATE image_blobs SET ref_count = ref_count + 1")
+
+    event.listen(engine, "before_cursor_execute", upload_in_between)
+    try:
+        assert client.delete(f"/wisata/image/{uploaded['id_image']}").status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", upload_in_between)
+
+    assert _blob(db, digest).ref_count == 1
+    assert os.path.exists(path)
+
+
+def test_reupload_after_delete_commit_keeps_file(client, db, add_wisata, monkeypatch):
+    ids = add_wisata(1, images=0)
+    uploaded = _upload(client, ids[0])
+    blob = db.get(m.ImageBlob, db.get(m.WisataImage, uploaded["id_image"]).digest)
+    digest, url, path = blob.digest, blob.image_url, get_storage().path(blob.image_url)
+    remove_released = wisata_service._remove_released
+
+    async def reupload_then_remove(session, released):
+        # Isi yang sama di-upload ulang setelah delete commit, sebelum file lamanya dihapus
+        session.add(m.ImageBlob(digest=digest, image_url=url, content_type="image/png", size=len(PNG), ref_count=1))
+        await session.commit()
+        await remove_released(session, released)
+
+    monkeypatch.setattr(wisata_service, "_remove_released", reupload_then_remove)
+    assert client.delete(f"/wisata/image/{uploaded['id_image']}").status_code == 200
+
+    assert _blob(db, digest).ref_count == 1
+    assert os.path.exists(path)
+
+
+def test_publish_overwrites_existing_file(tmp_path):
+    storage = LocalStorage(root=str(tmp_path))
+    key = "static/images/blobs/ab/ab.png"
+    os.makedirs(os.path.dirname(storage.path(key)))
+    with open(storage.path(key), "wb") as f:
+        f.write(b"sisa")
+    source = tmp_path / "upload.part"
+    source.write_bytes(PNG)
+
+    asyncio.run(storage.put_file(str(source), key, "image/png", immutable=True))
+
+    with open(storage.path(key), "rb") as f:
+        assert f.read() == PNG
+    assert not source.exists()
+
+
+def _staged_files():
+    folder = get_storage().staging_folder
+    return os.listdir(folder) if os.path.isdir(folder) else []
+
+
+def test_upload_over_size_limit_is_413(client, add_wisata, monkeypatch):
+    ids = add_wisata(1, images=0)
+    monkeypatch.setattr(image_service, "MAX_UPLOAD_SIZE", 64)
+
+    response = client.post(f"/wisata/{ids[0]}/upload-image", files={"file": ("a.png", PNG, "image/png")})
+    assert response.status_code == 413
+    assert _staged_files() == []
+
+
+def test_streamed_upload_over_size_limit_removes_staged_file(monkeypatch):
+    # Ukuran tidak diketahui di awal (client tidak mengirim Content-Length per part)
+    monkeypatch.setattr(image_service, "MAX_UPLOAD_SIZE", 64)
+    monkeypatch.setattr(image_service, "UPLOAD_CHUNK_SIZE", 16)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(image_service.save_image_upload(UploadFile(io.BytesIO(PNG))))
+    assert error.value.status_code == 413
+    assert _staged_files() == []
+
+
+def test_upload_type_comes_from_magic_bytes(client, add_wisata):
+    ids = add_wisata(1, images=0)
+
+    # Mengaku PNG tapi isinya teks
+    fake = client.post(f"/wisata/{ids[0]}/upload-image", files={"file": ("a.png", b"bukan gambar", "image/png")})
+    assert fake.status_code == 400
+    assert _staged_files() == []
+
+    # Mengaku PNG tapi isinya JPEG: disimpan sebagai JPEG
+    jpeg = b"\xff\xd8\xff\xe0" + b"isi-jpeg" * 10
+    uploaded = _upload(client, ids[0], jpeg)
+    assert uploaded["image_url"].endswith(".jpg")
+    assert _staged_files() == []
+
+
+def _real_png(width=800, height=400):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 120, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _variants(db, id_image):
+    db.expire_all()
+    return db.scalars(select(m.WisataImageVariant).where(m.WisataImageVariant.id_image == id_image)).all()
+
+
+@pytest.fixture
+def variant_pool(monkeypatch):
+    pytest.importorskip("PIL")
+    # Thread pool cukup untuk test; yang diuji render_variants-nya, bukan process pool
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        monkeypatch.setattr(image_service, "_get_variant_pool", lambda: pool)
+        yield pool
+
+
+def test_variants_rendered_then_copied_for_duplicate(client, db, add_wisata, variant_pool):
+    ids = add_wisata(2, images=0)
+    content = _real_png()
+
+    first = _upload(client, ids[0], content)
+    asyncio.run(generate_image_variants(first["id_image"]))
+    variants = _variants(db, first["id_image"])
+
+    # Tidak pernah diperbesar: 1280 dilewati untuk gambar selebar 800
+    assert {v.width for v in variants} == {320, 640}
+    assert {"jpeg", "webp"} <= {v.format for v in variants}
+    for v in variants:
+        assert v.height == v.width // 2
+        assert os.path.exists(get_storage().path(v.image_url))
+
+    folder = os.path.dirname(get_storage().path(variants[0].image_url))
+    files_before = set(os.listdir(folder))
+    second = _upload(client, ids[1], content)
+    asyncio.run(generate_image_variants(second["id_image"]))
+    copies = _variants(db, second["id_image"])
+
+    # Upload dengan isi sama memakai file turunan yang sudah ada
+    assert sorted((v.image_url, v.format, v.width) for v in copies) == sorted(
+        (v.image_url, v.format, v.width) for v in variants
+    )
+    assert set(os.listdir(folder)) == files_before
+
+
+def test_uploaded_image_served_from_storage_root(client, add_wisata):
+    ids = add_wisata(1, images=0)
+    uploaded = _upload(client, ids[0])
+
+    response = client.get(f"/{uploaded['image_url']}")
+    assert response.status_code == 200
+    assert response.content == PNG
+
+
+class _ExpiringUrlStorage(LocalStorage):
+    """LocalStorage dengan URL yang berganti tiap epoch, seperti presigned URL S3."""
+
+    epoch = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def url_epoch(self):
+        return self.epoch
+
+    def url(self, key):
+        return f"{key}?expires={int(self.epoch.timestamp())}"
+
+
+def test_presigned_urls_refresh_cached_detail(client, add_wisata):
+    ids = add_wisata(1)
+    storage = _ExpiringUrlStorage(root=get_storage().root)
+    set_storage(storage)
+    try:
+        first = client.get(f"/wisata/{ids[0]}")
+        storage.epoch += timedelta(minutes=30)
+        second = client.get(f"/wisata/{ids[0]}", headers={"If-None-Match": first.headers["etag"]})
+    finally:
+        set_storage(None)
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert second.json()["images"][0] != first.json()["images"][0]
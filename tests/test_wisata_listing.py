@@ -0,0 +1,230 @@
+from datetime import datetime, time as dt_time, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import orm_models as m
+from app.core import metrics, pagination
+
+
+@pytest.fixture
+def sql_counts():
+    """Jumlah query per request, diambil dari hook metrics."""
+    counts = []
+    remove = metrics.add_request_hook(lambda method, route, code, seconds, stats: counts.append(stats.sql_count))
+    yield counts
+    remove()
+
+
+def test_published_query_count_independent_of_page_size(client, add_wisata, sql_counts):
+    add_wisata(30, images=3)
+
+    for limit in (1, 5, 25):
+        response = client.get("/wisata/published", params={"limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == limit
+
+    # 1 halaman + selectin gambar, varian, tag, fasilitas + 3 facet
+    assert sql_counts == [8, 8, 8]
+
+
+def test_published_next_page_skips_facets(client, add_wisata, sql_counts):
+    add_wisata(10)
+
+    first = client.get("/wisata/published", params={"limit": 4}).json()
+    second = client.get("/wisata/published", params={"limit": 4, "after": first["next_cursor"]}).json()
+
+    assert "facets" not in second or second["facets"] is None
+    assert sql_counts == [8, 5]
+
+
+def test_published_cached_page_runs_no_query(client, add_wisata, sql_counts):
+    add_wisata(5)
+    first = client.get("/wisata/published")
+    second = client.get("/wisata/published")
+
+    assert second.content == first.content
+    assert sql_counts == [8, 0]
+
+
+@pytest.mark.query_budget(1)
+def test_published_summary_next_page_single_query(client, add_wisata):
+    ids = add_wisata(5)
+    response = client.get("/wisata/published", params={"view": "summary", "after": max(ids)})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 4
+
+
+def test_unpublish_changes_conditional_listing(client, add_wisata, add_user, auth_headers):
+    ids = add_wisata(3)
+    editor = auth_headers(add_user("editor", role=m.UserRole.editor))
+    first = client.get("/wisata/published")
+    assert "last-modified" not in first.headers
+
+    assert client.patch(f"/wisata/{ids[0]}", json={"status": "draft"}, headers=editor).status_code == 200
+
+    response = client.get("/wisata/published", headers={
+        "If-None-Match": first.headers["etag"],
+        "If-Modified-Since": format_datetime(datetime.now(timezone.utc), usegmt=True),
+    })
+    assert response.status_code == 200
+    assert ids[0] not in [item["id_wisata"] for item in response.json()["items"]]
+    # Tanpa If-None-Match pun tidak boleh 304
+    only_since = client.get("/wisata/published", headers={
+        "If-Modified-Since": format_datetime(datetime.now(timezone.utc), usegmt=True),
+    })
+    assert only_since.status_code == 200
+
+
+@pytest.fixture
+def filter_data(db):
+    """Tiga wisata published (satu buka lewat tengah malam, satu 24 jam) dan satu draft."""
+    pantai, gunung = m.Category(name="Pantai"), m.Category(name="Gunung")
+    t0, t1 = m.Tag(name="keluarga"), m.Tag(name="sunset")
+    f0, f1 = m.Facility(name="parkir"), m.Facility(name="toilet")
+
+    def wisata(nama, category, tags, facilities, price, open_time, close_time, status=m.WisataStatus.published):
+        return m.Wisata(
+            nama_wisata=nama, deskripsi=nama, lokasi="Kaltim", category=category, tag=tags,
+            facilities=facilities, ticket_price=price, open_time=open_time, close_time=close_time, status=status,
+        )
+
+    items = {
+        "siang": wisata("Siang", pantai, [t0, t1], [f0], 10000, dt_time(8), dt_time(17)),
+        "malam": wisata("Malam", pantai, [t0], [f0, f1], None, dt_time(18), dt_time(2)),
+        "24jam": wisata("24 Jam", gunung, [t1], [f1], 50000, dt_time(0), dt_time(0)),
+        "draft": wisata("Draft", pantai, [t0], [f0], 0, dt_time(8), dt_time(17), status=m.WisataStatus.draft),
+    }
+    db.add_all(items.values())
+    db.commit()
+    ids = {name: item.id_wisata for name, item in items.items()}
+    ids.update(pantai=pantai.id_category, gunung=gunung.id_category, t0=t0.id_tag, t1=t1.id_tag,
+               f0=f0.id_facility, f1=f1.id_facility)
+    return ids
+
+
+def _published(client, **params):
+    response = client.get("/wisata/published", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _names(page):
+    return sorted(item["nama_wisata"] for item in page["items"])
+
+
+@pytest.mark.parametrize("params, expected", [
+    (lambda d: {"category_id": d["pantai"]}, ["Malam", "Siang"]),
+    # Beberapa tag / fasilitas = harus punya semuanya
+    (lambda d: {"tag_id": [d["t0"], d["t1"]]}, ["Siang"]),
+    (lambda d: {"facility_id": [d["f1"]]}, ["24 Jam", "Malam"]),
+    (lambda d: {"facility_id": [d["f0"], d["f1"]]}, ["Malam"]),
+    (lambda d: {"min_price": 20000}, ["24 Jam"]),
+    # ticket_price NULL = gratis
+    (lambda d: {"max_price": 10000}, ["Malam", "Siang"]),
+    (lambda d: {"category_id": d["pantai"], "max_price": 5000}, ["Malam"]),
+])
+def test_published_filters(client, filter_data, params, expected):
+    assert _names(_published(client, **params(filter_data))) == expected
+
+
+@pytest.mark.parametrize("open_at, expected", [
+    ("12:00", ["24 Jam", "Siang"]),
+    ("17:00", ["24 Jam"]),
+    ("18:00", ["24 Jam", "Malam"]),
+    # Lewat tengah malam: buka 18:00 - 02:00
+    ("01:00", ["24 Jam", "Malam"]),
+    ("02:00", ["24 Jam"]),
+])
+def test_published_open_at_overnight(client, filter_data, open_at, expected):
+    assert _names(_published(client, open_at=open_at)) == expected
+
+
+def _facet_counts(page):
+    return {group: {f["name"]: f["count"] for f in facets} for group, facets in page["facets"].items()}
+
+
+def test_facet_counts_follow_filters(client, filter_data):
+    assert _facet_counts(_published(client)) == {
+        "category": {"Pantai": 2, "Gunung": 1},
+        "tag": {"keluarga": 2, "sunset": 2},
+        "facility": {"parkir": 2, "toilet": 2},
+    }
+    assert _facet_counts(_published(client, tag_id=filter_data["t0"])) == {
+        "category": {"Pantai": 2},
+        "tag": {"keluarga": 2, "sunset": 1},
+        "facility": {"parkir": 2, "toilet": 1},
+    }
+
+
+def _pages(client, url, limit, headers=None):
+    """Ikuti next_cursor sampai habis; return [(id per halaman, next_cursor)]."""
+    pages, after = [], None
+    while True:
+        params = {"limit": limit, **({"after": after} if after is not None else {})}
+        body = client.get(url, params=params, headers=headers).json()
+        after = body["next_cursor"]
+        pages.append(([item["id_wisata"] for item in body["items"]], after))
+        if after is None:
+            return pages
+
+
+def test_keyset_pages_and_next_cursor(client, add_wisata, add_user, auth_headers):
+    ids = add_wisata(5)
+    editor = auth_headers(add_user("editor", role=m.UserRole.editor))
+
+    assert _pages(client, "/wisata/", 2, editor) == [
+        (ids[0:2], ids[1]),
+        (ids[2:4], ids[3]),
+        (ids[4:5], None),
+    ]
+    # Halaman terakhir yang pas penuh tidak memberi cursor ke halaman kosong
+    assert _pages(client, "/wisata/", 5, editor) == [(ids, None)]
+    # Listing published terbaru dulu (descending)
+    assert _pages(client, "/wisata/published", 2) == [
+        (ids[:2:-1], ids[3]),
+        (ids[2:0:-1], ids[1]),
+        ([ids[0]], None),
+    ]
+
+
+def test_keyset_after_boundaries(client, add_wisata, add_user, auth_headers):
+    ids = add_wisata(4)
+    editor = auth_headers(add_user("editor", role=m.UserRole.editor))
+
+    def page(after, limit=10):
+        body = client.get("/wisata/", params={"limit": limit, "after": after}, headers=editor).json()
+        return [item["id_wisata"] for item in body["items"]], body["next_cursor"]
+
+    # after eksklusif: baris dengan id == after tidak ikut
+    assert page(ids[1]) == (ids[2:], None)
+    assert page(ids[-1]) == ([], None)
+    assert page(0) == (ids, None)
+    # Cursor id yang sudah dihapus tetap jalan (lompat lewat index, bukan posisi)
+    assert page(ids[1] + 1000) == ([], None)
+    assert page(ids[0], limit=1) == ([ids[1]], ids[1])
+
+
+def test_keyset_limit_validated_and_clamped(client, db, add_wisata, add_user, auth_headers, monkeypatch):
+    add_wisata(4)
+    editor = auth_headers(add_user("editor", role=m.UserRole.editor))
+    assert client.get("/wisata/", params={"limit": 0}, headers=editor).status_code == 422
+    assert client.get("/wisata/", params={"limit": pagination.MAX_PAGE_SIZE + 1}, headers=editor).status_code == 422
+
+    # Pemanggil service langsung juga dibatasi
+    monkeypatch.setattr(pagination, "MAX_PAGE_SIZE", 3)
+    rows, next_cursor = pagination.keyset_paginate(db.query(m.Wisata), m.Wisata.id_wisata, limit=50)
+    assert len(rows) == 3 and next_cursor == rows[-1].id_wisata
+    rows, next_cursor = pagination.keyset_paginate(db.query(m.Wisata), m.Wisata.id_wisata, limit=0)
+    assert len(rows) == 1
+
+
+def test_keyset_descending(db, add_wisata):
+    ids = add_wisata(5)
+    rows, next_cursor = pagination.keyset_paginate(db.query(m.Wisata), m.Wisata.id_wisata, limit=2, descending=True)
+    assert [r.id_wisata for r in rows] == ids[:-3:-1] and next_cursor == ids[3]
+
+    rows, next_cursor = pagination.keyset_paginate(
+        db.query(m.Wisata), m.Wisata.id_wisata, limit=2, after=next_cursor, descending=True
+    )
+    assert [r.id_wisata for r in rows] == [ids[2], ids[1]] and next_cursor == ids[1]
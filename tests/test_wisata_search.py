@@ -0,0 +1,111 @@
+import asyncio
+from datetime import time
+
+import pytest
+from sqlalchemy.orm import Session
+
+import orm_models as m
+from app.core import database
+from app.api.wisata import wisata_service
+
+NAMES = ["Pantai Lamaru", "Pantai Manggar", "Pantaiku Resort", "Air Terjun Tanah Merah"]
+
+
+def rename(db: Session, ids, names=NAMES):
+    for id_wisata, name in zip(ids, names):
+        db.get(m.Wisata, id_wisata).nama_wisata = name
+    db.commit()
+
+
+def names(response):
+    return [item["nama_wisata"] for item in response.json()["items"]]
+
+
+def test_search_full_text(client, db, add_wisata):
+    rename(db, add_wisata(4))
+
+    response = client.get("/wisata/search", params={"q": "pantai"})
+    assert response.status_code == 200
+    # Token utuh "pantai", "Pantaiku" tidak ikut
+    assert sorted(names(response)) == ["Pantai Lamaru", "Pantai Manggar"]
+    assert names(client.get("/wisata/search", params={"q": "terjun merah"})) == ["Air Terjun Tanah Merah"]
+
+
+def test_search_ignores_fts_operators(client, db, add_wisata):
+    rename(db, add_wisata(4))
+
+    response = client.get("/wisata/search", params={"q": 'lamaru* "pantai:'})
+    assert response.status_code == 200
+    assert names(response) == ["Pantai Lamaru"]
+
+
+def test_search_skips_draft(client, db, add_wisata):
+    rename(db, add_wisata(2, status=m.WisataStatus.draft))
+    assert names(client.get("/wisata/search", params={"q": "pantai"})) == []
+
+
+def test_search_fallback_when_full_text_empty(client, db, add_wisata):
+    rename(db, add_wisata(4))
+
+    first = client.get("/wisata/search", params={"q": "antai", "limit": 2}).json()
+    assert len(first["items"]) == 2
+    second = client.get("/wisata/search", params={"q": "antai", "limit": 2, "offset": first["next_cursor"]}).json()
+
+    found = [item["nama_wisata"] for item in first["items"] + second["items"]]
+    assert sorted(found) == ["Pantai Lamaru", "Pantai Manggar", "Pantaiku Resort"]
+
+
+def test_search_no_fallback_past_last_full_text_page(client, db, add_wisata):
+    rename(db, add_wisata(4))
+
+    # Full-text punya 2 hasil; halaman berikutnya kosong, bukan diisi hasil fuzzy ("Pantaiku Resort")
+    response = client.get("/wisata/search", params={"q": "pantai", "limit": 2, "offset": 2})
+    assert names(response) == []
+
+
+def _pg_search(url, q, limit=20, offset=0):
+    async def run():
+        engine = database.create_async_db_engine(url)
+        try:
+            async with database.AsyncSessionLocal(bind=engine) as db:
+                page = await wisata_service.search_wisata(db, q, limit=limit, offset=offset)
+                return [w.nama_wisata for w in page["items"]]
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def pg_wisata(pg_url):
+    engine = database.create_db_engine(pg_url)
+    with Session(engine) as db:
+        category = m.Category(name="Pantai")
+        db.add_all([
+            m.Wisata(
+                nama_wisata=name,
+                deskripsi=f"Deskripsi {name}",
+                lokasi="Balikpapan",
+                open_time=time(8),
+                close_time=time(17),
+                category=category,
+                status=m.WisataStatus.published,
+            )
+            for name in NAMES
+        ])
+        db.commit()
+    engine.dispose()
+    return pg_url
+
+
+def test_pg_search_tsvector(pg_wisata):
+    assert sorted(_pg_search(pg_wisata, "pantai")) == ["Pantai Lamaru", "Pantai Manggar"]
+
+
+def test_pg_search_trigram_fallback(pg_wisata):
+    # Typo: full-text kosong, trigram di nama
+    assert _pg_search(pg_wisata, "Pantai Lamaur")[0] == "Pantai Lamaru"
+
+
+def test_pg_search_no_fallback_past_last_page(pg_wisata):
+    assert _pg_search(pg_wisata, "pantai", limit=2, offset=2) == []